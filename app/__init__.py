@@ -1,3 +1,6 @@
+import multiprocessing
+import os
+
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from config import Config
@@ -17,6 +20,32 @@ def create_app(config_class=Config):
     # Подключаем базу данных к приложению
     db.init_app(app)
 
+    # Кэш ответов /api/slots берёт TTL и размер из конфига
+    from app.cache import slots_cache
+    slots_cache.init_app(app)
+
+    # Индекс слотов в памяти (строится при первом запросе)
+    from app.slot_index import slot_index
+    slot_index.init_app(app)
+
+    # Метрики: JSON-логи из конфига, сборщики статистики кэша, индекса
+    # и пула процессов
+    from services.metrics import metrics
+    from services.parser_pool import collect_pool_metrics
+    metrics.init_app(app)
+    metrics.register_collector(slots_cache.collect_metrics)
+    metrics.register_collector(slot_index.collect_metrics)
+    metrics.register_collector(collect_pool_metrics)
+
+    # Реестр парсеров: entry points и PARSERS / PARSERS_ENABLED из конфига
+    # (сами модули парсеров здесь не импортируются)
+    from parsers.registry import parser_registry
+    parser_registry.init_app(app)
+
+    # Очередь фоновых обновлений: число потоков и размер истории из конфига
+    from services.jobs import refresh_jobs
+    refresh_jobs.init_app(app)
+
     # Регистрируем маршруты (роуты) из отдельного модуля
     from app.views import main_bp
     app.register_blueprint(main_bp)
@@ -25,4 +54,25 @@ def create_app(config_class=Config):
     with app.app_context():
         db.create_all()
 
+    # Периодическое обновление слотов в этом же процессе (если включено)
+    if app.config.get("SCHEDULER_ENABLED") and _is_serving_process(app):
+        from services.scheduler import SlotScheduler
+        scheduler = SlotScheduler.from_app(app)
+        app.extensions["slot_scheduler"] = scheduler
+        scheduler.start(app)
+
     return app
+
+
+def _is_serving_process(app) -> bool:
+    """
+    Процесс, который действительно обслуживает приложение.
+    Не считаются:
+    - воркеры парсеров (spawn заново импортирует главный модуль);
+    - родительский процесс отладочного сервера Werkzeug с перезагрузкой:
+      он только следит за файлами, а приложение работает в дочернем
+      (WERKZEUG_RUN_MAIN=true).
+    """
+    if multiprocessing.parent_process() is not None:
+        return False
+    return not app.debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true"
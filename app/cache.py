@@ -0,0 +1,127 @@
+"""
+Кэш готовых ответов /api/slots.
+
+Данные меняются только когда апдейтер коммитит новое состояние слотов,
+поэтому ответы кэшируются по нормализованным параметрам запроса и
+версионируются счётчиком поколений: апдейтер после коммита вызывает
+bump_generation(), и все старые записи сразу становятся недействительными.
+
+Кэш живёт в памяти процесса (LRU + TTL). В другом процессе поколение
+своё, поэтому TTL ограничивает, насколько долго чужой воркер может
+отдавать устаревшие данные — и записи кэша, и ETag (в него входит окно
+времени длиной TTL).
+"""
+
+from collections import OrderedDict
+import hashlib
+import threading
+import time
+import uuid
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class ResponseCache:
+    """
+    Потокобезопасный LRU-кэш с TTL и счётчиком поколений.
+    Значения — уже сериализованные тела ответов (bytes).
+    """
+
+    def __init__(self, ttl_seconds: float = 60, max_entries: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, int, bytes]]" = OrderedDict()
+        # Метка процесса: после рестарта и в соседних воркерах ETag'и другие
+        self._boot = uuid.uuid4().hex[:8]
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def init_app(self, app) -> None:
+        self.ttl_seconds = app.config.get("SLOTS_CACHE_TTL", self.ttl_seconds)
+        self.max_entries = app.config.get("SLOTS_CACHE_MAX_ENTRIES", self.max_entries)
+
+    # ---------- Поколения ---------- #
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def bump_generation(self) -> None:
+        """Данные в БД поменялись: всё закэшированное устарело."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def etag(self, key: Hashable, generation: Optional[int] = None) -> str:
+        """
+        ETag ответа: поколение данных + параметры + окно времени длиной TTL
+        (чтобы воркер, который не видел коммит апдейтера, не подтверждал
+        устаревший ответ дольше TTL).
+        """
+        if generation is None:
+            generation = self._generation
+        window = int(time.time() // max(self.ttl_seconds, 1))
+        raw = f"{self._boot}:{generation}:{window}:{key!r}".encode()
+        return hashlib.sha1(raw).hexdigest()[:20]
+
+    # ---------- Чтение / запись ---------- #
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, generation, body = entry
+                if generation == self._generation and now - stored_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return body
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, body: bytes, generation: Optional[int] = None) -> None:
+        """
+        generation — поколение, при котором ответ был построен. Если за время
+        построения апдейтер успел закоммитить, такой ответ не кэшируем.
+        """
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic(), self._generation, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "generation": self._generation,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def collect_metrics(self):
+        """Счётчики кэша для /metrics (см. services.metrics)."""
+        stats = self.stats()
+        return [
+            (f"slots_cache_{name}_total", f"Кэш ответов /api/slots: {name}", "counter",
+             {(): stats[name]})
+            for name in ("hits", "misses", "evictions")
+        ] + [
+            ("slots_cache_entries", "Кэш ответов /api/slots: записей", "gauge",
+             {(): stats["entries"]}),
+            ("slots_cache_generation", "Поколение данных слотов", "gauge",
+             {(): stats["generation"]}),
+        ]
+
+
+# Общий кэш ответов /api/slots (подключается в create_app)
+slots_cache = ResponseCache()
@@ -0,0 +1,98 @@
+"""
+Фильтры поиска слотов: разбор параметров запроса и применение к запросу.
+
+Вынесено из views, чтобы один и тот же набор фильтров использовали
+/api/slots, проверка планов запросов и другие места.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, time
+from typing import Mapping, Optional
+
+from app.models import Slot
+
+
+@dataclass(frozen=True)
+class SlotFilters:
+    """
+    Нормализованные фильтры /api/slots.
+    dt_start/dt_end заданы только если пришла корректная дата.
+    """
+    dt_start: Optional[datetime] = None
+    dt_end: Optional[datetime] = None
+    min_duration: Optional[int] = None
+    club: Optional[str] = None
+    free_only: bool = False
+
+    @classmethod
+    def from_args(cls, args: Mapping) -> "SlotFilters":
+        """
+        Собирает фильтры из request.args (или любого словаря строк).
+        Кривые дату/время просто игнорируем, как и раньше.
+        """
+        date_str = args.get("date")          # из <input type="date"> приходит YYYY-MM-DD
+        time_from_str = args.get("time_from")
+        time_to_str = args.get("time_to")
+        club = args.get("club") or None
+        free_only = args.get("free_only") == "true"
+
+        try:
+            min_duration = int(args.get("min_duration") or 0) or None
+        except ValueError:
+            min_duration = None
+
+        dt_start = dt_end = None
+        if date_str:
+            try:
+                # Преобразуем строку в объект date
+                date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
+
+                # По умолчанию берём весь день
+                start = datetime.combine(date_obj, time(0, 0))
+                end = datetime.combine(date_obj, time(23, 59, 59))
+
+                # Если указано время "с"
+                if time_from_str:
+                    hours, minutes = map(int, time_from_str.split(":"))
+                    start = datetime.combine(date_obj, time(hours, minutes))
+
+                # Если указано время "до"
+                if time_to_str:
+                    hours, minutes = map(int, time_to_str.split(":"))
+                    end = datetime.combine(date_obj, time(hours, minutes))
+
+                dt_start, dt_end = start, end
+            except ValueError:
+                # Если пришёл кривой формат даты/времени — просто игнорируем фильтр
+                pass
+
+        return cls(
+            dt_start=dt_start,
+            dt_end=dt_end,
+            min_duration=min_duration,
+            club=club,
+            free_only=free_only,
+        )
+
+    def apply(self, query):
+        """Накладывает фильтры на запрос по Slot (без сортировки)."""
+        # ----- Фильтр по дате и времени -----
+        if self.dt_start is not None:
+            query = query.filter(
+                Slot.start_datetime >= self.dt_start,
+                Slot.start_datetime <= self.dt_end,
+            )
+
+        # ----- Минимальная длительность -----
+        if self.min_duration:
+            query = query.filter(Slot.duration_minutes >= self.min_duration)
+
+        # ----- Фильтр по клубу -----
+        if self.club:
+            query = query.filter(Slot.club == self.club)
+
+        # ----- Показывать только свободные -----
+        if self.free_only:
+            query = query.filter(Slot.status == "free")
+
+        return query
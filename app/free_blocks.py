@@ -0,0 +1,153 @@
+"""
+Поиск непрерывных свободных промежутков ("2 часа подряд на любом корте
+с 18:00 до 22:00").
+
+Парсеры отдают слоты фиксированной длины (у YClients — по 60 минут),
+поэтому фильтр min_duration по отдельным строкам не находит двухчасовое
+окно из двух свободных часов подряд. Здесь свободные слоты каждого корта
+склеиваются в максимальные промежутки одним проходом (sweep) по слотам,
+отсортированным по началу: слот, начинающийся не позже конца текущего
+промежутка корта, продлевает его, иначе промежуток закрывается.
+
+Промежутки считаются в пределах дня (как и фильтр по дате): слоты
+соседних дней не склеиваются, даже если идут подряд через полночь.
+"""
+
+from dataclasses import dataclass, field, replace
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app import db
+from app.filters import SlotFilters
+from app.models import Slot
+from app.slot_index import slot_index
+
+
+@dataclass
+class FreeBlock:
+    """Непрерывный свободный промежуток на одном корте."""
+    club: str
+    court: str
+    start: datetime
+    end: datetime
+    # Слоты, из которых склеен промежуток (строки выборки / индекса)
+    slots: List[Any] = field(default_factory=list)
+
+    @property
+    def duration_minutes(self) -> int:
+        return int((self.end - self.start).total_seconds() // 60)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "club": self.club,
+            "court": self.court,
+            "date": self.start.strftime("%d.%m.%Y"),
+            "time_range": f"{self.start.strftime('%H:%M')}–{self.end.strftime('%H:%M')}",
+            "duration_minutes": self.duration_minutes,
+            # Слоты, которые нужно забронировать, чтобы занять промежуток
+            "slot_ids": [
+                slot.id for slot in self.slots
+                if slot.start_datetime < self.end and slot.end_datetime > self.start
+            ],
+        }
+
+
+def merge_free_blocks(rows: Iterable[Any]) -> Iterator[FreeBlock]:
+    """
+    Свободные слоты (по возрастанию start_datetime) -> максимальные
+    промежутки по кортам. Соседние и перекрывающиеся слоты склеиваются
+    в пределах дня начала слота. Промежутки выдаются по мере закрытия
+    (не по порядку начала).
+    """
+    open_blocks: Dict[Tuple[str, str], FreeBlock] = {}
+    current_day: Optional[date] = None
+    for row in rows:
+        day = row.start_datetime.date()
+        if day != current_day:
+            # Начался следующий день — промежутки прошлого закрыты
+            yield from open_blocks.values()
+            open_blocks.clear()
+            current_day = day
+
+        key = (row.club, row.court)
+        block = open_blocks.get(key)
+        if block is not None and row.start_datetime <= block.end:
+            if row.end_datetime > block.end:
+                block.end = row.end_datetime
+            block.slots.append(row)
+            continue
+
+        if block is not None:
+            yield block
+        open_blocks[key] = FreeBlock(
+            club=row.club,
+            court=row.court,
+            start=row.start_datetime,
+            end=row.end_datetime,
+            slots=[row],
+        )
+    yield from open_blocks.values()
+
+
+def _day_filters(filters: SlotFilters) -> SlotFilters:
+    """
+    Свободные слоты тех же дней и клуба, но без окна по времени и
+    длительности: слот, начавшийся до time_from, тоже может покрыть окно.
+    """
+    dt_start = dt_end = None
+    if filters.dt_start is not None:
+        day = filters.dt_start.date()
+        dt_start = datetime.combine(day, time(0, 0))
+        dt_end = datetime.combine(day, time(23, 59, 59))
+    return SlotFilters(dt_start=dt_start, dt_end=dt_end, club=filters.club, free_only=True)
+
+
+def free_slot_rows(filters: SlotFilters) -> Iterable[Any]:
+    """Свободные слоты по возрастанию начала: из индекса или из БД."""
+    day_filters = _day_filters(filters)
+    if slot_index.enabled:
+        return slot_index.query(day_filters)
+
+    stmt = select(
+        Slot.id, Slot.club, Slot.court, Slot.start_datetime, Slot.end_datetime
+    )
+    stmt = day_filters.apply(stmt).order_by(Slot.start_datetime, Slot.id)
+    return db.session.execute(stmt)
+
+
+def find_free_blocks(
+    filters: SlotFilters, rows: Optional[Iterable[Any]] = None
+) -> List[FreeBlock]:
+    """
+    Свободные промежутки под фильтры /api/slots:
+    - date + time_from/time_to — промежуток обрезается по окну;
+    - min_duration — минимальная длина (уже после обрезки);
+    - club — только этот клуб.
+    Результат отсортирован по (начало, клуб, корт).
+    """
+    if rows is None:
+        rows = free_slot_rows(filters)
+
+    window: Optional[Tuple[datetime, datetime]] = None
+    if filters.dt_start is not None:
+        window_end = filters.dt_end
+        if window_end.time() == time(23, 59, 59):
+            # "до конца дня" (time_to не задан) — это полночь, а не 23:59:59
+            window_end = datetime.combine(window_end.date() + timedelta(days=1), time(0, 0))
+        window = (filters.dt_start, window_end)
+
+    blocks: List[FreeBlock] = []
+    for block in merge_free_blocks(rows):
+        if window is not None:
+            start, end = max(block.start, window[0]), min(block.end, window[1])
+            if end <= start:
+                continue
+            block = replace(block, start=start, end=end)
+        if filters.min_duration and block.duration_minutes < filters.min_duration:
+            continue
+        blocks.append(block)
+
+    blocks.sort(key=lambda b: (b.start, b.club, b.court))
+    return blocks
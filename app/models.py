@@ -8,6 +8,20 @@ class Slot(db.Model):
     Универсальный слот времени на корте.
     В дальнейшем сюда можно добавить цену, покрытие и т.д.
     """
+    __table_args__ = (
+        # Один слот источника = (source, club, court, start_datetime);
+        # по этому же ключу апдейтер сверяет слоты при синхронизации.
+        db.UniqueConstraint(
+            "source", "club", "court", "start_datetime",
+            name="uq_slot_source_club_court_start",
+        ),
+        # /api/slots всегда сортирует по start_datetime и чаще всего
+        # фильтрует по статусу ("только свободные") и/или клубу.
+        db.Index("ix_slot_status_start", "status", "start_datetime"),
+        db.Index("ix_slot_club_start", "club", "start_datetime"),
+        db.Index("ix_slot_start", "start_datetime"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
 
     club = db.Column(db.String(100), nullable=False)        # Название клуба
@@ -65,3 +79,31 @@ class Slot(db.Model):
             f"<Slot {self.club} {self.court} "
             f"{self.start_datetime}–{self.end_datetime} ({self.status})>"
         )
+
+
+class SlotFreshness(db.Model):
+    """
+    Когда слоты (источник, клуб, корт, дата) последний раз собирались
+    целиком. По этой таблице апдейтер решает, какие даты пора пересобрать.
+    """
+    __table_args__ = (
+        db.UniqueConstraint(
+            "source", "club", "court", "date",
+            name="uq_freshness_source_club_court_date",
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    source = db.Column(db.String(50), nullable=False)
+    club = db.Column(db.String(100), nullable=False)
+    court = db.Column(db.String(50), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+
+    fetched_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return (
+            f"<SlotFreshness {self.source} {self.club} {self.court} "
+            f"{self.date} @ {self.fetched_at}>"
+        )
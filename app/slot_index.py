@@ -0,0 +1,426 @@
+"""
+Индекс слотов в памяти для /api/slots и главной страницы.
+
+Рабочий набор (несколько недель слотов наших клубов) целиком помещается
+в память, поэтому фильтры /api/slots считаются без обращения к БД:
+
+- слоты разложены по дням, внутри дня — массивы (array), отсортированные
+  по (минута начала, id), как и выдача из БД;
+- на каждый клуб, статус и длительность у дня есть битовая маска
+  (int как bitset: бит i — i-й слот дня);
+- фильтр по времени — bisect по минутам начала, остальные фильтры —
+  AND масок, так что запрос стоит O(log n) + размер ответа.
+
+Индекс — неизменяемый снимок: читатели берут ссылку на текущий снимок,
+апдейтер после синхронизации собирает новый (целиком или только
+затронутые дни) и подменяет ссылку.
+
+Апдейтер обновляет индекс своего процесса. Остальные процессы (другие
+воркеры веб-сервера, отдельный run_scheduler.py) перечитывают его из БД,
+если снимок старше SLOT_INDEX_MAX_AGE — как TTL у кэша ответов.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+import threading
+import time
+from typing import (
+    Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple,
+)
+
+from sqlalchemy import select
+
+from app import db
+from app.filters import SlotFilters
+from app.models import Slot
+from app.slot_listing import decode_cursor, encode_cursor, row_to_dict
+
+_COLUMNS = (
+    Slot.id,
+    Slot.club,
+    Slot.court,
+    Slot.start_datetime,
+    Slot.end_datetime,
+    Slot.duration_minutes,
+    Slot.status,
+    Slot.source,
+)
+
+
+class IndexedSlot(namedtuple(
+    "IndexedSlot",
+    "id club court start_datetime end_datetime duration_minutes status source",
+)):
+    """Слот из индекса: те же поля, что у строки выборки и у Slot."""
+    __slots__ = ()
+
+    @property
+    def start(self) -> datetime:
+        return self.start_datetime
+
+    @property
+    def end(self) -> datetime:
+        return self.end_datetime
+
+
+def _minute_of_day(dt: datetime) -> int:
+    return dt.hour * 60 + dt.minute
+
+
+def _iter_bits(mask: int) -> Iterator[int]:
+    """Номера установленных битов по возрастанию."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class _DayIndex:
+    """Слоты одного дня: столбцы + битовые маски по клубу/статусу/длительности."""
+
+    __slots__ = (
+        "day", "day_start", "ids", "starts", "ends", "durations",
+        "clubs", "courts", "statuses", "sources", "names",
+        "by_club", "by_status", "duration_keys", "duration_suffix",
+    )
+
+    def __init__(self, day: date, rows: Sequence[Any]):
+        """rows — строки выборки одного дня, отсортированные по (start, id)."""
+        self.day = day
+        self.day_start = datetime.combine(day, datetime.min.time())
+
+        # Время — с точностью до минуты, как его и сохраняет апдейтер (SlotBatch)
+        self.ids = array("q")
+        self.starts = array("H")     # минута начала от полуночи
+        self.ends = array("l")       # минута конца от полуночи (может быть > 1440)
+        self.durations = array("H")
+        # Строки храним кодами в общей для дня таблице names
+        self.clubs = array("H")
+        self.courts = array("H")
+        self.statuses = array("H")
+        self.sources = array("H")
+        self.names: List[Optional[str]] = []
+        codes: Dict[Optional[str], int] = {}
+
+        def code(value: Optional[str]) -> int:
+            found = codes.get(value)
+            if found is None:
+                found = codes[value] = len(self.names)
+                self.names.append(value)
+            return found
+
+        self.by_club: Dict[str, int] = {}
+        self.by_status: Dict[str, int] = {}
+        by_duration: Dict[int, int] = {}
+
+        for i, row in enumerate(rows):
+            bit = 1 << i
+            self.ids.append(row.id)
+            self.starts.append(_minute_of_day(row.start_datetime))
+            self.ends.append(
+                int((row.end_datetime - self.day_start).total_seconds() // 60)
+            )
+            self.durations.append(row.duration_minutes)
+            self.clubs.append(code(row.club))
+            self.courts.append(code(row.court))
+            self.statuses.append(code(row.status))
+            self.sources.append(code(row.source))
+
+            self.by_club[row.club] = self.by_club.get(row.club, 0) | bit
+            self.by_status[row.status] = self.by_status.get(row.status, 0) | bit
+            by_duration[row.duration_minutes] = (
+                by_duration.get(row.duration_minutes, 0) | bit
+            )
+
+        # Маски "длительность >= d": суффиксные OR по отсортированным длительностям
+        self.duration_keys = sorted(by_duration)
+        self.duration_suffix = [0] * (len(self.duration_keys) + 1)
+        for j in range(len(self.duration_keys) - 1, -1, -1):
+            self.duration_suffix[j] = (
+                self.duration_suffix[j + 1] | by_duration[self.duration_keys[j]]
+            )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def slot(self, i: int) -> IndexedSlot:
+        names = self.names
+        start_dt = self.day_start + timedelta(minutes=self.starts[i])
+        return IndexedSlot(
+            id=self.ids[i],
+            club=names[self.clubs[i]],
+            court=names[self.courts[i]],
+            start_datetime=start_dt,
+            end_datetime=self.day_start + timedelta(minutes=self.ends[i]),
+            duration_minutes=self.durations[i],
+            status=names[self.statuses[i]],
+            source=names[self.sources[i]],
+        )
+
+    def match(
+        self,
+        filters: SlotFilters,
+        after: Optional[Tuple[int, int]] = None,
+    ) -> int:
+        """
+        Маска слотов дня, прошедших фильтры.
+        after — (минута, id) курсора: только слоты строго после него.
+        """
+        lo, hi = 0, len(self.ids)
+        if filters.dt_start is not None:
+            lo = bisect_left(self.starts, _minute_of_day(filters.dt_start))
+            hi = bisect_right(self.starts, _minute_of_day(filters.dt_end))
+
+        if after is not None:
+            after_minute, after_id = after
+            pos = bisect_right(self.starts, after_minute)
+            # Внутри одной минуты слоты упорядочены по id
+            while (
+                pos > 0
+                and self.starts[pos - 1] == after_minute
+                and self.ids[pos - 1] > after_id
+            ):
+                pos -= 1
+            lo = max(lo, pos)
+
+        if lo >= hi:
+            return 0
+        mask = ((1 << hi) - 1) ^ ((1 << lo) - 1)
+
+        if filters.min_duration:
+            j = bisect_left(self.duration_keys, filters.min_duration)
+            mask &= self.duration_suffix[j]
+        if filters.club:
+            mask &= self.by_club.get(filters.club, 0)
+        if filters.free_only:
+            mask &= self.by_status.get("free", 0)
+        return mask
+
+
+class _Snapshot:
+    """Неизменяемый набор дней индекса."""
+
+    __slots__ = ("days", "order", "built_at", "slots")
+
+    def __init__(self, days: Dict[date, _DayIndex], built_at: float):
+        self.days = days
+        self.order = sorted(days)
+        self.built_at = built_at
+        self.slots = sum(len(day) for day in days.values())
+
+
+def _build_days(rows: Iterable[Any]) -> Dict[date, _DayIndex]:
+    """Строки, отсортированные по (start_datetime, id) -> индексы по дням."""
+    days: Dict[date, _DayIndex] = {}
+    current: Optional[date] = None
+    bucket: List[Any] = []
+    for row in rows:
+        day = row.start_datetime.date()
+        if day != current:
+            if bucket:
+                days[current] = _DayIndex(current, bucket)
+            current, bucket = day, []
+        bucket.append(row)
+    if bucket:
+        days[current] = _DayIndex(current, bucket)
+    return days
+
+
+class SlotIndex:
+    """
+    Индекс слотов процесса. query() / fetch_page() отвечают на те же
+    фильтры, что и SQL-запрос /api/slots, в том же порядке (start, id).
+    """
+
+    def __init__(self, enabled: bool = True, max_age_seconds: float = 60):
+        self.enabled = enabled
+        self.max_age_seconds = max_age_seconds
+
+        self._snapshot: Optional[_Snapshot] = None
+        self._lock = threading.Lock()
+        self.rebuilds = 0
+        self.patches = 0
+
+    def init_app(self, app) -> None:
+        self.enabled = app.config.get("SLOT_INDEX_ENABLED", self.enabled)
+        self.max_age_seconds = app.config.get("SLOT_INDEX_MAX_AGE", self.max_age_seconds)
+
+    # ---------- Построение ---------- #
+
+    def _load(self, stmt) -> Dict[date, _DayIndex]:
+        stmt = stmt.order_by(Slot.start_datetime, Slot.id).execution_options(
+            yield_per=5000
+        )
+        return _build_days(db.session.execute(stmt))
+
+    def rebuild(self) -> None:
+        """Полностью перечитывает индекс из БД (нужен контекст приложения)."""
+        with self._lock:
+            self._rebuild_locked()
+
+    def _rebuild_locked(self) -> None:
+        started = time.perf_counter()
+        snapshot = _Snapshot(self._load(select(*_COLUMNS)), time.monotonic())
+        self._snapshot = snapshot
+        self.rebuilds += 1
+        print(
+            f"[SlotIndex] Перестроен: дней {len(snapshot.days)}, "
+            f"слотов {snapshot.slots}, {(time.perf_counter() - started) * 1000:.0f} мс"
+        )
+
+    def refresh_dates(self, dates: Iterable[date]) -> None:
+        """
+        Перечитывает из БД только дни с min(dates) по max(dates),
+        остальные дни берёт из текущего снимка.
+        """
+        dates = set(dates)
+        if not dates:
+            return
+        with self._lock:
+            current = self._snapshot
+            if current is None:
+                # Индекс ещё не строился — соберётся при первом запросе
+                return
+            first, last = min(dates), max(dates)
+            stmt = select(*_COLUMNS).where(
+                Slot.start_datetime >= datetime.combine(first, datetime.min.time()),
+                Slot.start_datetime
+                < datetime.combine(last + timedelta(days=1), datetime.min.time()),
+            )
+            days = {d: idx for d, idx in current.days.items() if not first <= d <= last}
+            days.update(self._load(stmt))
+            # Возраст снимка не сбрасываем: дни вне диапазона могли поменять
+            # другие процессы
+            self._snapshot = _Snapshot(days, current.built_at)
+            self.patches += 1
+
+    def apply_sync(self, scopes: Iterable[Optional[Set[Tuple[str, str, date]]]]) -> None:
+        """
+        Обновление после синхронизации апдейтера. scopes — охват
+        синхронизированных источников; None — источник сверялся целиком,
+        тогда индекс перестраивается полностью.
+        """
+        if not self.enabled or self._snapshot is None:
+            return
+        dates: Set[date] = set()
+        for scope in scopes:
+            if scope is None:
+                self.rebuild()
+                return
+            dates.update(day for _, _, day in scope)
+        self.refresh_dates(dates)
+
+    def ensure_fresh(self) -> Optional[_Snapshot]:
+        """
+        Текущий снимок (перечитывается, если старше max_age_seconds).
+        Пока один поток перестраивает индекс, остальные отвечают по старому.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and (
+            time.monotonic() - snapshot.built_at <= self.max_age_seconds
+        ):
+            return snapshot
+
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._rebuild_locked()
+            return self._snapshot
+
+        if self._lock.acquire(blocking=False):
+            try:
+                if self._snapshot is snapshot:
+                    self._rebuild_locked()
+            finally:
+                self._lock.release()
+        return self._snapshot
+
+    # ---------- Запросы ---------- #
+
+    def query(
+        self,
+        filters: SlotFilters,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, int]] = None,
+    ) -> Iterator[IndexedSlot]:
+        """Слоты под фильтры по порядку (start_datetime, id)."""
+        snapshot = self.ensure_fresh()
+        if snapshot is None:
+            return
+
+        if filters.dt_start is not None:
+            days = [filters.dt_start.date()]
+        else:
+            days = snapshot.order
+        if after is not None:
+            days = days[bisect_left(days, after[0].date()):]
+
+        emitted = 0
+        for day in days:
+            day_index = snapshot.days.get(day)
+            if day_index is None:
+                continue
+            day_after = None
+            if after is not None and day == after[0].date():
+                day_after = (_minute_of_day(after[0]), after[1])
+            for i in _iter_bits(day_index.match(filters, day_after)):
+                yield day_index.slot(i)
+                emitted += 1
+                if limit is not None and emitted >= limit:
+                    return
+
+    def fetch_page(
+        self,
+        filters: SlotFilters,
+        fields: Sequence[str],
+        limit: int,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """То же, что slot_listing.fetch_slot_page, но по индексу."""
+        after = decode_cursor(cursor) if cursor else None
+        rows = list(self.query(filters, limit + 1, after))
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(last.start_datetime, last.id)
+
+        return [row_to_dict(row, fields) for row in rows], next_cursor
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "enabled": self.enabled,
+            "days": len(snapshot.days) if snapshot else 0,
+            "slots": snapshot.slots if snapshot else 0,
+            "age_seconds": (
+                round(time.monotonic() - snapshot.built_at, 1) if snapshot else None
+            ),
+            "rebuilds": self.rebuilds,
+            "patches": self.patches,
+        }
+
+    def collect_metrics(self):
+        """Размер и обновления индекса для /metrics (см. services.metrics)."""
+        stats = self.stats()
+        samples = [
+            ("slot_index_slots", "Индекс слотов: слотов", "gauge", {(): stats["slots"]}),
+            ("slot_index_days", "Индекс слотов: дней", "gauge", {(): stats["days"]}),
+            ("slot_index_rebuilds_total", "Индекс слотов: полных перестроений",
+             "counter", {(): stats["rebuilds"]}),
+            ("slot_index_patches_total", "Индекс слотов: обновлений по дням",
+             "counter", {(): stats["patches"]}),
+        ]
+        if stats["age_seconds"] is not None:
+            samples.append(
+                ("slot_index_age_seconds", "Индекс слотов: возраст снимка", "gauge",
+                 {(): stats["age_seconds"]})
+            )
+        return samples
+
+
+# Общий индекс процесса (подключается в create_app)
+slot_index = SlotIndex()
@@ -0,0 +1,209 @@
+"""
+Постраничная и потоковая выдача слотов для /api/slots.
+
+- Keyset-пагинация по (start_datetime, id): курсор — это ключ последней
+  отданной строки, а не OFFSET, поэтому каждая страница стоит одинаково
+  независимо от её номера.
+- Проекция полей: из БД выбираются только колонки, нужные для
+  запрошенных полей ответа, без создания ORM-объектов Slot.
+- Потоковая выдача (NDJSON / JSON-массив по кускам): строки читаются
+  серверным курсором (yield_per) и сразу уходят клиенту, поэтому память
+  не растёт с размером выгрузки.
+"""
+
+import base64
+from datetime import datetime
+import json
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, or_, select
+
+from app import db
+from app.filters import SlotFilters
+from app.models import Slot
+
+
+# Поле ответа -> колонки Slot, которые для него нужны
+FIELD_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "id": ("id",),
+    "club": ("club",),
+    "court": ("court",),
+    "date": ("start_datetime",),
+    "time_range": ("start_datetime", "end_datetime"),
+    "duration_minutes": ("duration_minutes",),
+    "status": ("status",),
+    "source": ("source",),
+}
+
+# Порядок полей по умолчанию — как в прежнем ответе /api/slots
+DEFAULT_FIELDS: Tuple[str, ...] = tuple(FIELD_COLUMNS)
+
+# Колонки, без которых не построить курсор
+_CURSOR_COLUMNS = ("start_datetime", "id")
+
+
+class InvalidCursor(ValueError):
+    """Курсор не удалось разобрать."""
+
+
+def parse_fields(raw: Optional[str]) -> Tuple[str, ...]:
+    """
+    "club,date,status" -> ("club", "date", "status").
+    Неизвестные поля отбрасываем; пусто — все поля по умолчанию.
+    """
+    if not raw:
+        return DEFAULT_FIELDS
+    fields = tuple(
+        name for name in (part.strip() for part in raw.split(","))
+        if name in FIELD_COLUMNS
+    )
+    return fields or DEFAULT_FIELDS
+
+
+def encode_cursor(start_dt: datetime, slot_id: int) -> str:
+    raw = f"{start_dt.isoformat()}|{slot_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        start_raw, id_raw = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(start_raw), int(id_raw)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def _select_columns(fields: Sequence[str]):
+    """SELECT колонок для полей ответа (+ ключ сортировки/курсора)."""
+    names: List[str] = list(_CURSOR_COLUMNS)
+    for field in fields:
+        for column in FIELD_COLUMNS[field]:
+            if column not in names:
+                names.append(column)
+    return select(*(getattr(Slot, name) for name in names))
+
+
+def build_page_statement(
+    filters: SlotFilters,
+    fields: Sequence[str],
+    limit: int,
+    cursor: Optional[Tuple[datetime, int]] = None,
+):
+    """
+    SELECT только нужных колонок с фильтрами, keyset-условием и
+    сортировкой (start_datetime, id). Берём limit + 1 строку, чтобы
+    понять, есть ли следующая страница.
+    """
+    stmt = filters.apply(_select_columns(fields))
+
+    if cursor is not None:
+        after_start, after_id = cursor
+        stmt = stmt.where(
+            or_(
+                Slot.start_datetime > after_start,
+                and_(Slot.start_datetime == after_start, Slot.id > after_id),
+            )
+        )
+
+    return stmt.order_by(Slot.start_datetime, Slot.id).limit(limit + 1)
+
+
+def row_to_dict(row: Any, fields: Sequence[str]) -> Dict[str, Any]:
+    """Строка выборки -> словарь для фронтенда (только запрошенные поля)."""
+    data: Dict[str, Any] = {}
+    for field in fields:
+        if field == "date":
+            data["date"] = row.start_datetime.strftime("%d.%m.%Y")
+        elif field == "time_range":
+            data["time_range"] = (
+                f"{row.start_datetime.strftime('%H:%M')}–"
+                f"{row.end_datetime.strftime('%H:%M')}"
+            )
+        elif field == "source":
+            data["source"] = row.source or ""
+        else:
+            data[field] = getattr(row, field)
+    return data
+
+
+def fetch_slot_page(
+    filters: SlotFilters,
+    fields: Sequence[str],
+    limit: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Возвращает (слоты страницы, курсор следующей страницы или None).
+    """
+    after = decode_cursor(cursor) if cursor else None
+    rows = db.session.execute(build_page_statement(filters, fields, limit, after)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.start_datetime, last.id)
+
+    return [row_to_dict(row, fields) for row in rows], next_cursor
+
+
+# ---------- Потоковая выдача ---------- #
+
+def iter_slot_dicts(
+    filters: SlotFilters, fields: Sequence[str], batch_size: int = 1000
+) -> Iterator[Dict[str, Any]]:
+    """
+    Все подходящие слоты по порядку (start_datetime, id), без лимита.
+    Строки читаются из БД пачками по batch_size (yield_per).
+    """
+    stmt = (
+        filters.apply(_select_columns(fields))
+        .order_by(Slot.start_datetime, Slot.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for row in db.session.execute(stmt):
+        yield row_to_dict(row, fields)
+
+
+def _chunked(parts: Iterator[str], parts_per_chunk: int) -> Iterator[str]:
+    """
+    Склеивает мелкие куски по parts_per_chunk штук, чтобы сервер не
+    отправлял отдельный сетевой пакет на каждый слот.
+    """
+    buffer: List[str] = []
+    for part in parts:
+        buffer.append(part)
+        if len(buffer) >= parts_per_chunk:
+            yield "".join(buffer)
+            buffer = []
+    if buffer:
+        yield "".join(buffer)
+
+
+def iter_ndjson(
+    rows: Iterator[Dict[str, Any]], rows_per_chunk: int = 200
+) -> Iterator[str]:
+    """Одна строка JSON на слот."""
+    return _chunked(
+        (json.dumps(row, ensure_ascii=False) + "\n" for row in rows),
+        rows_per_chunk,
+    )
+
+
+def iter_json_array(
+    rows: Iterator[Dict[str, Any]], rows_per_chunk: int = 200
+) -> Iterator[str]:
+    """
+    Тот же формат, что и у обычного ответа ({"slots": [...]}), но
+    отдаваемый по кускам.
+    """
+    def parts() -> Iterator[str]:
+        yield '{"slots": ['
+        first = True
+        for row in rows:
+            yield ("" if first else ",") + json.dumps(row, ensure_ascii=False)
+            first = False
+        yield '], "next_cursor": null}'
+
+    return _chunked(parts(), rows_per_chunk)
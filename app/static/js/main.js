@@ -3,8 +3,8 @@
 
 console.log("Moscow Tennis Slots UI loaded");
 
-// Запрос слотов из API с учётом фильтров
-async function fetchSlots(filters = {}) {
+// URL /api/slots с учётом фильтров
+function buildSlotsUrl(filters = {}) {
     const url = new URL("/api/slots", window.location.origin);
 
     // Добавляем только непустые параметры
@@ -14,18 +14,63 @@ async function fetchSlots(filters = {}) {
         }
     });
 
-    const response = await fetch(url.toString(), {
-        headers: {
-            "Accept": "application/json"
+    return url;
+}
+
+// Запрос слотов из API постранично (обычный JSON с кэшем и ETag на сервере):
+// идём по next_cursor, пока он не кончится. onRows вызывается с каждой
+// страницей, как только она пришла; если он вернул false — дальше не идём.
+// cursor — начать не с первой страницы (продолжение уже отрисованного).
+async function fetchSlotPages(filters = {}, onRows, cursor = null) {
+    do {
+        const url = buildSlotsUrl(filters);
+        if (cursor) {
+            url.searchParams.append("cursor", cursor);
         }
-    });
 
-    if (!response.ok) {
-        throw new Error("Ошибка при загрузке слотов");
-    }
+        const response = await fetch(url.toString(), {
+            headers: {
+                "Accept": "application/json"
+            }
+        });
+
+        if (!response.ok) {
+            throw new Error("Ошибка при загрузке слотов");
+        }
+
+        const data = await response.json();
+        const rows = data.slots || [];
+        if (rows.length && onRows(rows) === false) {
+            return;
+        }
+        cursor = data.next_cursor || null;
+    } while (cursor);
+}
+
+// HTML одной строки таблицы
+function slotRowHtml(slot) {
+    const statusBadge =
+        slot.status === "free"
+            ? '<span class="badge bg-success">Свободен</span>'
+            : '<span class="badge bg-secondary">Занят</span>';
+
+    const source = slot.source || "";
 
-    const data = await response.json();
-    return data.slots || [];
+    return `
+        <tr>
+            <td>${slot.date}</td>
+            <td>${slot.time_range}</td>
+            <td>${slot.duration_minutes} мин</td>
+            <td>${slot.club}</td>
+            <td>${slot.court}</td>
+            <td>${statusBadge}</td>
+            <td>
+                <span class="badge bg-light text-muted border">
+                    ${source}
+                </span>
+            </td>
+        </tr>
+    `;
 }
 
 // Перерисовываем tbody таблицы
@@ -47,34 +92,87 @@ function renderSlots(slots) {
         return;
     }
 
-    const rowsHtml = slots
-        .map((slot) => {
-            const statusBadge =
-                slot.status === "free"
-                    ? '<span class="badge bg-success">Свободен</span>'
-                    : '<span class="badge bg-secondary">Занят</span>';
-
-            const source = slot.source || "";
-
-            return `
-                <tr>
-                    <td>${slot.date}</td>
-                    <td>${slot.time_range}</td>
-                    <td>${slot.duration_minutes} мин</td>
-                    <td>${slot.club}</td>
-                    <td>${slot.court}</td>
-                    <td>${statusBadge}</td>
-                    <td>
-                        <span class="badge bg-light text-muted border">
-                            ${source}
-                        </span>
-                    </td>
-                </tr>
-            `;
-        })
-        .join("");
-
-    tbody.innerHTML = rowsHtml;
+    tbody.innerHTML = slots.map(slotRowHtml).join("");
+}
+
+// Номер текущей загрузки таблицы: страницы устаревшей загрузки
+// (фильтры уже поменяли) не дописываются
+let tableLoad = 0;
+
+// Загружаем слоты в таблицу по мере поступления:
+// первая страница заменяет старое содержимое, следующие дописываются в конец.
+async function loadSlots(filters = {}) {
+    const tbody = document.getElementById("slots-table-body");
+    if (!tbody) {
+        console.warn("Не найден элемент slots-table-body");
+        return;
+    }
+
+    const load = ++tableLoad;
+    let total = 0;
+
+    await fetchSlotPages(filters, (rows) => {
+        if (load !== tableLoad) {
+            return false;
+        }
+        const rowsHtml = rows.map(slotRowHtml).join("");
+        if (total === 0) {
+            tbody.innerHTML = rowsHtml;
+        } else {
+            tbody.insertAdjacentHTML("beforeend", rowsHtml);
+        }
+        total += rows.length;
+    });
+
+    if (total === 0 && load === tableLoad) {
+        renderSlots([]);
+    }
+}
+
+// Сервер отрисовал только первую страницу слотов — догружаем остальные
+// (без фильтров, как и первую), начиная с её next_cursor
+async function loadRemainingSlots() {
+    const tbody = document.getElementById("slots-table-body");
+    const cursor = tbody && tbody.dataset.nextCursor;
+    if (!cursor) {
+        return;
+    }
+
+    const load = tableLoad;
+    await fetchSlotPages({}, (rows) => {
+        if (load !== tableLoad) {
+            return false;
+        }
+        tbody.insertAdjacentHTML("beforeend", rows.map(slotRowHtml).join(""));
+    }, cursor);
+}
+
+// Опрашивает статус фоновой задачи обновления, пока она не закончится.
+// onProgress получает очередное состояние задачи.
+async function waitForRefreshJob(statusUrl, onProgress, intervalMs = 2000) {
+    while (true) {
+        const response = await fetch(statusUrl, {
+            headers: {
+                "Accept": "application/json"
+            }
+        });
+
+        if (!response.ok) {
+            throw new Error("Ошибка при получении статуса обновления");
+        }
+
+        const state = await response.json();
+        onProgress(state);
+
+        if (state.status === "done") {
+            return state;
+        }
+        if (state.status === "failed") {
+            throw new Error(state.error || "Обновление завершилось с ошибкой");
+        }
+
+        await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
 }
 
 // Подписываемся на события после загрузки DOM
@@ -85,6 +183,10 @@ document.addEventListener("DOMContentLoaded", () => {
     const resetBtn = document.getElementById("reset-filters-btn");
     const freeOnlyCheckbox = document.getElementById("freeOnly");
 
+    loadRemainingSlots().catch((error) => {
+        console.error(error);
+    });
+
     // Собираем значения фильтров из формы
     const collectFilters = () => {
         if (!form) {
@@ -107,8 +209,9 @@ document.addEventListener("DOMContentLoaded", () => {
     };
 
     // Кнопка "Обновить статусы":
-    // 1) дергает backend для обновления слотов
-    // 2) затем подтягивает данные с учётом текущих фильтров
+    // 1) ставит обновление слотов в очередь на бэкенде
+    // 2) ждёт, пока фоновая задача закончится
+    // 3) затем подтягивает данные с учётом текущих фильтров
     if (refreshBtn) {
         refreshBtn.addEventListener("click", async () => {
             const originalText = refreshBtn.textContent;
@@ -116,7 +219,7 @@ document.addEventListener("DOMContentLoaded", () => {
             refreshBtn.textContent = "Обновляем...";
 
             try {
-                // шаг 1: обновляем слоты на бэкенде
+                // шаг 1: ставим задачу обновления
                 const updateResponse = await fetch("/api/update_slots", {
                     method: "POST",
                     headers: {
@@ -128,10 +231,21 @@ document.addEventListener("DOMContentLoaded", () => {
                     throw new Error("Ошибка при обновлении слотов");
                 }
 
-                // шаг 2: подтягиваем свежие слоты с учётом фильтров
+                // шаг 2: ждём завершения, показывая прогресс по парсерам
+                const job = await updateResponse.json();
+                await waitForRefreshJob(job.status_url, (state) => {
+                    const finished = state.parsers.filter(
+                        (p) => p.status !== "pending" && p.status !== "running"
+                    ).length;
+                    if (state.parsers.length) {
+                        refreshBtn.textContent =
+                            `Обновляем... ${finished}/${state.parsers.length}`;
+                    }
+                });
+
+                // шаг 3: подтягиваем свежие слоты с учётом фильтров
                 const filters = collectFilters();
-                const slots = await fetchSlots(filters);
-                renderSlots(slots);
+                await loadSlots(filters);
             } catch (error) {
                 console.error(error);
                 alert("Не удалось обновить статусы. Попробуйте позже.");
@@ -153,8 +267,7 @@ document.addEventListener("DOMContentLoaded", () => {
 
             try {
                 const filters = collectFilters();
-                const slots = await fetchSlots(filters);
-                renderSlots(slots);
+                await loadSlots(filters);
             } catch (error) {
                 console.error(error);
                 alert("Не удалось применить фильтры. Попробуйте позже.");
@@ -171,8 +284,7 @@ document.addEventListener("DOMContentLoaded", () => {
             // После reset чекбокс вернётся к значению по умолчанию (checked в HTML)
 
             try {
-                const slots = await fetchSlots();
-                renderSlots(slots);
+                await loadSlots();
             } catch (error) {
                 console.error(error);
                 alert("Не удалось сбросить фильтры. Попробуйте позже.");
@@ -1,9 +1,33 @@
-from datetime import datetime, time
-
-from flask import Blueprint, render_template, jsonify, request
-
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    jsonify,
+    render_template,
+    request,
+    stream_with_context,
+    url_for,
+)
+
+from app.cache import slots_cache
+from app.filters import SlotFilters
+from app.free_blocks import find_free_blocks
 from app.models import Slot
-from services.updater import update_slots_from_all_sources
+from app.slot_index import slot_index
+from app.slot_listing import (
+    InvalidCursor,
+    encode_cursor,
+    fetch_slot_page,
+    iter_json_array,
+    iter_ndjson,
+    iter_slot_dicts,
+    parse_fields,
+    row_to_dict,
+)
+from services.jobs import refresh_jobs
+from services.metrics import metrics
+
+NDJSON_MIMETYPE = "application/x-ndjson"
 
 # Создаём Blueprint, чтобы структуру можно было легко расширять
 main_bp = Blueprint("main", __name__)
@@ -13,11 +37,24 @@ main_bp = Blueprint("main", __name__)
 def index():
     """
     Главная страница с поиском свободных слотов.
-    Слоты берём из базы данных для первоначального отображения.
+    Слоты берём из индекса (или из базы данных, если индекс выключен)
+    для первоначального отображения (только первую страницу — остальное
+    догружает JS через /api/slots, начиная с next_cursor).
     """
 
-    slots = Slot.query.order_by(Slot.start_datetime).all()
-    return render_template("index.html", slots=slots)
+    limit = current_app.config.get("API_SLOTS_DEFAULT_LIMIT", 500)
+    if slot_index.enabled:
+        slots = list(slot_index.query(SlotFilters(), limit + 1))
+    else:
+        slots = (
+            Slot.query.order_by(Slot.start_datetime, Slot.id).limit(limit + 1).all()
+        )
+
+    next_cursor = None
+    if len(slots) > limit:
+        slots = slots[:limit]
+        next_cursor = encode_cursor(slots[-1].start_datetime, slots[-1].id)
+    return render_template("index.html", slots=slots, next_cursor=next_cursor)
 
 
 @main_bp.route("/api/slots")
@@ -25,94 +62,163 @@ def api_slots():
     """
     API-эндпоинт, который возвращает список слотов в формате JSON.
     Поддерживает фильтры по дате, времени, длительности, клубу и статусу.
+
+    Ответ постраничный: limit (по умолчанию и максимум — из конфига)
+    и cursor из поля next_cursor предыдущей страницы. fields=club,date,...
+    ограничивает набор полей (и колонок, которые читаются из БД).
+
+    Потоковый режим (все слоты без пагинации, по мере чтения из БД):
+    format=ndjson или Accept: application/x-ndjson — NDJSON;
+    format=json-stream — обычный {"slots": [...]}, но отдаваемый по кускам.
     """
 
-    query = Slot.query
-
-    # ----- Читаем параметры запроса -----
-    date_str = request.args.get("date")          # из <input type="date"> приходит YYYY-MM-DD
-    time_from_str = request.args.get("time_from")
-    time_to_str = request.args.get("time_to")
-    min_duration = request.args.get("min_duration", type=int)
-    club = request.args.get("club")
-    free_only = request.args.get("free_only")    # "true" или None
-
-    # ----- Фильтр по дате и времени -----
-    if date_str:
-        try:
-            # Преобразуем строку в объект date
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
-
-            # По умолчанию берём весь день
-            dt_start = datetime.combine(date_obj, time(0, 0))
-            dt_end = datetime.combine(date_obj, time(23, 59, 59))
-
-            # Если указано время "с"
-            if time_from_str:
-                hours, minutes = map(int, time_from_str.split(":"))
-                dt_start = datetime.combine(date_obj, time(hours, minutes))
-
-            # Если указано время "до"
-            if time_to_str:
-                hours, minutes = map(int, time_to_str.split(":"))
-                dt_end = datetime.combine(date_obj, time(hours, minutes))
-
-            query = query.filter(
-                Slot.start_datetime >= dt_start,
-                Slot.start_datetime <= dt_end,
-            )
-        except ValueError:
-            # Если пришёл кривой формат даты/времени — просто игнорируем фильтр
-            pass
-
-    # ----- Минимальная длительность -----
-    if min_duration:
-        query = query.filter(Slot.duration_minutes >= min_duration)
-
-    # ----- Фильтр по клубу -----
-    if club:
-        query = query.filter(Slot.club == club)
-
-    # ----- Показывать только свободные -----
-    if free_only == "true":
-        query = query.filter(Slot.status == "free")
-
-    # ----- Выполняем запрос -----
-    slots = query.order_by(Slot.start_datetime).all()
-
-    # Готовим данные для фронтенда
-    slots_data = [
-        {
-            "id": slot.id,
-            "club": slot.club,
-            "court": slot.court,
-            "date": slot.start.strftime("%d.%m.%Y"),
-            "time_range": (
-                f"{slot.start.strftime('%H:%M')}–"
-                f"{slot.end.strftime('%H:%M')}"
-            ),
-            "duration_minutes": slot.duration_minutes,
-            "status": slot.status,
-            "source": slot.source or "",
-        }
-        for slot in slots
-    ]
+    # ----- Читаем параметры запроса и накладываем фильтры -----
+    filters = SlotFilters.from_args(request.args)
+    fields = parse_fields(request.args.get("fields"))
+
+    stream_format = _stream_format()
+    if stream_format is not None:
+        return _stream_slots(filters, fields, stream_format)
+
+    default_limit = current_app.config.get("API_SLOTS_DEFAULT_LIMIT", 500)
+    max_limit = current_app.config.get("API_SLOTS_MAX_LIMIT", 2000)
+    limit = request.args.get("limit", default=default_limit, type=int)
+    limit = min(max(1, limit), max_limit)
+
+    cursor = request.args.get("cursor")
+
+    def build_body():
+        # ----- Выполняем запрос (одна страница): по индексу или в БД -----
+        fetch_page = slot_index.fetch_page if slot_index.enabled else fetch_slot_page
+        slots_data, next_cursor = fetch_page(filters, fields, limit, cursor)
+        return {"slots": slots_data, "next_cursor": next_cursor}
+
+    try:
+        return _cached_json_response(
+            ("api_slots", filters, fields, limit, cursor), build_body
+        )
+    except InvalidCursor:
+        return jsonify({"error": "invalid cursor"}), 400
+
+
+def _cached_json_response(cache_key, build_body) -> Response:
+    """
+    JSON-ответ через кэш ответов: тело зависит только от cache_key и
+    поколения данных. If-None-Match с тем же ETag — 304 без тела;
+    промах кэша — build_body() строит тело (dict для JSON).
+    """
+    generation = slots_cache.generation
+    etag = slots_cache.etag(cache_key, generation)
+
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+
+    body = slots_cache.get(cache_key)
+    cache_status = "HIT"
+    if body is None:
+        cache_status = "MISS"
+        body = current_app.json.dumps(build_body()).encode()
+        slots_cache.set(cache_key, body, generation)
+
+    response = current_app.response_class(body, mimetype="application/json")
+    response.set_etag(etag)
+    # Браузер может хранить ответ, но обязан перепроверять его по ETag
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Cache"] = cache_status
+    return response
+
+
+def _stream_format():
+    """ndjson / json-stream / None (обычный постраничный ответ)."""
+    fmt = request.args.get("format")
+    if fmt in ("ndjson", "json-stream"):
+        return fmt
+    best = request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE])
+    if best == NDJSON_MIMETYPE:
+        return "ndjson"
+    return None
+
+
+def _stream_slots(filters: SlotFilters, fields, stream_format: str) -> Response:
+    """Потоковая выдача: строки идут клиенту по мере чтения серверным курсором."""
+    if slot_index.enabled:
+        rows = (row_to_dict(row, fields) for row in slot_index.query(filters))
+    else:
+        batch_size = current_app.config.get("API_SLOTS_STREAM_BATCH", 1000)
+        rows = iter_slot_dicts(filters, fields, batch_size=batch_size)
+
+    if stream_format == "ndjson":
+        body, mimetype = iter_ndjson(rows), NDJSON_MIMETYPE
+    else:
+        body, mimetype = iter_json_array(rows), "application/json"
+
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    # Не даём прокси (nginx) буферизовать ответ целиком
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+@main_bp.route("/api/free_blocks")
+def api_free_blocks():
+    """
+    Непрерывные свободные промежутки на кортах: соседние свободные слоты
+    одного корта склеиваются. Фильтры те же, что у /api/slots (date,
+    time_from, time_to, min_duration, club), только min_duration — это
+    длина промежутка внутри окна time_from–time_to, а не одного слота.
+    """
 
-    return jsonify({"slots": slots_data})
+    filters = SlotFilters.from_args(request.args)
+
+    return _cached_json_response(
+        ("api_free_blocks", filters),
+        lambda: {"blocks": [block.to_dict() for block in find_free_blocks(filters)]},
+    )
 
 
 @main_bp.route("/api/update_slots", methods=["POST"])
 def api_update_slots():
     """
-    Эндпоинт, который обновляет слоты, вызывая все парсеры.
-    Пока использует только MockTennisParser.
+    Ставит обновление слотов (все парсеры) в фоновую очередь и сразу
+    возвращает id задачи — парсеры в потоке запроса не выполняются.
+    Если обновление уже идёт, запрос присоединяется к нему (merged=true).
+    incremental=1 — пересобрать только устаревшие даты, а не всё.
     """
 
-    updated_count = update_slots_from_all_sources()
+    job, merged = refresh_jobs.enqueue(
+        current_app._get_current_object(),
+        incremental=request.args.get("incremental") == "1",
+    )
+    status_url = url_for("main.api_update_slots_status", job_id=job.id)
 
-    return jsonify(
+    response = jsonify(
         {
-            "status": "ok",
-            "updated": updated_count,
+            "status": job.status,
+            "job_id": job.id,
+            "merged": merged,
+            "status_url": status_url,
         }
     )
+    response.status_code = 202
+    response.headers["Location"] = status_url
+    return response
+
+
+@main_bp.route("/api/update_slots/<job_id>")
+def api_update_slots_status(job_id):
+    """
+    Состояние задачи обновления: общий статус (queued / running / done /
+    failed) и прогресс по каждому парсеру.
+    """
+
+    job = refresh_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "job not found"}), 404
+    return jsonify(job)
+
+
+@main_bp.route("/metrics")
+def metrics_endpoint():
+    """Метрики парсеров, апдейтера, кэша и пула процессов для Prometheus."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
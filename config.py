@@ -15,3 +15,68 @@ class Config:
     )
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Обновление слотов: сколько парсеров запускать одновременно
+    # и сколько секунд ждать один парсер (если у него нет своего таймаута)
+    UPDATER_MAX_WORKERS = int(os.environ.get("UPDATER_MAX_WORKERS", 4))
+    UPDATER_PARSER_TIMEOUT = float(os.environ.get("UPDATER_PARSER_TIMEOUT", 600))
+
+    # Парсеры: дополнительные/подменённые "source=модуль:Класс,..." и
+    # какие источники запускать ("mock,yclients_myprotennis"; пусто — все)
+    PARSERS = os.environ.get("PARSERS", "")
+    PARSERS_ENABLED = os.environ.get("PARSERS_ENABLED", "")
+
+    # Пул процессов для парсеров с браузером (0 — запускать в потоках
+    # этого процесса). Воркер пересоздаётся после MAX_JOBS задач или
+    # если его RSS превысил MAX_RSS_MB.
+    UPDATER_PROCESS_WORKERS = int(os.environ.get("UPDATER_PROCESS_WORKERS", 2))
+    UPDATER_PROCESS_MAX_JOBS = int(os.environ.get("UPDATER_PROCESS_MAX_JOBS", 20))
+    UPDATER_PROCESS_MAX_RSS_MB = float(os.environ.get("UPDATER_PROCESS_MAX_RSS_MB", 1024))
+
+    # Сколько строк вставлять за один executemany при сохранении слотов
+    UPDATER_BULK_BATCH_SIZE = int(os.environ.get("UPDATER_BULK_BATCH_SIZE", 1000))
+
+    # /api/slots: размер страницы по умолчанию и максимально допустимый
+    API_SLOTS_DEFAULT_LIMIT = int(os.environ.get("API_SLOTS_DEFAULT_LIMIT", 500))
+    API_SLOTS_MAX_LIMIT = int(os.environ.get("API_SLOTS_MAX_LIMIT", 2000))
+    # Потоковая выдача: сколько строк читать из БД за раз (yield_per)
+    API_SLOTS_STREAM_BATCH = int(os.environ.get("API_SLOTS_STREAM_BATCH", 1000))
+
+    # Кэш ответов /api/slots: время жизни записи (с) и максимум записей (LRU)
+    SLOTS_CACHE_TTL = float(os.environ.get("SLOTS_CACHE_TTL", 60))
+    SLOTS_CACHE_MAX_ENTRIES = int(os.environ.get("SLOTS_CACHE_MAX_ENTRIES", 256))
+
+    # Индекс слотов в памяти для /api/slots (без запросов к БД) и через
+    # сколько секунд перечитывать его из БД (изменения из других процессов)
+    SLOT_INDEX_ENABLED = os.environ.get("SLOT_INDEX_ENABLED", "1") == "1"
+    SLOT_INDEX_MAX_AGE = float(os.environ.get("SLOT_INDEX_MAX_AGE", 60))
+
+    # Метрики (/metrics) всегда включены; JSON-логи событий парсеров и
+    # апдейтера (по строке на страницу/парсер/прогон) — по желанию
+    METRICS_JSON_LOGS = os.environ.get("METRICS_JSON_LOGS", "0") == "1"
+
+    # Фоновые обновления (/api/update_slots): потоков в пуле задач
+    # и сколько последних задач хранить для просмотра статуса
+    REFRESH_JOB_WORKERS = int(os.environ.get("REFRESH_JOB_WORKERS", 1))
+    REFRESH_JOB_HISTORY = int(os.environ.get("REFRESH_JOB_HISTORY", 50))
+
+    # Планировщик обновлений. Включать только в одном процессе
+    # (или запускать отдельно: python run_scheduler.py).
+    SCHEDULER_ENABLED = os.environ.get("SCHEDULER_ENABLED", "0") == "1"
+    # Интервалы по источникам: "mock=300,yclients_myprotennis=3600";
+    # для остальных — интервал из реестра парсеров или значение по умолчанию
+    SCHEDULER_INTERVALS = os.environ.get("SCHEDULER_INTERVALS", "")
+    SCHEDULER_DEFAULT_INTERVAL = float(os.environ.get("SCHEDULER_DEFAULT_INTERVAL", 900))
+    # Случайный разброс интервала (доля от него) и шаг проверки расписания, с
+    SCHEDULER_JITTER = float(os.environ.get("SCHEDULER_JITTER", 0.1))
+    SCHEDULER_TICK_SECONDS = float(os.environ.get("SCHEDULER_TICK_SECONDS", 5))
+    # Где хранить время последних запусков
+    SCHEDULER_STATE_PATH = os.environ.get(
+        "SCHEDULER_STATE_PATH", os.path.join(BASE_DIR, "scheduler_state.json")
+    )
+
+    # Бюджеты свежести по датам: "дней до даты=секунд", берётся ближайший
+    # порог не больше. По умолчанию: сегодня — 5 мин, завтра-послезавтра —
+    # 15 мин, дальше — час. Запас на неточность интервала планировщика, с.
+    FRESHNESS_BUDGETS = os.environ.get("FRESHNESS_BUDGETS", "0=300,1=900,3=3600")
+    FRESHNESS_GRACE_SECONDS = float(os.environ.get("FRESHNESS_GRACE_SECONDS", 60))
@@ -1,6 +1,11 @@
+from array import array
+import asyncio
+from collections.abc import Sequence
 from dataclasses import dataclass
-from datetime import datetime
-from typing import List
+from datetime import date, datetime, timedelta
+import sys
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 
 @dataclass
@@ -20,6 +25,167 @@ class SlotData:
     source: str  # идентификатор источника, например 'mock', 'yclients', 'findsport'
 
 
+# Начало отсчёта для времени слотов в минутах (datetime без таймзоны)
+_EPOCH = datetime(1970, 1, 1)
+
+
+def to_epoch_minutes(value: datetime) -> int:
+    return int((value - _EPOCH).total_seconds() // 60)
+
+
+def from_epoch_minutes(value: int) -> datetime:
+    return _EPOCH + timedelta(minutes=value)
+
+
+class SlotBatch(Sequence):
+    """
+    Компактный столбцовый контейнер слотов.
+
+    Вместо объекта SlotData с двумя datetime и своими строками на каждый
+    слот храним столбцы array: индексы в общей таблице строк (клуб, корт,
+    статус, источник — sys.intern) и время в минутах от эпохи. Это в разы
+    меньше памяти и в разы быстрее pickle между процессами.
+
+    Снаружи ведёт себя как последовательность SlotData (len, итерация,
+    индексы и срезы), а для Core insert() сразу отдаёт словари колонок
+    (mappings). Время слотов хранится с точностью до минуты.
+    """
+
+    __slots__ = (
+        "_strings", "_index",
+        "_club", "_court", "_status", "_source",
+        "_start", "_end", "_duration",
+    )
+
+    def __init__(self, slots: Iterable[SlotData] = ()):
+        self._strings: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._club = array("I")
+        self._court = array("I")
+        self._status = array("I")
+        self._source = array("I")
+        self._start = array("q")
+        self._end = array("q")
+        self._duration = array("i")
+        self.extend(slots)
+
+    def _ref(self, value: str) -> int:
+        index = self._index.get(value)
+        if index is None:
+            index = self._index[value] = len(self._strings)
+            self._strings.append(sys.intern(value))
+        return index
+
+    # ---------- Наполнение ---------- #
+
+    def append(self, slot: SlotData) -> None:
+        self._club.append(self._ref(slot.club))
+        self._court.append(self._ref(slot.court))
+        self._status.append(self._ref(slot.status))
+        self._source.append(self._ref(slot.source))
+        self._start.append(to_epoch_minutes(slot.start))
+        self._end.append(to_epoch_minutes(slot.end))
+        self._duration.append(slot.duration_minutes)
+
+    def extend(self, slots: Iterable[SlotData]) -> None:
+        if not isinstance(slots, SlotBatch):
+            for slot in slots:
+                self.append(slot)
+            return
+
+        # Другой батч: переносим столбцы целиком, перенумеровав строки
+        remap = [self._ref(value) for value in slots._strings]
+        for name in ("_club", "_court", "_status", "_source"):
+            getattr(self, name).extend(remap[i] for i in getattr(slots, name))
+        self._start.extend(slots._start)
+        self._end.extend(slots._end)
+        self._duration.extend(slots._duration)
+
+    # ---------- Чтение ---------- #
+
+    def __len__(self) -> int:
+        return len(self._start)
+
+    def _slot(self, i: int) -> SlotData:
+        strings = self._strings
+        return SlotData(
+            club=strings[self._club[i]],
+            court=strings[self._court[i]],
+            start=from_epoch_minutes(self._start[i]),
+            end=from_epoch_minutes(self._end[i]),
+            duration_minutes=self._duration[i],
+            status=strings[self._status[i]],
+            source=strings[self._source[i]],
+        )
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return SlotBatch(self._slot(j) for j in range(*i.indices(len(self))))
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("SlotBatch index out of range")
+        return self._slot(i)
+
+    def __iter__(self) -> Iterator[SlotData]:
+        for i in range(len(self)):
+            yield self._slot(i)
+
+    def mappings(
+        self, start: int = 0, stop: Optional[int] = None, **extra: Any
+    ) -> List[Dict[str, Any]]:
+        """
+        Строки [start:stop) как словари колонок таблицы Slot для
+        Core insert(); extra добавляется в каждую (created_at и т.п.).
+        """
+        strings = self._strings
+        stop = len(self) if stop is None else min(stop, len(self))
+        return [
+            {
+                "club": strings[self._club[i]],
+                "court": strings[self._court[i]],
+                "start_datetime": from_epoch_minutes(self._start[i]),
+                "end_datetime": from_epoch_minutes(self._end[i]),
+                "duration_minutes": self._duration[i],
+                "status": strings[self._status[i]],
+                "source": strings[self._source[i]],
+                **extra,
+            }
+            for i in range(start, stop)
+        ]
+
+    def nbytes(self) -> int:
+        """Примерный размер данных столбцов в байтах (без таблицы строк)."""
+        return sum(
+            getattr(self, name).itemsize * len(getattr(self, name))
+            for name in self.__slots__[2:]
+        )
+
+    # ---------- pickle ---------- #
+
+    def __getstate__(self):
+        return (
+            self._strings,
+            tuple(getattr(self, name).tobytes() for name in self.__slots__[2:]),
+        )
+
+    def __setstate__(self, state) -> None:
+        strings, columns = state
+        self._strings = [sys.intern(value) for value in strings]
+        self._index = {value: i for i, value in enumerate(self._strings)}
+        for name, typecode, raw in zip(self.__slots__[2:], "IIIIqqi", columns):
+            column = array(typecode)
+            column.frombytes(raw)
+            setattr(self, name, column)
+
+    def __repr__(self) -> str:
+        return f"<SlotBatch {len(self)} slots>"
+
+
+# Что именно собрал парсер: (club, court, дата)
+ScopeKey = Tuple[str, str, date]
+
+
 class BaseParser:
     """
     Базовый класс для всех парсеров.
@@ -28,8 +194,100 @@ class BaseParser:
 
     source_name: str = "base"
 
-    def fetch_slots(self) -> List[SlotData]:
+    # Собственный таймаут парсера в секундах (None — берём из конфига апдейтера)
+    timeout_seconds: Optional[float] = None
+
+    # Горизонт в днях от сегодняшнего (0 = только сегодня). None — парсер
+    # не умеет собирать слоты по отдельным датам и всегда отдаёт всё сразу.
+    days_ahead: Optional[int] = None
+
+    # Явный список дат для сбора (None — весь горизонт). Апдейтер задаёт
+    # его, чтобы пересобрать только устаревшие даты.
+    dates: Optional[List[date]] = None
+
+    # Запускать в отдельном процессе (services.parser_pool), если пул включён:
+    # для парсеров с браузером, чтобы Chromium не жил в процессе приложения
+    run_in_process: bool = False
+
+    @property
+    def parser_name(self) -> str:
+        """Имя парсера в логах и статусе обновления."""
+        return self.__class__.__name__
+
+    def __getstate__(self):
+        # Парсер уходит в воркер pickle'ом; событие отмены у каждого процесса своё
+        state = self.__dict__.copy()
+        state.pop("_cancel", None)
+        return state
+
+    def request_cancel(self) -> None:
         """
-        Должен вернуть список слотов в унифицированном формате SlotData.
+        Просит парсер остановиться (например, по таймауту апдейтера).
+        Длинные парсеры должны периодически проверять is_cancelled().
+        """
+        self._cancel_event().set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancel_event().is_set()
+
+    def _cancel_event(self) -> threading.Event:
+        event = self.__dict__.get("_cancel")
+        if event is None:
+            event = self.__dict__.setdefault("_cancel", threading.Event())
+        return event
+
+    # ---------- Сбор по датам ---------- #
+
+    def today(self) -> date:
+        """"Сегодня" парсера (воспроизведение записи подменяет его датой записи)."""
+        return datetime.now().date()
+
+    def horizon_dates(self) -> Optional[List[date]]:
+        """Все даты, которые парсер умеет собирать (None — не делится по датам)."""
+        if self.days_ahead is None:
+            return None
+        today = self.today()
+        return [today + timedelta(days=i) for i in range(self.days_ahead + 1)]
+
+    def target_dates(self) -> List[date]:
+        """Даты для текущего прогона: self.dates или весь горизонт."""
+        if self.dates is not None:
+            return sorted(set(self.dates))
+        return self.horizon_dates() or []
+
+    def court_keys(self) -> List[Tuple[str, str]]:
+        """(club, court) всех кортов парсера — для учёта свежести по кортам."""
+        return []
+
+    def fetched_scope(self) -> Optional[Set[ScopeKey]]:
+        """
+        (club, court, дата), которые последний fetch_slots() действительно
+        собрал (без ошибок). None — парсер не делится по датам, его
+        результат описывает источник целиком.
+        """
+        if self.days_ahead is None:
+            return None
+        return set(self.__dict__.get("_fetched", ()))
+
+    def _reset_fetched(self) -> None:
+        self.__dict__["_fetched"] = set()
+
+    def _mark_fetched(self, club: str, court: str, target_date: date) -> None:
+        self.__dict__.setdefault("_fetched", set()).add((club, court, target_date))
+
+    def fetch_slots(self) -> Sequence:
+        """
+        Должен вернуть слоты в унифицированном формате SlotData:
+        список или (компактнее) SlotBatch.
         """
         raise NotImplementedError("fetch_slots() must be implemented in subclasses")
+
+    async def afetch_slots(self) -> Sequence:
+        """
+        Асинхронный вариант fetch_slots().
+
+        По умолчанию просто уводит синхронный fetch_slots() в поток, чтобы
+        не блокировать event loop. Парсеры с настоящим async-движком
+        переопределяют этот метод.
+        """
+        return await asyncio.to_thread(self.fetch_slots)
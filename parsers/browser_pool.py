@@ -0,0 +1,215 @@
+"""
+Общий пул браузера Playwright для парсеров.
+
+Один Chromium поднимается на весь прогон fetch_slots (или на несколько
+парсеров сразу, если пул передать снаружи), а каждая задача
+(корт, дата) получает из него отдельную страницу.
+
+Контекст браузера может писать трафик в HAR или отвечать из HAR без
+сети (см. parsers.har).
+"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from playwright.sync_api import sync_playwright
+
+from services.metrics import BROWSER_LAUNCH, BROWSER_LAUNCHES
+
+
+# Типы ресурсов, которые парсерам не нужны: только трафик и время отрисовки
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+
+# Счётчики и пиксели аналитики на страницах виджетов
+BLOCKED_URL_PARTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "mc.yandex.ru",
+    "top-fwz1.mail.ru",
+    "connect.facebook.net",
+    "vk.com/rtrg",
+)
+
+
+@dataclass
+class BrowserPoolStats:
+    """
+    Счётчики и тайминги пула: сколько раз запускали браузер,
+    сколько на это ушло времени и сколько страниц выдали задачам.
+    """
+    launches: int = 0
+    launch_seconds: float = 0.0
+    contexts: int = 0
+    pages: int = 0
+    page_seconds: float = 0.0
+    blocked_requests: int = 0
+    jobs: List[Dict[str, Any]] = field(default_factory=list)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "launches": self.launches,
+            "launch_seconds": round(self.launch_seconds, 3),
+            "contexts": self.contexts,
+            "pages": self.pages,
+            "page_seconds": round(self.page_seconds, 3),
+            "blocked_requests": self.blocked_requests,
+            "jobs": list(self.jobs),
+        }
+
+
+class BrowserPool:
+    """
+    Владеет одним экземпляром Playwright, браузером и контекстом.
+
+    Браузер запускается лениво — при первом запросе страницы — и живёт
+    до close(). Если браузер упал/отключился, следующий запрос страницы
+    запустит его заново (это будет видно по stats.launches).
+
+    С block_resources=True контекст отбрасывает картинки, шрифты, медиа
+    и запросы к аналитике ещё до отправки в сеть.
+
+    record_har_path — писать трафик контекста в HAR (файл дописывается
+    при close()). replay_har_path — отвечать на запросы из HAR, а всё,
+    чего в записи нет, обрывать (сеть не нужна). clock_time — часы
+    страниц начинают идти с этого момента (для replay — момент записи).
+    """
+
+    def __init__(
+        self,
+        headless: bool = True,
+        launch_options: Optional[Dict[str, Any]] = None,
+        context_options: Optional[Dict[str, Any]] = None,
+        block_resources: bool = False,
+        record_har_path: Optional[str] = None,
+        replay_har_path: Optional[str] = None,
+        clock_time: Optional[datetime] = None,
+    ):
+        self.headless = headless
+        self.block_resources = block_resources
+        self.record_har_path = record_har_path
+        self.replay_har_path = replay_har_path
+        self.clock_time = clock_time
+        self.launch_options = launch_options or {}
+        self.context_options = context_options or {}
+        self.stats = BrowserPoolStats()
+
+        self._playwright_cm = None
+        self._playwright = None
+        self._browser = None
+        self._context = None
+
+    # ---------- Жизненный цикл ---------- #
+
+    def __enter__(self) -> "BrowserPool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _ensure_browser(self) -> None:
+        if self._browser is not None and self._browser.is_connected():
+            return
+
+        if self._playwright is None:
+            self._playwright_cm = sync_playwright()
+            self._playwright = self._playwright_cm.start()
+
+        started = time.perf_counter()
+        self._browser = self._playwright.chromium.launch(
+            headless=self.headless, **self.launch_options
+        )
+        elapsed = time.perf_counter() - started
+
+        self._context = None
+        self.stats.launches += 1
+        self.stats.launch_seconds += elapsed
+        BROWSER_LAUNCHES.inc()
+        BROWSER_LAUNCH.observe(elapsed)
+        print(
+            f"[BrowserPool] Запущен Chromium (запуск №{self.stats.launches}) "
+            f"за {elapsed:.2f} с"
+        )
+
+    def _ensure_context(self):
+        self._ensure_browser()
+        if self._context is None:
+            options = dict(self.context_options)
+            if self.record_har_path:
+                options.setdefault("record_har_path", self.record_har_path)
+                options.setdefault("record_har_content", "embed")
+            self._context = self._browser.new_context(**options)
+            if self.block_resources:
+                self._context.route("**/*", self._route_request)
+            if self.replay_har_path:
+                # Маршруты проверяются в обратном порядке регистрации:
+                # запись отвечает раньше блокировки, остальное обрывается
+                self._context.route_from_har(self.replay_har_path, not_found="abort")
+            if self.clock_time is not None:
+                self._context.clock.install(time=self.clock_time)
+            self.stats.contexts += 1
+        return self._context
+
+    def _route_request(self, route) -> None:
+        request = route.request
+        url = request.url
+        if request.resource_type in BLOCKED_RESOURCE_TYPES or any(
+            part in url for part in BLOCKED_URL_PARTS
+        ):
+            self.stats.blocked_requests += 1
+            route.abort()
+            return
+        route.continue_()
+
+    def close(self) -> None:
+        """Закрывает контекст, браузер и сам Playwright."""
+        try:
+            if self._context is not None:
+                self._context.close()
+            if self._browser is not None:
+                self._browser.close()
+        finally:
+            self._context = None
+            self._browser = None
+            if self._playwright_cm is not None:
+                self._playwright_cm.__exit__(None, None, None)
+            self._playwright_cm = None
+            self._playwright = None
+
+    # ---------- Выдача страниц ---------- #
+
+    def new_page(self):
+        """
+        Открывает новую страницу в общем контексте.
+        Закрывать её должен вызывающий код (удобнее через page()).
+        """
+        context = self._ensure_context()
+        page = context.new_page()
+        self.stats.pages += 1
+        return page
+
+    @contextmanager
+    def page(self, job: Optional[str] = None) -> Iterator[Any]:
+        """
+        Выдаёт страницу под одну задачу и закрывает её по завершении.
+        job — подпись задачи (например, "Корт №1"), попадает в stats.jobs.
+        """
+        page = self.new_page()
+        started = time.perf_counter()
+        try:
+            yield page
+        finally:
+            elapsed = time.perf_counter() - started
+            self.stats.page_seconds += elapsed
+            if job is not None:
+                self.stats.jobs.append(
+                    {"job": job, "seconds": round(elapsed, 3)}
+                )
+            try:
+                page.close()
+            except Exception:  # noqa: BLE001
+                # Браузер мог уже упасть — закрывать нечего
+                pass
@@ -0,0 +1,206 @@
+"""
+Каталог клубов и кортов YClients.
+
+Клубы, корты, услуги и URL виджетов лежат в JSON-файле (по умолчанию
+parsers/data/clubs.json, путь можно задать переменной окружения
+CLUBS_CATALOG_PATH), а не в коде парсера. Файл читается и проверяется
+один раз (и перечитывается, только если изменился).
+
+Каталог сгруппирован по локациям (company/location_id в YClients):
+корты одной локации показываются на одном виджете и ходят в API с одним
+location_id, поэтому парсеры обходят их вместе.
+
+Формат:
+
+    {"locations": [{
+        "club": "MyProtennis.ru",
+        "location_id": 967881,
+        "widget_url": "https://...",
+        "defaults": {"service_id": 1, "service_label": "Аренда 1 час",
+                     "duration_minutes": 60},
+        "courts": [{"name": "Корт №1", "staff_id": 2909330}, ...]
+    }]}
+
+Поля корта (service_id, service_label, duration_minutes, url)
+перекрывают defaults локации.
+"""
+
+from dataclasses import dataclass
+import json
+import os
+import threading
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+DEFAULT_CATALOG_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "clubs.json"
+)
+
+
+@dataclass
+class CourtConfig:
+    """
+    Настройки для одного корта / услуги на YClients.
+    """
+    club_name: str
+    court_name: str
+    url: str
+    duration_minutes: int
+    service_label: str  # например, "Аренда 1 час", "1.5 часа"
+
+    staff_id: int       # уникальный ID корта (staff) в YClients
+    service_id: int     # ID услуги ("Аренда 1 час" и т.п.)
+
+    # Локация (company) YClients, к которой относится корт
+    location_id: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class LocationConfig:
+    """Локация YClients: один виджет, один location_id, несколько кортов."""
+    club_name: str
+    location_id: int
+    widget_url: str
+    courts: Tuple[CourtConfig, ...]
+
+
+class CatalogError(ValueError):
+    """Файл каталога не найден или не прошёл проверку."""
+
+
+# ---------- Проверка ---------- #
+
+def _require(data: Mapping[str, Any], key: str, kind, where: str):
+    value = data.get(key)
+    # bool — подкласс int, но в каталоге это всегда ошибка
+    if value is None or isinstance(value, bool) or not isinstance(value, kind):
+        expected = kind.__name__ if isinstance(kind, type) else "/".join(
+            k.__name__ for k in kind
+        )
+        raise CatalogError(f"{where}: поле {key!r} должно быть {expected}")
+    if isinstance(value, str) and not value.strip():
+        raise CatalogError(f"{where}: поле {key!r} пустое")
+    if isinstance(value, int) and value <= 0:
+        raise CatalogError(f"{where}: поле {key!r} должно быть > 0")
+    return value
+
+
+def _parse_location(raw: Any, index: int) -> LocationConfig:
+    where = f"locations[{index}]"
+    if not isinstance(raw, dict):
+        raise CatalogError(f"{where}: ожидается объект")
+
+    club = _require(raw, "club", str, where)
+    location_id = _require(raw, "location_id", int, where)
+    widget_url = _require(raw, "widget_url", str, where)
+    if not widget_url.startswith(("http://", "https://")):
+        raise CatalogError(f"{where}: widget_url должен быть http(s) URL")
+
+    defaults = raw.get("defaults") or {}
+    if not isinstance(defaults, dict):
+        raise CatalogError(f"{where}: defaults должен быть объектом")
+
+    courts_raw = raw.get("courts")
+    if not isinstance(courts_raw, list) or not courts_raw:
+        raise CatalogError(f"{where}: нужен непустой список courts")
+
+    courts: List[CourtConfig] = []
+    names, staff_ids = set(), set()
+    for j, court_raw in enumerate(courts_raw):
+        court_where = f"{where}.courts[{j}]"
+        if not isinstance(court_raw, dict):
+            raise CatalogError(f"{court_where}: ожидается объект")
+        merged = {**defaults, **court_raw}
+
+        name = _require(merged, "name", str, court_where)
+        staff_id = _require(merged, "staff_id", int, court_where)
+        if name in names:
+            raise CatalogError(f"{court_where}: корт {name!r} уже есть в {club}")
+        if staff_id in staff_ids:
+            raise CatalogError(f"{court_where}: staff_id {staff_id} повторяется")
+        names.add(name)
+        staff_ids.add(staff_id)
+
+        courts.append(
+            CourtConfig(
+                club_name=club,
+                court_name=name,
+                url=merged.get("url") or widget_url,
+                duration_minutes=_require(merged, "duration_minutes", int, court_where),
+                service_label=_require(merged, "service_label", str, court_where),
+                staff_id=staff_id,
+                service_id=_require(merged, "service_id", int, court_where),
+                location_id=location_id,
+            )
+        )
+
+    return LocationConfig(
+        club_name=club,
+        location_id=location_id,
+        widget_url=widget_url,
+        courts=tuple(courts),
+    )
+
+
+def parse_catalog(data: Any) -> List[LocationConfig]:
+    """Проверяет разобранный JSON каталога и строит локации."""
+    if not isinstance(data, dict) or not isinstance(data.get("locations"), list):
+        raise CatalogError("ожидается объект с полем locations (список)")
+
+    locations = [_parse_location(raw, i) for i, raw in enumerate(data["locations"])]
+
+    location_ids = [loc.location_id for loc in locations]
+    duplicates = {x for x in location_ids if location_ids.count(x) > 1}
+    if duplicates:
+        raise CatalogError(f"location_id повторяется: {sorted(duplicates)}")
+    return locations
+
+
+# ---------- Загрузка ---------- #
+
+_CACHE: Dict[str, Tuple[float, List[LocationConfig]]] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def catalog_path() -> str:
+    return os.environ.get("CLUBS_CATALOG_PATH") or DEFAULT_CATALOG_PATH
+
+
+def load_catalog(path: Optional[str] = None) -> List[LocationConfig]:
+    """Локации из файла каталога (кэш до изменения файла)."""
+    path = path or catalog_path()
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError as exc:
+        raise CatalogError(f"каталог {path} не найден") from exc
+
+    with _CACHE_LOCK:
+        cached = _CACHE.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except ValueError as exc:
+        raise CatalogError(f"каталог {path}: некорректный JSON ({exc})") from exc
+
+    locations = parse_catalog(data)
+    with _CACHE_LOCK:
+        _CACHE[path] = (mtime, locations)
+    print(
+        f"[Catalog] Загружено локаций: {len(locations)}, "
+        f"кортов: {sum(len(loc.courts) for loc in locations)}"
+    )
+    return locations
+
+
+def catalog_courts(
+    location_ids: Optional[List[int]] = None, path: Optional[str] = None
+) -> List[CourtConfig]:
+    """Все корты каталога (или только указанных локаций), по локациям подряд."""
+    return [
+        court
+        for location in load_catalog(path)
+        if location_ids is None or location.location_id in location_ids
+        for court in location.courts
+    ]
@@ -0,0 +1,112 @@
+"""
+Запись и воспроизведение трафика виджета YClients (HAR).
+
+Один раз прогоняем парсер с доступом к сети в режиме record: Playwright
+пишет весь трафик контекста браузера в HAR-файл (ответы — внутри файла),
+а рядом кладётся манифест <har>.meta.json: когда записано, какие даты и
+корты обходились.
+
+В режиме replay тот же парсер работает без сети: контекст отвечает на
+запросы из HAR (route_from_har, всё, чего нет в записи, обрывается), часы
+браузера ставятся на момент записи, а "сегодня" парсера — на дату записи.
+Виджет открывается на том же месяце, шлёт те же запросы (POST-тела
+совпадают дословно — даты те же) и получает те же ответы. Так скорость
+и корректность парсера можно мерить и проверять в CI и на машинах
+без сети.
+
+Режим задаётся параметрами парсера или переменными окружения
+YCLIENTS_HAR_MODE (record / replay) и YCLIENTS_HAR_PATH.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date, datetime
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+HAR_RECORD = "record"
+HAR_REPLAY = "replay"
+HAR_MODES = (HAR_RECORD, HAR_REPLAY)
+
+
+class HarError(RuntimeError):
+    """Некорректный режим записи/воспроизведения или нет файла записи."""
+
+
+@dataclass
+class HarManifest:
+    """Что лежит в записи: момент записи, даты, корты и URL виджетов."""
+    recorded_at: datetime
+    dates: List[date] = field(default_factory=list)
+    courts: List[str] = field(default_factory=list)
+    urls: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "recorded_at": self.recorded_at.isoformat(timespec="seconds"),
+            "dates": [d.isoformat() for d in self.dates],
+            "courts": list(self.courts),
+            "urls": list(self.urls),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "HarManifest":
+        return cls(
+            recorded_at=datetime.fromisoformat(data["recorded_at"]),
+            dates=[date.fromisoformat(d) for d in data.get("dates", [])],
+            courts=list(data.get("courts", [])),
+            urls=list(data.get("urls", [])),
+        )
+
+
+def manifest_path(har_path: str) -> str:
+    return f"{har_path}.meta.json"
+
+
+def save_manifest(har_path: str, manifest: HarManifest) -> None:
+    with open(manifest_path(har_path), "w", encoding="utf-8") as f:
+        json.dump(manifest.to_dict(), f, ensure_ascii=False, indent=2)
+
+
+def load_manifest(har_path: str) -> HarManifest:
+    path = manifest_path(har_path)
+    try:
+        with open(path, encoding="utf-8") as f:
+            return HarManifest.from_dict(json.load(f))
+    except OSError as exc:
+        raise HarError(f"нет манифеста записи {path}") from exc
+    except (ValueError, KeyError) as exc:
+        raise HarError(f"манифест {path} повреждён: {exc}") from exc
+
+
+@dataclass
+class HarSettings:
+    """Режим (record / replay) и путь к HAR-файлу."""
+    mode: str
+    path: str
+
+    @classmethod
+    def resolve(
+        cls, mode: Optional[str] = None, path: Optional[str] = None
+    ) -> Optional["HarSettings"]:
+        """
+        Настройки из параметров, а если их нет — из YCLIENTS_HAR_MODE /
+        YCLIENTS_HAR_PATH. None — обычная работа с сетью.
+        """
+        mode = mode or os.environ.get("YCLIENTS_HAR_MODE", "")
+        path = path or os.environ.get("YCLIENTS_HAR_PATH", "")
+        if not mode:
+            return None
+        if mode not in HAR_MODES:
+            raise HarError(f"неизвестный режим {mode!r}, ожидается record или replay")
+        if not path:
+            raise HarError(f"для режима {mode} нужен путь к HAR (YCLIENTS_HAR_PATH)")
+        return cls(mode=mode, path=os.path.abspath(path))
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == HAR_RECORD
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == HAR_REPLAY
@@ -0,0 +1,179 @@
+"""
+Реестр парсеров: source_name -> "модуль:Класс".
+
+Модуль парсера импортируется только когда парсер действительно нужен
+(create / load), поэтому ни веб-приложение, ни апдейтер при импорте не
+тянут Playwright и прочий стек парсинга. Прогон, в котором участвует
+только mock, тоже обходится без него.
+
+Откуда берутся парсеры:
+- встроенные (BUILTIN_PARSERS);
+- entry points группы ENTRY_POINT_GROUP у установленных пакетов;
+- конфиг PARSERS: "source=модуль:Класс,..." (добавляет или подменяет).
+PARSERS_ENABLED ограничивает, какие из них запускает апдейтер.
+
+Интервал обновления источника для планировщика тоже хранится в спецификации,
+а не в классе парсера: планировщик читает его без импорта модулей парсеров.
+"""
+
+from dataclasses import dataclass, field
+import importlib
+from importlib import metadata
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Type
+
+from parsers.base import BaseParser
+
+ENTRY_POINT_GROUP = "moscow_tennis.parsers"
+
+BUILTIN_PARSERS: Dict[str, str] = {
+    "mock": "parsers.mock_parser:MockTennisParser",
+    # API-бэкенд; при отказе API сам откатится на Playwright-парсер
+    "yclients_myprotennis": "parsers.yclients_api:YClientsApiParser",
+}
+
+# Как часто планировщик обновляет встроенные источники, в секундах
+BUILTIN_REFRESH_INTERVALS: Dict[str, float] = {
+    "mock": 5 * 60,
+    # Планировщик пересобирает только устаревшие даты, так что частый
+    # интервал стоит дорого лишь для ближних дат (см. FRESHNESS_BUDGETS)
+    "yclients_myprotennis": 5 * 60,
+}
+
+
+class UnknownParser(KeyError):
+    """Для источника не зарегистрирован парсер."""
+
+
+@dataclass
+class ParserSpec:
+    """Где лежит парсер источника и с какими аргументами его создавать."""
+    source_name: str
+    target: str  # "пакет.модуль:Класс"
+    options: Dict[str, Any] = field(default_factory=dict)
+    # Интервал планировщика, с (None — SCHEDULER_INTERVALS или значение по умолчанию)
+    refresh_interval_seconds: Optional[float] = None
+
+
+def parse_parser_targets(raw: str) -> Dict[str, str]:
+    """"mock=parsers.mock_parser:MockTennisParser,..." -> {source: target}."""
+    targets: Dict[str, str] = {}
+    for part in (raw or "").split(","):
+        source, sep, target = part.partition("=")
+        if sep and ":" in target:
+            targets[source.strip()] = target.strip()
+        elif part.strip():
+            print(f"[Registry] Некорректная запись парсера: {part!r}")
+    return targets
+
+
+class ParserRegistry:
+    def __init__(
+        self,
+        builtins: Optional[Dict[str, str]] = None,
+        refresh_intervals: Optional[Dict[str, float]] = None,
+    ):
+        self._lock = threading.Lock()
+        self._specs: Dict[str, ParserSpec] = {}
+        self._classes: Dict[str, Type[BaseParser]] = {}
+        self._enabled: Optional[List[str]] = None
+
+        refresh_intervals = refresh_intervals or {}
+        for source, target in (builtins or {}).items():
+            self.register(
+                source, target, refresh_interval_seconds=refresh_intervals.get(source)
+            )
+
+    def init_app(self, app) -> None:
+        """Entry points и настройки PARSERS / PARSERS_ENABLED из конфига."""
+        self.discover_entry_points()
+        for source, target in parse_parser_targets(app.config.get("PARSERS", "")).items():
+            self.register(source, target)
+
+        enabled = app.config.get("PARSERS_ENABLED", "")
+        self._enabled = [s.strip() for s in enabled.split(",") if s.strip()] or None
+
+    # ---------- Регистрация ---------- #
+
+    def register(
+        self,
+        source_name: str,
+        target: str,
+        refresh_interval_seconds: Optional[float] = None,
+        **options: Any,
+    ) -> None:
+        with self._lock:
+            self._specs[source_name] = ParserSpec(
+                source_name, target, options, refresh_interval_seconds
+            )
+            self._classes.pop(source_name, None)
+
+    def discover_entry_points(self, group: str = ENTRY_POINT_GROUP) -> int:
+        """Регистрирует парсеры из entry points (без импорта их модулей)."""
+        try:
+            entry_points = metadata.entry_points()
+            if hasattr(entry_points, "select"):
+                found = entry_points.select(group=group)
+            else:  # Python < 3.10
+                found = entry_points.get(group, [])
+        except Exception as exc:  # noqa: BLE001
+            print(f"[Registry] Не удалось прочитать entry points: {exc}")
+            return 0
+
+        for entry_point in found:
+            self.register(entry_point.name, entry_point.value)
+        return len(found)
+
+    # ---------- Доступ ---------- #
+
+    def sources(self) -> List[str]:
+        """Источники, которые запускает апдейтер (с учётом PARSERS_ENABLED)."""
+        with self._lock:
+            names = list(self._specs)
+        if self._enabled is not None:
+            names = [name for name in names if name in self._enabled]
+        return names
+
+    def spec(self, source_name: str) -> ParserSpec:
+        try:
+            return self._specs[source_name]
+        except KeyError:
+            raise UnknownParser(source_name) from None
+
+    def load(self, source_name: str) -> Type[BaseParser]:
+        """Класс парсера; модуль импортируется при первом обращении."""
+        cls = self._classes.get(source_name)
+        if cls is not None:
+            return cls
+
+        spec = self.spec(source_name)
+        module_name, _, class_name = spec.target.partition(":")
+        cls = getattr(importlib.import_module(module_name), class_name)
+        if not (isinstance(cls, type) and issubclass(cls, BaseParser)):
+            raise TypeError(f"{spec.target} не является парсером (BaseParser)")
+        if cls.source_name != source_name:
+            print(
+                f"[Registry] {spec.target}: source_name={cls.source_name!r}, "
+                f"а зарегистрирован как {source_name!r}"
+            )
+
+        with self._lock:
+            self._classes[source_name] = cls
+        return cls
+
+    def create(self, source_name: str, **kwargs: Any) -> BaseParser:
+        spec = self.spec(source_name)
+        return self.load(source_name)(**{**spec.options, **kwargs})
+
+    def create_all(self, sources: Optional[Sequence[str]] = None) -> List[BaseParser]:
+        """Парсеры включённых источников (sources — только эти)."""
+        parsers: List[BaseParser] = []
+        for source in self.sources():
+            if sources is not None and source not in sources:
+                continue
+            parsers.append(self.create(source))
+        return parsers
+
+
+# Общий реестр (entry points и конфиг подключаются в create_app)
+parser_registry = ParserRegistry(BUILTIN_PARSERS, BUILTIN_REFRESH_INTERVALS)
@@ -1,14 +1,24 @@
 from dataclasses import dataclass
 from datetime import datetime, timedelta, date
+import json
+import os
 import re
-from typing import List, Optional
-
-from playwright.sync_api import (
-    sync_playwright,
-    TimeoutError as PlaywrightTimeoutError,
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+from parsers.base import BaseParser, SlotBatch, SlotData
+from parsers.browser_pool import BrowserPool
+from parsers.catalog import CourtConfig, catalog_courts
+from parsers.har import (
+    HarError,
+    HarManifest,
+    HarSettings,
+    load_manifest,
+    save_manifest,
 )
-
-from parsers.base import BaseParser, SlotData
+from services.metrics import PARSER_ERRORS, PARSER_STEP, record_page
 
 
 # --- Вспомогательные данные ---
@@ -29,107 +39,666 @@ MONTHS_RU = {
 }
 
 
+# Ячейки дней календаря: появляются, когда виджет отрисовался
+DAY_SELECTOR = '[data-locator="working_day_number"]'
+
+
 @dataclass
-class CourtConfig:
+class WaitConfig:
+    """
+    Верхние границы ожиданий (в мс) для событийной готовности виджета.
+
+    Парсер ждёт не фиксированное время, а конкретное событие (селектор,
+    ответ API со слотами) и только до этих границ.
+    """
+    goto_timeout_ms: int = 30_000      # загрузка документа виджета
+    ready_timeout_ms: int = 10_000     # появление календаря после goto
+    month_switch_timeout_ms: int = 5_000  # ответ API после стрелки месяца
+    date_select_timeout_ms: int = 5_000   # ответ search-timeslots после клика даты
+    settle_ms: int = 200               # дать SPA дорисовать DOM после ответа
+
+
+def is_timeslots_payload(payload: Any) -> bool:
+    """
+    Похож ли ответ на search-timeslots ({"data": [...]}). Конверт ошибки
+    или сменившаяся схема разбираются в пустой список — это не "свободных
+    слотов нет", и такой ответ нельзя считать собранной датой.
+    """
+    return isinstance(payload, dict) and isinstance(payload.get("data"), list)
+
+
+def parse_timeslots_payload(payload: Any, target_date: date) -> List[datetime]:
+    """
+    Разбирает JSON ответа search-timeslots в список начал слотов.
+
+    Ожидаемый формат (JSON:API, как в scripts/yclients_api_test.py):
+    {"data": [{"attributes": {"datetime": "...", "time": "HH:MM",
+                              "is_bookable": true}}, ...]}
+    Незабронируемые слоты пропускаем. Время храним "наивным" — в часовом
+    поясе клуба, как и остальные парсеры.
+    """
+    if not isinstance(payload, dict):
+        return []
+
+    starts: List[datetime] = []
+    for item in payload.get("data") or []:
+        attrs = item.get("attributes") or {}
+        if attrs.get("is_bookable") is False:
+            continue
+
+        start_dt: Optional[datetime] = None
+        raw_dt = attrs.get("datetime")
+        if raw_dt:
+            try:
+                start_dt = datetime.fromisoformat(raw_dt).replace(tzinfo=None)
+            except ValueError:
+                start_dt = None
+
+        if start_dt is None and attrs.get("time"):
+            try:
+                hour, minute = map(int, str(attrs["time"]).split(":")[:2])
+                start_dt = datetime.combine(
+                    target_date, datetime.min.time()
+                ).replace(hour=hour, minute=minute)
+            except ValueError:
+                continue
+
+        if start_dt is not None:
+            starts.append(start_dt)
+
+    return sorted(set(starts))
+
+
+# JS для клика по стрелке переключения месяца.
+# По договорённости: hosts[0] — левая стрелка, hosts[1] — правая.
+# Возвращает {ok, reason, debug} — debug-строки выводим в Python.
+MONTH_ARROW_JS = """
+(direction) => {
+    const debug = [];
+
+    const iconHosts  = Array.from(
+        document.querySelectorAll('y-core-icon-button')
+    );
+    const simpleHosts = Array.from(
+        document.querySelectorAll('y-core-simple-button.y-core-icon-button')
+    );
+
+    const hosts = [...iconHosts, ...simpleHosts];
+
+    debug.push(
+        `found y-core-icon-button: ${iconHosts.length}, `
+        + `y-core-simple-button.y-core-icon-button: ${simpleHosts.length}, `
+        + `total hosts: ${hosts.length}`
+    );
+
+    hosts.forEach((host, idx) => {
+        const tag = host.tagName;
+        const classes = host.getAttribute('class') || '';
+        const dl = host.getAttribute('data-locator') || '';
+        debug.push(
+            `host[${idx}]: tag=${tag}, class="${classes}", `
+            + `data-locator="${dl}"`
+        );
+
+        // Если есть shadowRoot — тоже немного посмотрим внутрь
+        const sr = host.shadowRoot;
+        if (sr) {
+            const innerButtons = Array.from(sr.querySelectorAll('button'));
+            debug.push(
+                `host[${idx}]: shadowRoot buttons=${innerButtons.length}`
+            );
+            innerButtons.forEach((b, bi) => {
+                debug.push(
+                    `host[${idx}] button[${bi}] class="${b.className}"`
+                );
+            });
+        } else {
+            debug.push(`host[${idx}]: shadowRoot = null`);
+        }
+    });
+
+    let host = null;
+    if (hosts.length === 0) {
+        debug.push("no hosts at all for month arrows");
+        return { ok: false, reason: "no-hosts", debug };
+    }
+
+    // по договорённости: [0] — левая стрелка, [1] — правая
+    if (direction === "next") {
+        host = hosts[1] || hosts[0];
+        debug.push(
+            `direction=next, picked host index=${hosts[1] ? 1 : 0}`
+        );
+    } else {
+        host = hosts[0];
+        debug.push("direction=prev, picked host index=0");
+    }
+
+    if (!host) {
+        debug.push("host is null after selection");
+        return { ok: false, reason: "no-host-for-direction", debug };
+    }
+
+    try {
+        host.click();
+        debug.push("clicked host directly with host.click()");
+        return { ok: true, reason: "clicked-host", debug };
+    } catch (e) {
+        debug.push("error on host.click(): " + e);
+    }
+
+    // fallback: если есть shadowRoot и button внутри — пробуем его
+    const sr = host.shadowRoot;
+    if (sr) {
+        const btn = sr.querySelector("button");
+        if (btn) {
+            try {
+                btn.click();
+                debug.push("clicked inner button inside shadowRoot");
+                return { ok: true, reason: "clicked-inner-button", debug };
+            } catch (e2) {
+                debug.push("error on inner button click: " + e2);
+            }
+        } else {
+            debug.push("no <button> inside shadowRoot in fallback");
+        }
+    } else {
+        debug.push("no shadowRoot in fallback");
+    }
+
+    return { ok: false, reason: "click-failed", debug };
+}
+"""
+
+# JS для клика по дню в календаре (ищем по тексту в working_day_number)
+SELECT_DAY_JS = """
+(day) => {
+    const nodes = Array.from(
+        document.querySelectorAll('[data-locator="working_day_number"]')
+    );
+    console.log("YClients parser: found day nodes =", nodes.length);
+
+    const target = nodes.find(
+        (n) => n.textContent && n.textContent.trim() === String(day)
+    );
+    if (!target) {
+        console.warn("YClients parser: day element not found for", day);
+        return false;
+    }
+
+    const btn = target.closest('button');
+    if (btn) {
+        btn.click();
+        return true;
+    }
+
+    target.dispatchEvent(
+        new MouseEvent('click', { bubbles: true, cancelable: true })
+    );
+    return true;
+}
+"""
+
+# JS для запросов search-timeslots по отдельным кортам из самой страницы:
+# те же URL и заголовки, что у запроса виджета, — значит, те же cookies,
+# перехват маршрутов и запись/воспроизведение HAR. null — запрос не удался.
+STAFF_TIMESLOTS_JS = """
+async ({ url, headers, bodies }) => Promise.all(bodies.map(async (body) => {
+    try {
+        const response = await fetch(url, {
+            method: "POST",
+            headers,
+            body: JSON.stringify(body),
+            credentials: "include",
+        });
+        return response.ok ? await response.json() : null;
+    } catch (e) {
+        return null;
+    }
+}))
+"""
+
+
+class TimeslotCollector:
     """
-    Настройки для одного корта / услуги на YClients.
+    Копит ответы search-timeslots, которые виджет запрашивает сам,
+    и раскладывает их по (дата, staff_id).
+
+    В обработчике события только складываем Response в список,
+    а JSON читаем позже, в основном потоке парсера.
+
+    Виджет с o=m-1 спрашивает только "любой корт" — это объединение
+    всех кортов, а не слоты конкретного. Поэтому запрос виджета
+    запоминается как образец (staff_requests), и по нему парсер
+    запрашивает каждый корт отдельно.
     """
-    club_name: str
-    court_name: str
-    url: str
-    duration_minutes: int
-    service_label: str  # например, "Аренда 1 час", "1.5 часа"
 
-    # пока просто храним, позже начнём использовать для честного разделения кортов
-    staff_id: int       # уникальный ID корта (staff) в YClients
-    service_id: int     # ID услуги ("Аренда 1 час" и т.п.)
+    # staff_id, которым виджет запрашивает "любой корт"
+    ANY_STAFF = -1
+
+    def __init__(self):
+        self._pending: List[Any] = []
+        self._starts: Dict[Tuple[str, int], List[datetime]] = {}
+        # (URL, заголовки, JSON-тело) последнего запроса виджета
+        self._template: Optional[Tuple[str, Dict[str, str], Dict[str, Any]]] = None
+
+    def attach(self, page) -> None:
+        page.on("response", self._on_response)
+
+    def _on_response(self, response) -> None:
+        if "search-timeslots" in response.url and response.ok:
+            self._pending.append(response)
+
+    def _drain(self) -> None:
+        pending, self._pending = self._pending, []
+        for response in pending:
+            try:
+                payload = response.json()
+            except Exception as e:  # noqa: BLE001
+                print(f"[YClients] Не удалось разобрать ответ timeslots: {e}")
+                continue
+            self._remember(response.request)
+            self._store(response.request.post_data_json, payload)
+
+    def _remember(self, request) -> None:
+        """Запоминает запрос виджета как образец для запросов по кортам."""
+        try:
+            body = request.post_data_json
+        except Exception:  # noqa: BLE001
+            return
+        if not isinstance(body, dict):
+            return
+        headers = {
+            name: value
+            for name, value in request.headers.items()
+            if not name.startswith(":") and name.lower() != "content-length"
+        }
+        self._template = (request.url, headers, body)
+
+    def staff_requests(
+        self, target_date: date, staff_ids: List[int]
+    ) -> Optional[Tuple[str, Dict[str, str], List[Dict[str, Any]]]]:
+        """
+        (URL, заголовки, тела) запросов search-timeslots на дату — по
+        одному на staff_id, по образцу запроса виджета. None — образца нет.
+        """
+        if self._template is None:
+            return None
+        url, headers, template = self._template
+        bodies = []
+        for staff_id in staff_ids:
+            body = json.loads(json.dumps(template))
+            flt = body.setdefault("filter", {})
+            flt["date"] = target_date.isoformat()
+            records = flt.get("records") or [{}]
+            records[0] = {**records[0], "staff_id": staff_id}
+            flt["records"] = records
+            bodies.append(body)
+        return url, headers, bodies
+
+    def _store(self, request_json: Any, payload: Any) -> None:
+        """Кладёт разобранный ответ под ключ (дата, staff_id) из запроса."""
+        try:
+            flt = (request_json or {}).get("filter", {})
+            date_str = flt["date"]
+            records = flt.get("records") or [{}]
+            staff_id = int(records[0].get("staff_id", self.ANY_STAFF))
+            target_date = date.fromisoformat(date_str)
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"[YClients] Не удалось разобрать запрос timeslots: {e}")
+            return
+        if not is_timeslots_payload(payload):
+            print(f"[YClients] Ответ timeslots на {date_str} неожиданного формата — пропускаем")
+            return
+
+        self._starts[(date_str, staff_id)] = parse_timeslots_payload(
+            payload, target_date
+        )
+
+    def _lookup(
+        self, target_date: date, staff_ids: List[int]
+    ) -> Optional[Dict[int, List[datetime]]]:
+        date_str = target_date.isoformat()
+        result = {
+            staff_id: self._starts[(date_str, staff_id)]
+            for staff_id in staff_ids
+            if (date_str, staff_id) in self._starts
+        }
+        if result or (date_str, self.ANY_STAFF) in self._starts:
+            return result
+        return None
+
+    def starts_by_staff(
+        self, target_date: date, staff_ids: List[int]
+    ) -> Optional[Dict[int, List[datetime]]]:
+        """
+        Слоты на дату по тем staff_id, на которые есть собственный ответ.
+        Ответ "любой корт" кортам не раздаётся (в нём слоты всех кортов
+        вместе): при нём результат может быть пустым словарём.
+        None — виджет на эту дату к API не обращался.
+        """
+        self._drain()
+        return self._lookup(target_date, staff_ids)
+
+
+class _SkipWait(Exception):
+    """Действие ничего не сделало — ждать ответа от сети нет смысла."""
+
+
+# ID компании (location) MyProtennis.ru в YClients (корты — в каталоге клубов)
+MYPROTENNIS_LOCATION_ID = 967881
+
+
+def myprotennis_courts() -> List[CourtConfig]:
+    """
+    Корты MyProtennis.ru из каталога: все на одном виджете, различаются staff_id.
+    """
+    return catalog_courts([MYPROTENNIS_LOCATION_ID])
 
 
 class YClientsMyProTennisCourtParser(BaseParser):
     """
     Парсер слотов для MyProtennis.ru на YClients.
+    Корты берутся из каталога клубов (parsers.catalog): корты одной
+    локации обходятся одной загрузкой виджета на дату.
     """
 
     source_name = "yclients_myprotennis"
-
-    def __init__(self, headless: bool = True, days_ahead: int = 2):
+    run_in_process = True
+
+    def __init__(
+        self,
+        headless: bool = True,
+        days_ahead: int = 2,
+        browser_pool: Optional[BrowserPool] = None,
+        grouped: bool = True,
+        waits: Optional[WaitConfig] = None,
+        dates: Optional[List[date]] = None,
+        courts: Optional[List[CourtConfig]] = None,
+        har_mode: Optional[str] = None,
+        har_path: Optional[str] = None,
+    ):
         """
         :param headless: True на проде, False — чтобы видеть браузер при отладке.
         :param days_ahead: сколько дней вперёд от сегодняшнего обходить
                            (0 = только сегодня, 2 = сегодня + 2 дня и т.д.).
+        :param dates: обойти только эти даты (None — весь горизонт days_ahead).
+        :param browser_pool: общий пул браузера. Если не передан, парсер
+                             сам поднимает пул на время fetch_slots и
+                             закрывает его в конце.
+        :param grouped: True — корты с общим URL виджета обходятся одной
+                        загрузкой страницы на дату, результат делится по
+                        staff_id; False — старый режим "корт за кортом".
+        :param waits: верхние границы ожиданий готовности виджета.
+        :param courts: корты для обхода (None — все корты каталога клубов,
+                       см. parsers.catalog).
+        :param har_mode: "record" — записать трафик виджета в HAR,
+                         "replay" — работать по записи без сети
+                         (None — из YCLIENTS_HAR_MODE, см. parsers.har).
+        :param har_path: HAR-файл (None — из YCLIENTS_HAR_PATH).
+                         Запись/воспроизведение работают, только если
+                         парсер сам поднимает пул браузера.
         """
         self.headless = headless
         self.days_ahead = days_ahead
-
-        common_url = (
-            "https://b1044864.yclients.com/company/967881/"
-            "personal/select-time?o=m-1"
+        self.dates = list(dates) if dates is not None else None
+        self.browser_pool = browser_pool
+        self.grouped = grouped
+        self.waits = waits or WaitConfig()
+
+        # Статистика пула за последний прогон (запуски браузера, тайминги)
+        self.last_pool_stats: Dict[str, Any] = {}
+        # Тайминги шагов (goto, стрелки месяца, выбор даты) за последний прогон
+        self.last_step_timings: List[Dict[str, Any]] = []
+        # Сколько дат подтверждено ответом API, а сколько — нет
+        # (день не выбрался / ответ не перехвачен), см. _starts_by_staff
+        self._reset_fetched_counters()
+
+        self.courts: List[CourtConfig] = (
+            list(courts) if courts is not None else catalog_courts()
         )
 
-        self.courts: List[CourtConfig] = [
-            CourtConfig(
-                club_name="MyProtennis.ru",
-                court_name="Корт №1",
-                url=common_url,
-                duration_minutes=60,
-                service_label="Аренда 1 час",
-                staff_id=2909330,
-                service_id=14378490,
-            ),
-            CourtConfig(
-                club_name="MyProtennis.ru",
-                court_name="Корт №2",
-                url=common_url,
-                duration_minutes=60,
-                service_label="Аренда 1 час",
-                staff_id=2909345,
-                service_id=14378490,
-            ),
-            CourtConfig(
-                club_name="MyProtennis.ru",
-                court_name="Корт №3",
-                url=common_url,
-                duration_minutes=60,
-                service_label="Аренда 1 час",
-                staff_id=2909347,
-                service_id=14378490,
-            ),
-            CourtConfig(
-                club_name="MyProtennis.ru",
-                court_name="Корт №4",
-                url=common_url,
-                duration_minutes=60,
-                service_label="Аренда 1 час",
-                staff_id=2909348,
-                service_id=14378490,
-            ),
-        ]
+        self.har = HarSettings.resolve(har_mode, har_path)
+        # Манифест воспроизводимой записи (только на время replay-прогона)
+        self._har_manifest: Optional[HarManifest] = None
 
     # ---------- Публичный метод парсера ---------- #
 
-    def fetch_slots(self) -> List[SlotData]:
+    def fetch_slots(self) -> SlotBatch:
         print("[YClients] Старт YClientsMyProTennisCourtParser")
 
-        all_slots: List[SlotData] = []
+        all_slots = SlotBatch()
+        self.last_step_timings = []
+        self._reset_fetched_counters()
+        self._reset_fetched()
+        started_at = self._start_har()
 
-        for cfg in self.courts:
-            try:
-                slots = self._collect_slots_for_court(cfg)
-                all_slots.extend(slots)
-                print(
-                    f"[YClients] Для {cfg.court_name} подготовлено слотов: "
-                    f"{len(slots)}"
-                )
-            except Exception as e:
-                print(
-                    f"[YClients] Ошибка при обработке {cfg.court_name}: {e}"
-                )
+        # Один браузер на все корты и даты: пул живёт весь прогон
+        pool = self.browser_pool or BrowserPool(
+            headless=self.headless, block_resources=True, **self._har_pool_options()
+        )
+        owns_pool = self.browser_pool is None
+
+        try:
+            if self.grouped:
+                for url, group in self._group_courts_by_url().items():
+                    court_names = ", ".join(c.court_name for c in group)
+                    try:
+                        slots = self._collect_slots_for_group(url, group, pool)
+                        all_slots.extend(slots)
+                        print(
+                            f"[YClients] Для {court_names} подготовлено слотов: "
+                            f"{len(slots)}"
+                        )
+                    except Exception as e:
+                        PARSER_ERRORS.inc(parser=self.parser_name, stage="court")
+                        print(
+                            f"[YClients] Ошибка при обработке {court_names}: {e}"
+                        )
+            else:
+                for cfg in self.courts:
+                    try:
+                        slots = self._collect_slots_for_court(cfg, pool)
+                        all_slots.extend(slots)
+                        print(
+                            f"[YClients] Для {cfg.court_name} подготовлено слотов: "
+                            f"{len(slots)}"
+                        )
+                    except Exception as e:
+                        PARSER_ERRORS.inc(parser=self.parser_name, stage="court")
+                        print(
+                            f"[YClients] Ошибка при обработке {cfg.court_name}: {e}"
+                        )
+        finally:
+            if owns_pool:
+                # HAR дописывается при закрытии контекста
+                pool.close()
+                self._finish_har(started_at)
+            self.last_pool_stats = pool.stats.as_dict()
 
+        print(
+            f"[YClients] Запусков браузера: {self.last_pool_stats['launches']}, "
+            f"на запуск ушло {self.last_pool_stats['launch_seconds']} с"
+        )
+        print(
+            f"[YClients] Дат разобрано по ответам API: {self._xhr_hits}, "
+            f"не подтверждено (старые слоты оставлены): {self._unconfirmed_dates()}, "
+            f"кортов без своего ответа API: {self._missing_staff}"
+        )
+        for step, seconds in self._step_totals().items():
+            print(f"[YClients] Шаг {step}: всего {seconds:.2f} с")
         print(f"[YClients] Итого слотов по всем кортам: {len(all_slots)}")
         return all_slots
 
     # ---------- Вспомогательные методы ---------- #
 
+    def _group_courts_by_url(self) -> Dict[str, List[CourtConfig]]:
+        """
+        Группирует корты по URL виджета (порядок кортов сохраняется).
+        Корты одной группы показываются на одной и той же странице.
+        """
+        groups: Dict[str, List[CourtConfig]] = {}
+        for cfg in self.courts:
+            groups.setdefault(cfg.url, []).append(cfg)
+        return groups
+
+    def court_keys(self) -> List[Tuple[str, str]]:
+        return [(cfg.club_name, cfg.court_name) for cfg in self.courts]
+
+    # ---------- Запись и воспроизведение трафика (HAR) ---------- #
+
+    def today(self) -> date:
+        if self._har_manifest is not None:
+            return self._har_manifest.recorded_at.date()
+        return super().today()
+
+    def target_dates(self) -> List[date]:
+        dates = super().target_dates()
+        if self._har_manifest is None:
+            return dates
+        # В записи есть только даты, которые тогда обходились
+        recorded = set(self._har_manifest.dates)
+        missing = [d.isoformat() for d in dates if d not in recorded]
+        if missing:
+            print(f"[YClients] Дат нет в записи HAR, пропускаем: {', '.join(missing)}")
+        return [d for d in dates if d in recorded]
+
+    def _start_har(self) -> datetime:
+        """
+        Готовит прогон к записи/воспроизведению. Возвращает момент старта
+        (для манифеста записи).
+        """
+        self._har_manifest = None
+        if self.har is not None and self.har.replaying:
+            if not os.path.exists(self.har.path):
+                raise HarError(f"нет записи {self.har.path}")
+            self._har_manifest = load_manifest(self.har.path)
+            print(
+                f"[YClients] Воспроизводим запись {self.har.path} "
+                f"от {self._har_manifest.recorded_at:%Y-%m-%d %H:%M}"
+            )
+        elif self.har is not None:
+            print(f"[YClients] Пишем трафик виджета в {self.har.path}")
+        return datetime.now()
+
+    def _har_pool_options(self) -> Dict[str, Any]:
+        """Аргументы BrowserPool для записи / воспроизведения."""
+        if self.har is None:
+            return {}
+        if self.har.recording:
+            return {"record_har_path": self.har.path}
+        return {
+            "replay_har_path": self.har.path,
+            "clock_time": self._har_manifest.recorded_at,
+        }
+
+    def _finish_har(self, started_at: datetime) -> None:
+        """После записи кладёт рядом с HAR манифест: когда и что обходили."""
+        if self.har is None or not self.har.recording:
+            self._har_manifest = None
+            return
+        scope = self.fetched_scope() or set()
+        save_manifest(
+            self.har.path,
+            HarManifest(
+                recorded_at=started_at,
+                dates=sorted({day for _, _, day in scope}),
+                courts=[cfg.court_name for cfg in self.courts],
+                urls=list(self._group_courts_by_url()),
+            ),
+        )
+        print(f"[YClients] Запись сохранена: {self.har.path}")
+
+    # ---------- Ожидание готовности и тайминги ---------- #
+
+    def _record_step(self, step: str, started: float, ok: bool = True) -> None:
+        seconds = time.perf_counter() - started
+        self.last_step_timings.append(
+            {
+                "step": step,
+                "seconds": round(seconds, 3),
+                "ok": ok,
+            }
+        )
+        PARSER_STEP.observe(seconds, parser=self.parser_name, step=step)
+
+    def _step_totals(self) -> Dict[str, float]:
+        """Суммарное время по каждому типу шага за прогон."""
+        totals: Dict[str, float] = {}
+        for item in self.last_step_timings:
+            totals[item["step"]] = totals.get(item["step"], 0.0) + item["seconds"]
+        return totals
+
+    @staticmethod
+    def _is_availability_response(response) -> bool:
+        return "/availability/" in response.url
+
+    @staticmethod
+    def _is_timeslots_response(response) -> bool:
+        return "search-timeslots" in response.url
+
+    def _open_widget(self, page, url: str) -> None:
+        """
+        Открывает виджет и ждёт, пока отрисуется календарь
+        (а не фиксированные 3 секунды).
+        """
+        started = time.perf_counter()
+        page.goto(
+            url,
+            timeout=self.waits.goto_timeout_ms,
+            wait_until="domcontentloaded",
+        )
+        self._record_step("goto", started)
+
+        started = time.perf_counter()
+        try:
+            page.wait_for_selector(
+                DAY_SELECTOR, state="attached", timeout=self.waits.ready_timeout_ms
+            )
+            self._record_step("widget_ready", started)
+        except PlaywrightTimeoutError:
+            self._record_step("widget_ready", started, ok=False)
+            print(
+                f"[YClients] Календарь не появился за "
+                f"{self.waits.ready_timeout_ms} мс — продолжаем как есть"
+            )
+
+    def _run_and_wait_response(
+        self,
+        page,
+        step: str,
+        action: Callable[[], Any],
+        should_wait: Callable[[Any], bool],
+        predicate: Callable[[Any], bool],
+        timeout_ms: int,
+    ) -> Any:
+        """
+        Выполняет action (клик в JS) и ждёт подходящий сетевой ответ,
+        но не дольше timeout_ms. Если should_wait(результат) ложно —
+        клик не удался, и ждать нечего.
+        """
+        started = time.perf_counter()
+        result = None
+        try:
+            with page.expect_response(predicate, timeout=timeout_ms):
+                result = action()
+                if not should_wait(result):
+                    raise _SkipWait()
+        except _SkipWait:
+            self._record_step(step, started, ok=False)
+            return result
+        except PlaywrightTimeoutError:
+            self._record_step(step, started, ok=False)
+            print(
+                f"[YClients] Шаг {step}: ответ API не пришёл за {timeout_ms} мс"
+            )
+            return result
+
+        if self.waits.settle_ms:
+            page.wait_for_timeout(self.waits.settle_ms)
+        self._record_step(step, started)
+        return result
+
     def _parse_nearest_date_from_text(self, text: str) -> Optional[date]:
         """
         Пытаемся вытащить дату из строки вида:
@@ -150,7 +719,7 @@ class YClientsMyProTennisCourtParser(BaseParser):
         if not month:
             return None
 
-        today = datetime.now().date()
+        today = self.today()
         year = today.year
         if month < today.month:
             year += 1
@@ -173,7 +742,164 @@ class YClientsMyProTennisCourtParser(BaseParser):
         ))
         return unique_times
 
-    def _click_month_arrow(self, page, direction: str) -> None:
+    def _times_to_starts(self, target_date: date, times: List[str]) -> List[datetime]:
+        """Строки "HH:MM" на дату -> список datetime начала слотов."""
+        starts: List[datetime] = []
+        for time_str in times:
+            try:
+                hour, minute = map(int, time_str.split(":"))
+                starts.append(
+                    datetime(
+                        year=target_date.year,
+                        month=target_date.month,
+                        day=target_date.day,
+                        hour=hour,
+                        minute=minute,
+                    )
+                )
+            except ValueError:
+                print(
+                    f"[YClients] Не удалось распарсить время '{time_str}' "
+                    f"на дату {target_date}"
+                )
+        return starts
+
+    def _reset_fetched_counters(self) -> None:
+        self._xhr_hits = 0
+        self._html_fallbacks = 0
+        self._select_failures = 0
+        self._missing_staff = 0
+
+    def _unconfirmed_dates(self) -> int:
+        return self._select_failures + self._html_fallbacks
+
+    def _starts_by_staff(
+        self,
+        page,
+        collector: TimeslotCollector,
+        target_date: date,
+        staff_ids: List[int],
+        selected: bool,
+    ) -> Optional[Dict[int, List[datetime]]]:
+        """
+        Слоты на дату по staff_id — из JSON ответов API (точные слоты
+        по каждому корту). Корты, на которые виджет собственного ответа
+        не получил, запрашиваем отдельно (STAFF_TIMESLOTS_JS).
+
+        None — дату подтвердить не удалось (день не выбрался или ответ
+        API не перехвачен). Корта нет в результате — своего ответа по нему
+        так и нет. Такие (корт, дата) не отмечаются собранными, и прежние
+        слоты в БД остаются до следующего прогона.
+        """
+        if not selected:
+            self._skip_unconfirmed(target_date, "дата в календаре не выбрана")
+            return None
+
+        by_staff = collector.starts_by_staff(target_date, staff_ids)
+        if by_staff is None:
+            self._skip_unconfirmed(
+                target_date, "ответ API не перехвачен", page.content()
+            )
+            return None
+
+        missing = [sid for sid in staff_ids if sid not in by_staff]
+        if missing:
+            self._request_staff_timeslots(page, collector, target_date, missing)
+            by_staff = collector.starts_by_staff(target_date, staff_ids) or {}
+
+        self._xhr_hits += 1
+        self._note_missing_staff(target_date, staff_ids, by_staff)
+        return by_staff
+
+    def _request_staff_timeslots(
+        self,
+        page,
+        collector: TimeslotCollector,
+        target_date: date,
+        staff_ids: List[int],
+    ) -> None:
+        """Запрашивает search-timeslots по каждому корту из страницы виджета."""
+        request = collector.staff_requests(target_date, staff_ids)
+        if request is None:
+            return
+        url, headers, bodies = request
+
+        started = time.perf_counter()
+        try:
+            payloads = page.evaluate(
+                STAFF_TIMESLOTS_JS, {"url": url, "headers": headers, "bodies": bodies}
+            )
+        except Exception as e:  # noqa: BLE001
+            self._record_step("staff_timeslots", started, ok=False)
+            print(f"[YClients] Запрос слотов по кортам на {target_date} не удался: {e}")
+            return
+        self._store_staff_payloads(collector, bodies, payloads)
+        self._record_step("staff_timeslots", started)
+
+    @staticmethod
+    def _store_staff_payloads(
+        collector: TimeslotCollector, bodies: List[Dict[str, Any]], payloads: Any
+    ) -> None:
+        for body, payload in zip(bodies, payloads or []):
+            if payload is not None:
+                collector._store(body, payload)
+
+    def _note_missing_staff(
+        self, target_date: date, staff_ids: List[int], by_staff: Dict[int, Any]
+    ) -> None:
+        """Корты без собственного ответа API: считаем и пишем в лог."""
+        missing = [sid for sid in staff_ids if sid not in by_staff]
+        if not missing:
+            return
+        self._missing_staff += len(missing)
+        PARSER_ERRORS.inc(parser=self.parser_name, stage="staff_timeslots")
+        print(
+            f"[YClients] {target_date}: нет ответа API по staff_id "
+            f"{', '.join(map(str, missing))} — оставляем прежние слоты этих кортов"
+        )
+
+    def _skip_unconfirmed(
+        self, target_date: date, reason: str, html: Optional[str] = None
+    ) -> None:
+        """
+        Дата не подтверждена — слоты не сохраняем. Регулярка по HTML
+        осталась только для лога: в разметке нет привязки к корту, и она
+        цепляет любые "часы" на странице (шапка, подвал).
+        """
+        if html is None:
+            self._select_failures += 1
+            PARSER_ERRORS.inc(parser=self.parser_name, stage="date_select")
+            print(f"[YClients] {target_date}: {reason} — оставляем прежние слоты")
+            return
+
+        self._html_fallbacks += 1
+        PARSER_ERRORS.inc(parser=self.parser_name, stage="no_timeslots")
+        times = self._extract_unique_times(html)
+        print(
+            f"[YClients] {target_date}: {reason} — оставляем прежние слоты "
+            f"(в HTML похоже на время: {', '.join(times) or 'ничего'})"
+        )
+
+    def _build_slots(
+        self, cfg: CourtConfig, starts: List[datetime]
+    ) -> List[SlotData]:
+        """
+        Превращает список начал слотов в SlotData для корта.
+        """
+        return [
+            SlotData(
+                club=cfg.club_name,
+                court=cfg.court_name,
+                start=start_dt,
+                end=start_dt + timedelta(minutes=cfg.duration_minutes),
+                duration_minutes=cfg.duration_minutes,
+                status="free",
+                source=self.source_name,
+            )
+            for start_dt in starts
+        ]
+
+    def _click_month_arrow(self, page, direction: str) -> bool:
         """
         Кликает по стрелке переключения месяца.
 
@@ -186,105 +912,14 @@ class YClientsMyProTennisCourtParser(BaseParser):
         - пытаемся кликнуть по нужному host напрямую (host.click()).
         """
 
-        js = """
-        (direction) => {
-            const debug = [];
-
-            const iconHosts  = Array.from(
-                document.querySelectorAll('y-core-icon-button')
-            );
-            const simpleHosts = Array.from(
-                document.querySelectorAll('y-core-simple-button.y-core-icon-button')
-            );
-
-            const hosts = [...iconHosts, ...simpleHosts];
-
-            debug.push(
-                `found y-core-icon-button: ${iconHosts.length}, `
-                + `y-core-simple-button.y-core-icon-button: ${simpleHosts.length}, `
-                + `total hosts: ${hosts.length}`
-            );
-
-            hosts.forEach((host, idx) => {
-                const tag = host.tagName;
-                const classes = host.getAttribute('class') || '';
-                const dl = host.getAttribute('data-locator') || '';
-                debug.push(
-                    `host[${idx}]: tag=${tag}, class="${classes}", `
-                    + `data-locator="${dl}"`
-                );
-
-                // Если есть shadowRoot — тоже немного посмотрим внутрь
-                const sr = host.shadowRoot;
-                if (sr) {
-                    const innerButtons = Array.from(sr.querySelectorAll('button'));
-                    debug.push(
-                        `host[${idx}]: shadowRoot buttons=${innerButtons.length}`
-                    );
-                    innerButtons.forEach((b, bi) => {
-                        debug.push(
-                            `host[${idx}] button[${bi}] class="${b.className}"`
-                        );
-                    });
-                } else {
-                    debug.push(`host[${idx}]: shadowRoot = null`);
-                }
-            });
-
-            let host = null;
-            if (hosts.length === 0) {
-                debug.push("no hosts at all for month arrows");
-                return { ok: false, reason: "no-hosts", debug };
-            }
-
-            // по договорённости: [0] — левая стрелка, [1] — правая
-            if (direction === "next") {
-                host = hosts[1] || hosts[0];
-                debug.push(
-                    `direction=next, picked host index=${hosts[1] ? 1 : 0}`
-                );
-            } else {
-                host = hosts[0];
-                debug.push("direction=prev, picked host index=0");
-            }
-
-            if (!host) {
-                debug.push("host is null after selection");
-                return { ok: false, reason: "no-host-for-direction", debug };
-            }
-
-            try {
-                host.click();
-                debug.push("clicked host directly with host.click()");
-                return { ok: true, reason: "clicked-host", debug };
-            } catch (e) {
-                debug.push("error on host.click(): " + e);
-            }
-
-            // fallback: если есть shadowRoot и button внутри — пробуем его
-            const sr = host.shadowRoot;
-            if (sr) {
-                const btn = sr.querySelector("button");
-                if (btn) {
-                    try {
-                        btn.click();
-                        debug.push("clicked inner button inside shadowRoot");
-                        return { ok: true, reason: "clicked-inner-button", debug };
-                    } catch (e2) {
-                        debug.push("error on inner button click: " + e2);
-                    }
-                } else {
-                    debug.push("no <button> inside shadowRoot in fallback");
-                }
-            } else {
-                debug.push("no shadowRoot in fallback");
-            }
-
-            return { ok: false, reason: "click-failed", debug };
-        }
-        """
-
-        result = page.evaluate(js, direction)
+        result = self._run_and_wait_response(
+            page,
+            "month_switch",
+            action=lambda: page.evaluate(MONTH_ARROW_JS, direction),
+            should_wait=lambda r: isinstance(r, dict) and bool(r.get("ok")),
+            predicate=self._is_availability_response,
+            timeout_ms=self.waits.month_switch_timeout_ms,
+        )
 
         # Аккуратно выводим все debug-строки
         if isinstance(result, dict):
@@ -296,23 +931,25 @@ class YClientsMyProTennisCourtParser(BaseParser):
                     f"[YClients] Не удалось кликнуть стрелку месяца ({direction}). "
                     f"Причина: {result.get('reason')}"
                 )
-            else:
-                print(
-                    f"[YClients] Успешно кликнули стрелку месяца ({direction}). "
-                    f"Режим: {result.get('reason')}"
-                )
-                page.wait_for_timeout(1_000)
-        else:
+                return False
             print(
-                f"[YClients] Непонятный результат из JS для стрелки ({direction}): "
-                f"{result}"
+                f"[YClients] Успешно кликнули стрелку месяца ({direction}). "
+                f"Режим: {result.get('reason')}"
             )
+            return True
 
-    def _select_date_on_calendar(self, page, target_date: date, base_date: date) -> None:
+        print(
+            f"[YClients] Непонятный результат из JS для стрелки ({direction}): "
+            f"{result}"
+        )
+        return False
+
+    def _select_date_on_calendar(self, page, target_date: date, base_date: date) -> bool:
         """
         Переключаем календарь на нужный месяц стрелками и выбираем день.
 
         base_date — дата, которую считаем текущей при открытии виджета.
+        Возвращает True, если день удалось кликнуть.
         """
         month_diff = (target_date.year - base_date.year) * 12 + (
             target_date.month - base_date.month
@@ -322,66 +959,50 @@ class YClientsMyProTennisCourtParser(BaseParser):
             f"target={target_date}, month_diff={month_diff}"
         )
 
-        if month_diff > 0:
-            print(f"[YClients] Листаем календарь вперёд на {month_diff} мес.")
-            for _ in range(month_diff):
-                self._click_month_arrow(page, "next")
-        elif month_diff < 0:
-            print(f"[YClients] Листаем календарь назад на {-month_diff} мес.")
-            for _ in range(-month_diff):
-                self._click_month_arrow(page, "prev")
+        direction = "next" if month_diff > 0 else "prev"
+        if month_diff:
+            print(
+                f"[YClients] Листаем календарь "
+                f"{'вперёд' if month_diff > 0 else 'назад'} на {abs(month_diff)} мес."
+            )
+        for _ in range(abs(month_diff)):
+            if not self._click_month_arrow(page, direction):
+                # Иначе кликнем тот же день, но в другом месяце
+                return False
 
         day_str = str(target_date.day)
 
         try:
             print(f"[YClients] Пытаемся выбрать дату {target_date} (день {day_str})")
 
-            js = """
-            (day) => {
-                const nodes = Array.from(
-                    document.querySelectorAll('[data-locator="working_day_number"]')
-                );
-                console.log("YClients parser: found day nodes =", nodes.length);
-
-                const target = nodes.find(
-                    (n) => n.textContent && n.textContent.trim() === String(day)
-                );
-                if (!target) {
-                    console.warn("YClients parser: day element not found for", day);
-                    return false;
-                }
-
-                const btn = target.closest('button');
-                if (btn) {
-                    btn.click();
-                    return true;
-                }
-
-                target.dispatchEvent(
-                    new MouseEvent('click', { bubbles: true, cancelable: true })
-                );
-                return true;
-            }
-            """
-
-            ok = page.evaluate(js, day_str)
+            ok = self._run_and_wait_response(
+                page,
+                "date_select",
+                action=lambda: page.evaluate(SELECT_DAY_JS, day_str),
+                should_wait=bool,
+                predicate=self._is_timeslots_response,
+                timeout_ms=self.waits.date_select_timeout_ms,
+            )
             if not ok:
                 print(
                     f"[YClients] Не нашли день {day_str} в календаре после переключения месяца."
                 )
-            else:
-                page.wait_for_timeout(1_000)
+            return bool(ok)
 
         except Exception as e:
             print(
                 f"[YClients] Не удалось кликнуть дату {target_date} "
                 f"(день {day_str}) — ошибка: {e}"
             )
+            return False
 
-    def _collect_slots_for_court(self, cfg: CourtConfig) -> List[SlotData]:
+    def _collect_slots_for_court(
+        self, cfg: CourtConfig, pool: BrowserPool
+    ) -> List[SlotData]:
         """
         Собирает слоты для одного корта/услуги по его URL.
-        Обходит несколько дат подряд (сегодня + self.days_ahead).
+        Обходит даты из target_dates() (явный список или сегодня + days_ahead).
+        Страницу берёт из общего пула браузера.
         """
 
         print(
@@ -391,85 +1012,127 @@ class YClientsMyProTennisCourtParser(BaseParser):
 
         all_slots: List[SlotData] = []
 
-        base_date = datetime.now().date()
-        target_dates = [base_date + timedelta(days=i) for i in range(self.days_ahead + 1)]
+        target_dates = self.target_dates()
+        # Виджет всегда открывается на текущем месяце — от него и листаем
+        base_date = self.today()
         target_dates_str = ", ".join(d.isoformat() for d in target_dates)
         print(f"[YClients] Даты для запроса: {target_dates_str}")
 
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=self.headless)
-            context = browser.new_context()
+        # ВАЖНО: на КАЖДУЮ дату заново открываем виджет.
+        # Так мы всегда стартуем из одного и того же месяца (base_date)
+        # и не накапливаем смещение.
+        with pool.page(job=cfg.court_name) as page:
+            collector = TimeslotCollector()
+            collector.attach(page)
 
-            try:
-                # ВАЖНО: на КАЖДУЮ дату заново открываем виджет.
-                # Так мы всегда стартуем из одного и того же месяца (base_date)
-                # и не накапливаем смещение.
-                page = context.new_page()
+            for target_date in target_dates:
+                if self.is_cancelled():
+                    print("[YClients] Парсер отменён — прекращаем обход дат")
+                    break
 
-                for target_date in target_dates:
-                    print(
-                        f"[YClients] === Обработка даты {target_date} "
-                        f"для {cfg.court_name} ==="
-                    )
+                print(
+                    f"[YClients] === Обработка даты {target_date} "
+                    f"для {cfg.court_name} ==="
+                )
 
-                    print(f"[YClients] Открываем URL виджета: {cfg.url}")
-                    page.goto(cfg.url, timeout=30_000)
-                    page.wait_for_timeout(3_000)
+                print(f"[YClients] Открываем URL виджета: {cfg.url}")
+                started = time.perf_counter()
+                self._open_widget(page, cfg.url)
 
-                    self._select_date_on_calendar(page, target_date, base_date)
+                selected = self._select_date_on_calendar(page, target_date, base_date)
+                loaded = time.perf_counter()
 
-                    html = page.content()
-                    print(
-                        f"[YClients] Длина HTML для {cfg.court_name} / "
-                        f"{target_date}: {len(html)} символов"
-                    )
+                by_staff = self._starts_by_staff(
+                    page, collector, target_date, [cfg.staff_id], selected
+                )
+                starts = (by_staff or {}).get(cfg.staff_id, [])
+                record_page(
+                    self.parser_name, [cfg.court_name], target_date,
+                    loaded - started, time.perf_counter() - loaded, len(starts),
+                )
+                if by_staff is None or cfg.staff_id not in by_staff:
+                    continue
+                self._mark_fetched(cfg.club_name, cfg.court_name, target_date)
+                print(
+                    f"[YClients] Слотов на {target_date}: "
+                    f"{[s.strftime('%H:%M') for s in starts]}"
+                )
 
-                    unique_times = self._extract_unique_times(html)
+                if not starts:
                     print(
-                        f"[YClients] Временных вхождений (уникальных) на "
-                        f"{target_date}: {unique_times}"
+                        f"[YClients] На дату {target_date} времён не найдено — "
+                        f"пропускаем."
                     )
+                    continue
 
-                    if not unique_times:
-                        print(
-                            f"[YClients] На дату {target_date} времён не найдено — "
-                            f"пропускаем."
-                        )
-                        continue
+                all_slots.extend(self._build_slots(cfg, starts))
 
-                    for time_str in unique_times:
-                        try:
-                            hour, minute = map(int, time_str.split(":"))
-                        except ValueError:
-                            print(
-                                f"[YClients] Не удалось распарсить время '{time_str}' "
-                                f"на дату {target_date}"
-                            )
-                            continue
-
-                        start_dt = datetime(
-                            year=target_date.year,
-                            month=target_date.month,
-                            day=target_date.day,
-                            hour=hour,
-                            minute=minute,
-                        )
-                        end_dt = start_dt + timedelta(
-                            minutes=cfg.duration_minutes
-                        )
+        return all_slots
 
-                        slot = SlotData(
-                            club=cfg.club_name,
-                            court=cfg.court_name,
-                            start=start_dt,
-                            end=end_dt,
-                            duration_minutes=cfg.duration_minutes,
-                            status="free",
-                            source=self.source_name,
-                        )
-                        all_slots.append(slot)
+    def _collect_slots_for_group(
+        self, url: str, group: List[CourtConfig], pool: BrowserPool
+    ) -> List[SlotData]:
+        """
+        Собирает слоты сразу для нескольких кортов с общим URL виджета.
+
+        На каждую дату страница загружается ОДИН раз, а найденные времена
+        раскладываются по staff_id кортов группы. Это в len(group) раз
+        меньше загрузок, чем в режиме _collect_slots_for_court.
+        """
+        court_names = ", ".join(c.court_name for c in group)
+        print(f"[YClients] Старт группового парсера для {court_names}")
+
+        all_slots: List[SlotData] = []
+
+        target_dates = self.target_dates()
+        # Виджет всегда открывается на текущем месяце — от него и листаем
+        base_date = self.today()
+        target_dates_str = ", ".join(d.isoformat() for d in target_dates)
+        print(f"[YClients] Даты для запроса: {target_dates_str}")
 
-            finally:
-                browser.close()
+        staff_ids = [cfg.staff_id for cfg in group]
+
+        with pool.page(job=court_names) as page:
+            collector = TimeslotCollector()
+            collector.attach(page)
+
+            for target_date in target_dates:
+                if self.is_cancelled():
+                    print("[YClients] Парсер отменён — прекращаем обход дат")
+                    break
+
+                print(
+                    f"[YClients] === Обработка даты {target_date} "
+                    f"для группы {court_names} ==="
+                )
+
+                print(f"[YClients] Открываем URL виджета: {url}")
+                started = time.perf_counter()
+                self._open_widget(page, url)
+
+                selected = self._select_date_on_calendar(page, target_date, base_date)
+                loaded = time.perf_counter()
+
+                starts_by_staff = self._starts_by_staff(
+                    page, collector, target_date, staff_ids, selected
+                )
+                record_page(
+                    self.parser_name, [cfg.court_name for cfg in group], target_date,
+                    loaded - started, time.perf_counter() - loaded,
+                    sum(len(starts) for starts in (starts_by_staff or {}).values()),
+                )
+                if starts_by_staff is None:
+                    continue
+
+                for cfg in group:
+                    if cfg.staff_id not in starts_by_staff:
+                        continue
+                    starts = starts_by_staff[cfg.staff_id]
+                    print(
+                        f"[YClients] {cfg.court_name} / {target_date}: "
+                        f"слотов {len(starts)}"
+                    )
+                    all_slots.extend(self._build_slots(cfg, starts))
+                    self._mark_fetched(cfg.club_name, cfg.court_name, target_date)
 
         return all_slots
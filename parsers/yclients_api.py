@@ -0,0 +1,309 @@
+"""
+Парсер YClients через JSON API search-timeslots (без отрисовки SPA).
+
+Запросы идут по очереди через один requests.Session (keep-alive).
+Если API отказывает (404/401/403/429, не-JSON или ответ без списка data),
+один раз поднимаем браузер, открываем виджет и снимаем с его собственного
+запроса к API заголовки и cookies — дальше они переиспользуются. Если и
+с ними API отказывает, откатываемся на Playwright-парсер.
+"""
+
+from dataclasses import dataclass, field
+from datetime import timedelta, date
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from parsers.base import BaseParser, SlotBatch, SlotData
+from parsers.browser_pool import BrowserPool
+from parsers.catalog import CourtConfig, catalog_courts
+from parsers.yclients import (
+    MYPROTENNIS_LOCATION_ID,
+    YClientsMyProTennisCourtParser,
+    is_timeslots_payload,
+    parse_timeslots_payload,
+)
+from services.metrics import PARSER_ERRORS, PARSER_STEP, record_page
+
+
+YCLIENTS_API_URL = (
+    "https://platform.yclients.com/api/v1/b2c/booking/"
+    "availability/search-timeslots"
+)
+
+# Статусы, которые считаем отказом API (защита, нет доступа, лимиты)
+REFUSED_STATUSES = {401, 403, 404, 429}
+
+# Заголовки браузера, которые нельзя/бессмысленно переносить в requests
+_SKIP_HEADERS = {"host", "content-length", "cookie", "connection", "accept-encoding"}
+
+
+class YClientsApiRefused(Exception):
+    """API YClients отказал в ответе — нужен bootstrap или fallback."""
+
+
+@dataclass
+class ApiBootstrap:
+    """
+    Заголовки и cookies, снятые с запроса самого виджета к API.
+    """
+    headers: Dict[str, str] = field(default_factory=dict)
+    cookies: List[Dict[str, Any]] = field(default_factory=list)
+    captured_at: float = field(default_factory=time.time)
+
+
+# Кэш bootstrap-данных на процесс: ключ — URL виджета
+_BOOTSTRAP_CACHE: Dict[str, ApiBootstrap] = {}
+
+
+class YClientsApiParser(BaseParser):
+    """
+    Парсер слотов MyProtennis.ru через API YClients (один JSON на дату и корт).
+    Корты — из каталога клубов; location_id запроса берётся из локации корта.
+    """
+
+    source_name = YClientsMyProTennisCourtParser.source_name
+    # При отказе API откатывается на браузер
+    run_in_process = True
+
+    def __init__(
+        self,
+        days_ahead: int = 2,
+        api_url: str = YCLIENTS_API_URL,
+        location_id: int = MYPROTENNIS_LOCATION_ID,
+        courts: Optional[List[CourtConfig]] = None,
+        headless: bool = True,
+        timeout: float = 15,
+        bootstrap: bool = True,
+        bootstrap_ttl_seconds: int = 30 * 60,
+        fallback: bool = True,
+        dates: Optional[List[date]] = None,
+    ):
+        """
+        :param api_url: адрес search-timeslots (для локального стаба — свой).
+        :param location_id: location_id для кортов, у которых локация не указана.
+        :param courts: корты (None — все корты каталога клубов).
+        :param bootstrap: разрешить разовый заход браузером за заголовками
+                          и cookies, если API отказывает "голому" запросу.
+        :param bootstrap_ttl_seconds: сколько переиспользуем снятые данные.
+        :param fallback: при отказе API — собрать слоты Playwright-парсером.
+        :param dates: запросить только эти даты (None — весь горизонт days_ahead).
+        """
+        self.days_ahead = days_ahead
+        self.dates = list(dates) if dates is not None else None
+        self.api_url = api_url
+        self.location_id = location_id
+        self.courts: List[CourtConfig] = (
+            list(courts) if courts is not None else catalog_courts()
+        )
+        self.headless = headless
+        self.timeout = timeout
+        self.bootstrap = bootstrap
+        self.bootstrap_ttl_seconds = bootstrap_ttl_seconds
+        self.fallback = fallback
+
+        # Сколько HTTP-запросов к API сделали за последний прогон
+        self.last_request_count = 0
+
+    # ---------- Публичный метод парсера ---------- #
+
+    def fetch_slots(self) -> SlotBatch:
+        print("[YClientsAPI] Старт YClientsApiParser")
+        self.last_request_count = 0
+        self._reset_fetched()
+
+        try:
+            slots = self._fetch_via_api()
+        except YClientsApiRefused as exc:
+            print(f"[YClientsAPI] API отказал: {exc}")
+            PARSER_ERRORS.inc(parser=self.parser_name, stage="api")
+            if not self.fallback:
+                raise
+            print("[YClientsAPI] Переходим на Playwright-парсер")
+            parser = YClientsMyProTennisCourtParser(
+                headless=self.headless, days_ahead=self.days_ahead, dates=self.dates
+            )
+            parser.courts = self.courts
+            # Отмена от апдейтера должна доходить и до fallback-парсера
+            parser._cancel = self._cancel_event()
+            slots = parser.fetch_slots()
+            # Собранное браузером — теперь и наш результат
+            self.__dict__["_fetched"] = parser.fetched_scope()
+            return slots
+
+        print(
+            f"[YClientsAPI] Итого слотов: {len(slots)}, "
+            f"запросов к API: {self.last_request_count}"
+        )
+        return slots
+
+    # ---------- HTTP ---------- #
+
+    def _make_session(self) -> requests.Session:
+        # Запросы идут строго по очереди: одного keep-alive соединения
+        # сессии по умолчанию хватает
+        session = requests.Session()
+        session.headers.update({"Accept": "application/json"})
+
+        cached = self._cached_bootstrap()
+        if cached is not None:
+            self._apply_bootstrap(session, cached)
+        return session
+
+    def _fetch_via_api(self) -> SlotBatch:
+        all_slots = SlotBatch()
+        if not self.courts:
+            print("[YClientsAPI] Кортов нет — запрашивать нечего")
+            return all_slots
+
+        target_dates = self.target_dates()
+
+        with self._make_session() as session:
+            for target_date in target_dates:
+                if self.is_cancelled():
+                    print("[YClientsAPI] Парсер отменён — прекращаем обход дат")
+                    break
+
+                for cfg in self.courts:
+                    started = time.perf_counter()
+                    payload = self._request_timeslots(session, target_date, cfg)
+                    loaded = time.perf_counter()
+                    starts = parse_timeslots_payload(payload, target_date)
+                    record_page(
+                        self.parser_name, [cfg.court_name], target_date,
+                        loaded - started, time.perf_counter() - loaded, len(starts),
+                    )
+                    print(
+                        f"[YClientsAPI] {cfg.court_name} / {target_date}: "
+                        f"слотов {len(starts)}"
+                    )
+                    all_slots.extend(
+                        SlotData(
+                            club=cfg.club_name,
+                            court=cfg.court_name,
+                            start=start_dt,
+                            end=start_dt + timedelta(minutes=cfg.duration_minutes),
+                            duration_minutes=cfg.duration_minutes,
+                            status="free",
+                            source=self.source_name,
+                        )
+                        for start_dt in starts
+                    )
+                    self._mark_fetched(cfg.club_name, cfg.court_name, target_date)
+
+        return all_slots
+
+    def court_keys(self) -> List[Tuple[str, str]]:
+        return [(cfg.club_name, cfg.court_name) for cfg in self.courts]
+
+    def _build_payload(self, target_date: date, cfg: CourtConfig) -> Dict[str, Any]:
+        return {
+            "context": {"location_id": cfg.location_id or self.location_id},
+            "filter": {
+                "date": target_date.isoformat(),
+                "records": [
+                    {
+                        "staff_id": cfg.staff_id,
+                        "attendance_service_items": [],
+                    }
+                ],
+            },
+        }
+
+    def _post(self, session: requests.Session, payload: Dict[str, Any]) -> Any:
+        """
+        Один POST к API. Бросает YClientsApiRefused, если ответ
+        не похож на нормальный JSON search-timeslots ({"data": [...]}).
+        """
+        self.last_request_count += 1
+        with PARSER_STEP.time(parser=self.parser_name, step="api_request"):
+            resp = session.post(self.api_url, json=payload, timeout=self.timeout)
+
+        if resp.status_code in REFUSED_STATUSES:
+            raise YClientsApiRefused(f"HTTP {resp.status_code}")
+        resp.raise_for_status()
+
+        try:
+            payload = resp.json()
+        except ValueError as exc:
+            raise YClientsApiRefused("ответ не JSON") from exc
+        if not is_timeslots_payload(payload):
+            # Пустой разбор удалил бы все слоты корта на дату при сверке
+            raise YClientsApiRefused("неожиданный формат ответа (нет списка data)")
+        return payload
+
+    def _request_timeslots(
+        self, session: requests.Session, target_date: date, cfg: CourtConfig
+    ) -> Any:
+        payload = self._build_payload(target_date, cfg)
+        try:
+            return self._post(session, payload)
+        except YClientsApiRefused:
+            if not self.bootstrap or self._cached_bootstrap() is not None:
+                raise
+
+        # Первый отказ без снятых заголовков — один раз идём браузером
+        self._apply_bootstrap(session, self._bootstrap_from_browser())
+        return self._post(session, payload)
+
+    # ---------- Bootstrap через браузер ---------- #
+
+    def _widget_url(self) -> str:
+        return self.courts[0].url
+
+    def _cached_bootstrap(self) -> Optional[ApiBootstrap]:
+        cached = _BOOTSTRAP_CACHE.get(self._widget_url())
+        if cached is None:
+            return None
+        if time.time() - cached.captured_at > self.bootstrap_ttl_seconds:
+            _BOOTSTRAP_CACHE.pop(self._widget_url(), None)
+            return None
+        return cached
+
+    @staticmethod
+    def _apply_bootstrap(session: requests.Session, data: ApiBootstrap) -> None:
+        session.headers.update(data.headers)
+        for cookie in data.cookies:
+            session.cookies.set(
+                cookie["name"],
+                cookie["value"],
+                domain=cookie.get("domain"),
+                path=cookie.get("path", "/"),
+            )
+
+    def _bootstrap_from_browser(self) -> ApiBootstrap:
+        """
+        Открывает виджет в браузере и снимает заголовки первого запроса
+        виджета к search-timeslots плюс cookies контекста.
+        """
+        print("[YClientsAPI] Bootstrap: снимаем заголовки и cookies браузером")
+        started = time.perf_counter()
+
+        with BrowserPool(headless=self.headless) as pool:
+            with pool.page(job="api_bootstrap") as page:
+                try:
+                    with page.expect_request(
+                        lambda r: "search-timeslots" in r.url, timeout=30_000
+                    ) as request_info:
+                        page.goto(self._widget_url(), timeout=30_000)
+                except Exception as exc:  # noqa: BLE001
+                    raise YClientsApiRefused(
+                        f"виджет не обратился к API: {exc}"
+                    ) from exc
+
+                headers = {
+                    name: value
+                    for name, value in request_info.value.all_headers().items()
+                    if not name.startswith(":") and name.lower() not in _SKIP_HEADERS
+                }
+                cookies = page.context.cookies()
+
+        data = ApiBootstrap(headers=headers, cookies=cookies)
+        _BOOTSTRAP_CACHE[self._widget_url()] = data
+        print(
+            f"[YClientsAPI] Bootstrap завершён за "
+            f"{time.perf_counter() - started:.2f} с "
+            f"(заголовков: {len(headers)}, cookies: {len(cookies)})"
+        )
+        return data
@@ -0,0 +1,412 @@
+"""
+Асинхронный движок YClients-парсера на playwright.async_api.
+
+Каждая задача — (URL виджета, дата) для группы кортов с этим URL.
+Задачи выполняются параллельно в одном браузере: не больше
+`concurrency` открытых страниц одновременно (семафор — чтобы не
+перегружать сайт), у каждой задачи свои повторы при ошибках.
+"""
+
+import asyncio
+from datetime import date
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from playwright.async_api import (
+    async_playwright,
+    TimeoutError as PlaywrightTimeoutError,
+)
+
+from parsers.base import SlotBatch, SlotData
+from parsers.browser_pool import BLOCKED_RESOURCE_TYPES, BLOCKED_URL_PARTS
+from parsers.catalog import CourtConfig
+from parsers.yclients import (
+    DAY_SELECTOR,
+    MONTH_ARROW_JS,
+    SELECT_DAY_JS,
+    STAFF_TIMESLOTS_JS,
+    TimeslotCollector,
+    WaitConfig,
+    YClientsMyProTennisCourtParser,
+    _SkipWait,
+)
+from services.metrics import PARSER_ERRORS, record_page
+
+
+class AsyncTimeslotCollector(TimeslotCollector):
+    """TimeslotCollector для async-страниц: JSON ответа читаем через await."""
+
+    async def _adrain(self) -> None:
+        pending, self._pending = self._pending, []
+        for response in pending:
+            try:
+                payload = await response.json()
+            except Exception as e:  # noqa: BLE001
+                print(f"[YClientsAsync] Не удалось разобрать ответ timeslots: {e}")
+                continue
+            self._remember(response.request)
+            self._store(response.request.post_data_json, payload)
+
+    async def astarts_by_staff(
+        self, target_date: date, staff_ids: List[int]
+    ) -> Optional[Dict[int, List[Any]]]:
+        await self._adrain()
+        return self._lookup(target_date, staff_ids)
+
+
+class AsyncYClientsMyProTennisCourtParser(YClientsMyProTennisCourtParser):
+    """
+    Тот же парсер MyProtennis.ru, но (корт, дата) обходятся параллельно.
+
+    Синхронный fetch_slots() оставлен для совместимости с апдейтером:
+    он просто запускает afetch_slots() в собственном event loop.
+    """
+
+    def __init__(
+        self,
+        headless: bool = True,
+        days_ahead: int = 2,
+        concurrency: int = 4,
+        retries: int = 2,
+        retry_backoff_seconds: float = 1.0,
+        grouped: bool = True,
+        waits: Optional[WaitConfig] = None,
+        dates: Optional[List[date]] = None,
+        courts: Optional[List[CourtConfig]] = None,
+        har_mode: Optional[str] = None,
+        har_path: Optional[str] = None,
+    ):
+        """
+        :param concurrency: сколько страниц держать открытыми одновременно.
+        :param retries: сколько раз повторять задачу (URL, дата) при ошибке.
+        :param retry_backoff_seconds: пауза перед повтором (растёт линейно).
+        """
+        super().__init__(
+            headless=headless,
+            days_ahead=days_ahead,
+            grouped=grouped,
+            waits=waits,
+            dates=dates,
+            courts=courts,
+            har_mode=har_mode,
+            har_path=har_path,
+        )
+        self.concurrency = max(1, concurrency)
+        self.retries = retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+
+        self._blocked_requests = 0
+        self._failed_jobs = 0
+
+    # ---------- Публичные методы парсера ---------- #
+
+    def fetch_slots(self) -> SlotBatch:
+        return asyncio.run(self.afetch_slots())
+
+    async def afetch_slots(self) -> SlotBatch:
+        print(
+            f"[YClientsAsync] Старт, параллельных страниц: {self.concurrency}"
+        )
+
+        self.last_step_timings = []
+        self._reset_fetched_counters()
+        self._blocked_requests = 0
+        self._failed_jobs = 0
+        self._reset_fetched()
+        started_at = self._start_har()
+        har_options = self._har_pool_options()
+
+        target_dates = self.target_dates()
+        # Виджет всегда открывается на текущем месяце — от него и листаем
+        base_date = self.today()
+
+        if self.grouped:
+            groups = list(self._group_courts_by_url().items())
+        else:
+            groups = [(cfg.url, [cfg]) for cfg in self.courts]
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started_run = time.perf_counter()
+
+        async with async_playwright() as p:
+            started = time.perf_counter()
+            browser = await p.chromium.launch(headless=self.headless)
+            launch_seconds = time.perf_counter() - started
+
+            try:
+                context_options: Dict[str, Any] = {}
+                if "record_har_path" in har_options:
+                    context_options["record_har_path"] = har_options["record_har_path"]
+                    context_options["record_har_content"] = "embed"
+                context = await browser.new_context(**context_options)
+                await context.route("**/*", self._aroute_request)
+                if "replay_har_path" in har_options:
+                    await context.route_from_har(
+                        har_options["replay_har_path"], not_found="abort"
+                    )
+                    await context.clock.install(time=har_options["clock_time"])
+
+                results = await asyncio.gather(
+                    *(
+                        self._arun_job(
+                            context, semaphore, url, group, target_date, base_date
+                        )
+                        for url, group in groups
+                        for target_date in target_dates
+                    )
+                )
+                # HAR дописывается при закрытии контекста
+                await context.close()
+            finally:
+                await browser.close()
+        self._finish_har(started_at)
+
+        all_slots = SlotBatch(slot for chunk in results for slot in chunk)
+
+        self.last_pool_stats = {
+            "launches": 1,
+            "launch_seconds": round(launch_seconds, 3),
+            "jobs": len(results),
+            "blocked_requests": self._blocked_requests,
+            "failed_jobs": self._failed_jobs,
+            "run_seconds": round(time.perf_counter() - started_run, 3),
+        }
+
+        print(
+            f"[YClientsAsync] Задач: {len(results)}, неудачных: {self._failed_jobs}, "
+            f"за {self.last_pool_stats['run_seconds']} с"
+        )
+        print(
+            f"[YClientsAsync] Дат по ответам API: {self._xhr_hits}, "
+            f"не подтверждено (старые слоты оставлены): {self._unconfirmed_dates()}, "
+            f"кортов без своего ответа API: {self._missing_staff}"
+        )
+        print(f"[YClientsAsync] Итого слотов по всем кортам: {len(all_slots)}")
+        return all_slots
+
+    # ---------- Задачи ---------- #
+
+    async def _aroute_request(self, route) -> None:
+        request = route.request
+        if request.resource_type in BLOCKED_RESOURCE_TYPES or any(
+            part in request.url for part in BLOCKED_URL_PARTS
+        ):
+            self._blocked_requests += 1
+            await route.abort()
+            return
+        await route.continue_()
+
+    async def _arun_job(
+        self,
+        context,
+        semaphore: asyncio.Semaphore,
+        url: str,
+        group: List[CourtConfig],
+        target_date: date,
+        base_date: date,
+    ) -> List[SlotData]:
+        """
+        Одна задача (URL, дата) со своими повторами.
+        Ошибки не пробрасываем — остальные задачи должны доработать.
+        """
+        court_names = ", ".join(c.court_name for c in group)
+
+        async with semaphore:
+            for attempt in range(self.retries + 1):
+                if self.is_cancelled():
+                    return []
+
+                page = await context.new_page()
+                collector = AsyncTimeslotCollector()
+                collector.attach(page)
+                try:
+                    return await self._acollect_job(
+                        page, collector, url, group, target_date, base_date
+                    )
+                except Exception as e:  # noqa: BLE001
+                    print(
+                        f"[YClientsAsync] {court_names} / {target_date}: "
+                        f"попытка {attempt + 1} не удалась — {e}"
+                    )
+                    if attempt < self.retries:
+                        await asyncio.sleep(
+                            self.retry_backoff_seconds * (attempt + 1)
+                        )
+                finally:
+                    await page.close()
+
+        self._failed_jobs += 1
+        PARSER_ERRORS.inc(parser=self.parser_name, stage="job")
+        return []
+
+    async def _acollect_job(
+        self,
+        page,
+        collector: AsyncTimeslotCollector,
+        url: str,
+        group: List[CourtConfig],
+        target_date: date,
+        base_date: date,
+    ) -> List[SlotData]:
+        started = time.perf_counter()
+        await self._aopen_widget(page, url)
+        selected = await self._aselect_date_on_calendar(page, target_date, base_date)
+        loaded = time.perf_counter()
+
+        staff_ids = [cfg.staff_id for cfg in group]
+        starts_by_staff = None
+        if not selected:
+            self._skip_unconfirmed(target_date, "дата в календаре не выбрана")
+        else:
+            starts_by_staff = await collector.astarts_by_staff(target_date, staff_ids)
+            if starts_by_staff is None:
+                # Как и в sync-движке: дату не отмечаем, прежние слоты остаются
+                self._skip_unconfirmed(
+                    target_date, "ответ API не перехвачен", await page.content()
+                )
+            else:
+                missing = [sid for sid in staff_ids if sid not in starts_by_staff]
+                if missing:
+                    await self._arequest_staff_timeslots(
+                        page, collector, target_date, missing
+                    )
+                    starts_by_staff = (
+                        await collector.astarts_by_staff(target_date, staff_ids) or {}
+                    )
+                self._xhr_hits += 1
+                self._note_missing_staff(target_date, staff_ids, starts_by_staff)
+        record_page(
+            self.parser_name, [cfg.court_name for cfg in group], target_date,
+            loaded - started, time.perf_counter() - loaded,
+            sum(len(starts) for starts in (starts_by_staff or {}).values()),
+        )
+        if starts_by_staff is None:
+            return []
+
+        slots: List[SlotData] = []
+        for cfg in group:
+            if cfg.staff_id not in starts_by_staff:
+                continue
+            starts = starts_by_staff[cfg.staff_id]
+            print(
+                f"[YClientsAsync] {cfg.court_name} / {target_date}: "
+                f"слотов {len(starts)}"
+            )
+            slots.extend(self._build_slots(cfg, starts))
+            self._mark_fetched(cfg.club_name, cfg.court_name, target_date)
+        return slots
+
+    async def _arequest_staff_timeslots(
+        self,
+        page,
+        collector: AsyncTimeslotCollector,
+        target_date: date,
+        staff_ids: List[int],
+    ) -> None:
+        """Async-вариант _request_staff_timeslots."""
+        request = collector.staff_requests(target_date, staff_ids)
+        if request is None:
+            return
+        url, headers, bodies = request
+
+        started = time.perf_counter()
+        try:
+            payloads = await page.evaluate(
+                STAFF_TIMESLOTS_JS, {"url": url, "headers": headers, "bodies": bodies}
+            )
+        except Exception as e:  # noqa: BLE001
+            self._record_step("staff_timeslots", started, ok=False)
+            print(
+                f"[YClientsAsync] Запрос слотов по кортам на {target_date} "
+                f"не удался: {e}"
+            )
+            return
+        self._store_staff_payloads(collector, bodies, payloads)
+        self._record_step("staff_timeslots", started)
+
+    # ---------- Работа со страницей ---------- #
+
+    async def _aopen_widget(self, page, url: str) -> None:
+        started = time.perf_counter()
+        await page.goto(
+            url,
+            timeout=self.waits.goto_timeout_ms,
+            wait_until="domcontentloaded",
+        )
+        self._record_step("goto", started)
+
+        started = time.perf_counter()
+        try:
+            await page.wait_for_selector(
+                DAY_SELECTOR, state="attached", timeout=self.waits.ready_timeout_ms
+            )
+            self._record_step("widget_ready", started)
+        except PlaywrightTimeoutError:
+            self._record_step("widget_ready", started, ok=False)
+
+    async def _arun_and_wait_response(
+        self,
+        page,
+        step: str,
+        action: Callable[[], Awaitable[Any]],
+        should_wait: Callable[[Any], bool],
+        predicate: Callable[[Any], bool],
+        timeout_ms: int,
+    ) -> Any:
+        """Async-вариант _run_and_wait_response."""
+        started = time.perf_counter()
+        result = None
+        try:
+            async with page.expect_response(predicate, timeout=timeout_ms):
+                result = await action()
+                if not should_wait(result):
+                    raise _SkipWait()
+        except _SkipWait:
+            self._record_step(step, started, ok=False)
+            return result
+        except PlaywrightTimeoutError:
+            self._record_step(step, started, ok=False)
+            return result
+
+        if self.waits.settle_ms:
+            await page.wait_for_timeout(self.waits.settle_ms)
+        self._record_step(step, started)
+        return result
+
+    async def _aselect_date_on_calendar(
+        self, page, target_date: date, base_date: date
+    ) -> bool:
+        """Async-вариант _select_date_on_calendar (True — день кликнут)."""
+        month_diff = (target_date.year - base_date.year) * 12 + (
+            target_date.month - base_date.month
+        )
+        direction = "next" if month_diff > 0 else "prev"
+
+        for _ in range(abs(month_diff)):
+            result = await self._arun_and_wait_response(
+                page,
+                "month_switch",
+                action=lambda: page.evaluate(MONTH_ARROW_JS, direction),
+                should_wait=lambda r: isinstance(r, dict) and bool(r.get("ok")),
+                predicate=self._is_availability_response,
+                timeout_ms=self.waits.month_switch_timeout_ms,
+            )
+            if not (isinstance(result, dict) and result.get("ok")):
+                print(
+                    f"[YClientsAsync] Не удалось кликнуть стрелку месяца "
+                    f"({direction}) для {target_date}"
+                )
+                return False
+
+        day_str = str(target_date.day)
+        ok = await self._arun_and_wait_response(
+            page,
+            "date_select",
+            action=lambda: page.evaluate(SELECT_DAY_JS, day_str),
+            should_wait=bool,
+            predicate=self._is_timeslots_response,
+            timeout_ms=self.waits.date_select_timeout_ms,
+        )
+        if not ok:
+            print(f"[YClientsAsync] Не нашли день {day_str} в календаре")
+        return bool(ok)
@@ -1,9 +1,29 @@
+import os
+
 from app import create_app
 
-# Создаём экземпляр приложения
-app = create_app()
+# Приложение создаётся только по требованию. Воркеры парсеров
+# (multiprocessing spawn) заново импортируют главный модуль — при
+# `python run.py` это этот файл — и не должны строить Flask-приложение
+# и вызывать db.create_all() в каждом процессе.
+_app = None
+
+
+def __getattr__(name):
+    # WSGI-сервер (gunicorn run:app) получает приложение отсюда
+    global _app
+    if name != "app":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if _app is None:
+        _app = create_app()
+    return _app
+
 
 if __name__ == "__main__":
-    # debug=True удобно на этапе разработки:
-    # автоматический перезапуск при изменениях + отладочная инфа
-    app.run(debug=True)
+    # Режим отладки удобен на этапе разработки:
+    # автоматический перезапуск при изменениях + отладочная инфа.
+    # Включаем его до create_app, чтобы app.debug был известен сразу
+    # (планировщик не должен стартовать в процессе-наблюдателе).
+    os.environ.setdefault("FLASK_DEBUG", "1")
+    app = create_app()
+    app.run()
@@ -0,0 +1,21 @@
+import time
+
+from app import create_app
+from services.jobs import refresh_jobs
+from services.scheduler import SlotScheduler
+
+# Отдельный процесс для периодического обновления слотов:
+# веб-воркеры при этом вообще не занимаются парсингом.
+# Приложение создаём только в главном процессе: воркеры парсеров
+# (multiprocessing spawn) заново импортируют этот модуль.
+if __name__ == "__main__":
+    app = create_app()
+    scheduler = app.extensions.get("slot_scheduler") or SlotScheduler.from_app(app)
+    scheduler.start(app)
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        print("[Scheduler] Остановка...")
+        scheduler.stop()
+        refresh_jobs.shutdown(wait=True)
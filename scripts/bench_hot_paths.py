@@ -0,0 +1,331 @@
+"""
+Бенчмарк горячих путей обновления и выдачи слотов с сохранением базовой линии.
+
+Что меряем (на синтетическом корпусе клубы × корты × дни):
+- save_slots — _save_slots всего корпуса в пустую таблицу (+ коммит);
+- sync_unchanged / sync_changed — _sync_source, когда парсер вернул то же
+  самое / то же, но с 10% поменявшихся статусов (+ коммит);
+- api_slots[sql|index] <фильтры> — GET /api/slots для каждой комбинации
+  фильтров из check_query_plans (кэш ответов выключен), через SQL и
+  через индекс в памяти;
+- api_free_blocks — GET /api/free_blocks (2 часа подряд вечером);
+- to_dict / row_to_dict — сериализация всех слотов корпуса;
+- extract_unique_times[<файл>] — разбор сохранённых HTML виджета
+  (scripts/fixtures/yclients/*.html, результат сверяется с expected_times.json).
+
+Каждый замер — минимум из --repeat повторов. Результат можно сохранить
+как базовую линию (--save-baseline) и потом сравнивать с ней: замер,
+ставший медленнее больше чем на --threshold, отмечается как регрессия
+(с --check код выхода 1). Числа зависят от машины — базовую линию
+снимайте на той же машине, где сравниваете (поэтому
+scripts/bench_baseline.json в .gitignore).
+
+Запуск:
+
+    python scripts/bench_hot_paths.py --save-baseline
+    python scripts/bench_hot_paths.py --check
+    python scripts/bench_hot_paths.py --clubs 20 --courts 6 --days 28 --only api_slots
+"""
+
+import argparse
+from dataclasses import replace
+from datetime import datetime, timedelta
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlencode
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(SCRIPTS_DIR))
+
+from sqlalchemy import delete  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.models import Slot  # noqa: E402
+from app.slot_index import slot_index  # noqa: E402
+from app.slot_listing import DEFAULT_FIELDS, _select_columns, row_to_dict  # noqa: E402
+from config import Config  # noqa: E402
+from parsers.base import SlotBatch, SlotData  # noqa: E402
+from scripts.check_query_plans import filter_combinations  # noqa: E402
+from services.updater import _save_slots, _sync_source  # noqa: E402
+
+FIXTURES_DIR = os.path.join(SCRIPTS_DIR, "fixtures", "yclients")
+DEFAULT_BASELINE = os.path.join(SCRIPTS_DIR, "bench_baseline.json")
+
+# Корпус начинается с той же даты, что и фильтры в check_query_plans
+CORPUS_START = datetime(2030, 1, 1)
+SOURCE = "bench"
+# Первый клуб корпуса — тот, по которому фильтрует check_query_plans
+CLUB_NAMES = ("MyProtennis.ru",)
+
+
+def make_corpus(
+    clubs: int, courts: int, days: int, seed: int = 0
+) -> SlotBatch:
+    """
+    Синтетические слоты: каждый корт с 07:00 до 23:00, шаг 60 минут
+    (у каждого второго клуба — 90-минутные слоты), ~40% заняты.
+    Генератор детерминированный: одинаковые параметры — одинаковый корпус.
+    """
+    rng = random.Random(seed)
+    batch = SlotBatch()
+    for day in range(days):
+        day_start = CORPUS_START + timedelta(days=day, hours=7)
+        for club in range(clubs):
+            duration = 90 if club % 2 else 60
+            for court in range(courts):
+                start = day_start
+                while start + timedelta(minutes=duration) <= day_start + timedelta(hours=16):
+                    batch.append(
+                        SlotData(
+                            club=CLUB_NAMES[0] if club == 0 else f"Club {club}",
+                            court=f"Корт {court + 1}",
+                            start=start,
+                            end=start + timedelta(minutes=duration),
+                            duration_minutes=duration,
+                            status="busy" if rng.random() < 0.4 else "free",
+                            source=SOURCE,
+                        )
+                    )
+                    start += timedelta(minutes=duration)
+    return batch
+
+
+def with_changed_statuses(corpus: SlotBatch, share: float, seed: int = 1) -> SlotBatch:
+    rng = random.Random(seed)
+    changed = SlotBatch()
+    for slot in corpus:
+        if rng.random() < share:
+            slot = replace(slot, status="free" if slot.status == "busy" else "busy")
+        changed.append(slot)
+    return changed
+
+
+def measure(
+    fn: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None
+) -> float:
+    """Минимальное время fn() из repeat повторов (setup не замеряется)."""
+    best = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+# ---------- Группы замеров ---------- #
+
+def bench_db(corpus: SlotBatch, repeat: int) -> Dict[str, float]:
+    results: Dict[str, float] = {}
+
+    def clear():
+        db.session.execute(delete(Slot))
+        db.session.commit()
+
+    def reset():
+        clear()
+        _save_slots(corpus)
+        db.session.commit()
+
+    def save():
+        _save_slots(corpus)
+        db.session.commit()
+
+    def sync(batch):
+        def run():
+            _sync_source(SOURCE, batch)
+            db.session.commit()
+        return run
+
+    results["save_slots"] = measure(save, repeat, setup=clear)
+    results["sync_unchanged"] = measure(sync(corpus), repeat, setup=reset)
+    results["sync_changed"] = measure(
+        sync(with_changed_statuses(corpus, 0.1)), repeat, setup=reset
+    )
+    reset()
+    return results
+
+
+def bench_api(app, repeat: int) -> Dict[str, float]:
+    results: Dict[str, float] = {}
+    client = app.test_client()
+
+    for mode in ("sql", "index"):
+        slot_index.enabled = mode == "index"
+        if slot_index.enabled:
+            slot_index.rebuild()
+        for args in filter_combinations():
+            label = ",".join(f"{k}={v}" for k, v in args.items()) or "-"
+            url = "/api/slots?" + urlencode(args)
+
+            def get(url=url):
+                response = client.get(url)
+                assert response.status_code == 200, response.status_code
+
+            results[f"api_slots[{mode}] {label}"] = measure(get, repeat)
+
+        url = "/api/free_blocks?" + urlencode(
+            {"date": "2030-01-03", "time_from": "18:00", "time_to": "23:00",
+             "min_duration": "120"}
+        )
+        results[f"api_free_blocks[{mode}]"] = measure(lambda: client.get(url), repeat)
+
+    slot_index.enabled = True
+    return results
+
+
+def bench_serialization(repeat: int) -> Dict[str, float]:
+    slots = Slot.query.order_by(Slot.start_datetime, Slot.id).all()
+    rows = db.session.execute(_select_columns(DEFAULT_FIELDS)).all()
+    return {
+        "to_dict": measure(lambda: [s.to_dict() for s in slots], repeat),
+        "row_to_dict": measure(
+            lambda: [row_to_dict(r, DEFAULT_FIELDS) for r in rows], repeat
+        ),
+    }
+
+
+def bench_extract_times(repeat: int) -> Dict[str, float]:
+    from parsers.yclients import YClientsMyProTennisCourtParser
+
+    parser = YClientsMyProTennisCourtParser(courts=[])
+    with open(os.path.join(FIXTURES_DIR, "expected_times.json"), encoding="utf-8") as f:
+        expected: Dict[str, List[str]] = json.load(f)
+
+    results: Dict[str, float] = {}
+    for name in sorted(expected):
+        with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+            html = f.read()
+        # Ускорение не должно менять результат разбора
+        got = parser._extract_unique_times(html)
+        if got != expected[name]:
+            raise AssertionError(f"{name}: {got} != {expected[name]}")
+
+        # Одна страница разбирается за микросекунды — меряем пачку из 100
+        results[f"extract_unique_times[{name}]"] = measure(
+            lambda: [parser._extract_unique_times(html) for _ in range(100)], repeat
+        )
+    return results
+
+
+# ---------- Базовая линия ---------- #
+
+def load_baseline(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, meta: Dict[str, Any], results: Dict[str, float]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, ensure_ascii=False, indent=2)
+    print(f"\nБазовая линия сохранена: {path}")
+
+
+def report(
+    results: Dict[str, float],
+    baseline: Optional[Dict[str, Any]],
+    threshold: float,
+    noise_seconds: float,
+) -> List[str]:
+    """Печатает таблицу; возвращает имена замеров с регрессией."""
+    base = (baseline or {}).get("results", {})
+    regressions: List[str] = []
+
+    width = max(len(name) for name in results)
+    print(f"{'замер':<{width}} | {'мс':>9} | {'база, мс':>9} | {'Δ':>7}")
+    print("-" * (width + 34))
+    for name, seconds in results.items():
+        line = f"{name:<{width}} | {seconds * 1000:>9.3f}"
+        if name in base:
+            before = base[name]
+            delta = (seconds - before) / before if before else 0.0
+            mark = ""
+            if delta > threshold and seconds - before > noise_seconds:
+                regressions.append(name)
+                mark = "  !! регрессия"
+            line += f" | {before * 1000:>9.3f} | {delta:>+6.0%}{mark}"
+        print(line)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарк горячих путей")
+    parser.add_argument("--clubs", type=int, default=10)
+    parser.add_argument("--courts", type=int, default=4)
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help="только замеры, в имени которых есть подстрока")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true",
+                        help="код выхода 1, если есть регрессии")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="допустимое замедление относительно базы (0.25 = 25%%)")
+    parser.add_argument("--noise-ms", type=float, default=0.2,
+                        help="разница меньше этой не считается регрессией")
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.clubs, args.courts, args.days)
+    meta = {
+        "clubs": args.clubs,
+        "courts": args.courts,
+        "days": args.days,
+        "slots": len(corpus),
+        "repeat": args.repeat,
+        "python": platform.python_version(),
+        "machine": platform.node(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    print(f"Корпус: {args.clubs} клубов × {args.courts} кортов × {args.days} дней = "
+          f"{len(corpus)} слотов\n")
+
+    baseline = load_baseline(args.baseline)
+    if baseline is not None:
+        base_meta = baseline.get("meta", {})
+        if base_meta.get("slots") != len(corpus):
+            print(f"Внимание: база снята на другом корпусе ({base_meta.get('slots')} слотов)")
+
+    results: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            SLOTS_CACHE_MAX_ENTRIES = 0
+            SLOT_INDEX_MAX_AGE = 3600
+            SCHEDULER_ENABLED = False
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            results.update(bench_db(corpus, args.repeat))
+            results.update(bench_api(app, args.repeat))
+            results.update(bench_serialization(args.repeat))
+            db.session.remove()
+            db.engine.dispose()
+    results.update(bench_extract_times(args.repeat))
+
+    if args.only:
+        results = {k: v for k, v in results.items() if args.only in k}
+
+    regressions = report(results, baseline, args.threshold, args.noise_ms / 1000)
+
+    if args.save_baseline:
+        if args.only and baseline is not None:
+            # Частичный прогон обновляет только свои замеры
+            results = {**baseline.get("results", {}), **results}
+        save_baseline(args.baseline, meta, results)
+    elif regressions:
+        print(f"\nРегрессий: {len(regressions)} (порог {args.threshold:.0%})")
+
+    return 1 if args.check and regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Бенчмарк сохранения слотов: старый ORM-путь против пакетного Core insert().
+
+Запуск:
+
+    python scripts/bench_save_slots.py
+    python scripts/bench_save_slots.py --sizes 1000 10000 --batch-size 500
+
+Каждый замер идёт в отдельной временной SQLite-базе (файл, а не память,
+чтобы учитывать реальную запись на диск) и включает коммит.
+"""
+
+import argparse
+from datetime import datetime, timedelta
+import os
+import sys
+import tempfile
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db  # noqa: E402
+from app.models import Slot  # noqa: E402
+from config import Config  # noqa: E402
+from parsers.base import SlotData  # noqa: E402
+from services.updater import _save_slots  # noqa: E402
+
+
+def make_slots(count: int) -> List[SlotData]:
+    """Синтетические слоты: 10 клубов × 4 корта, по часу, подряд по дням."""
+    base = datetime.now().replace(hour=7, minute=0, second=0, microsecond=0)
+    slots = []
+    for i in range(count):
+        club = f"Club {i % 10}"
+        court = f"Корт {(i // 10) % 4 + 1}"
+        start = base + timedelta(hours=i // 40)
+        slots.append(
+            SlotData(
+                club=club,
+                court=court,
+                start=start,
+                end=start + timedelta(hours=1),
+                duration_minutes=60,
+                status="free" if i % 3 else "busy",
+                source="bench",
+            )
+        )
+    return slots
+
+
+def save_slots_orm(slots_data: List[SlotData]) -> None:
+    """Прежняя реализация _save_slots: один ORM-объект и add() на слот."""
+    for s in slots_data:
+        db.session.add(
+            Slot(
+                club=s.club,
+                court=s.court,
+                start_datetime=s.start,
+                end_datetime=s.end,
+                duration_minutes=s.duration_minutes,
+                status=s.status,
+                source=s.source,
+            )
+        )
+
+
+def run_once(save, slots: List[SlotData], **kwargs) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            started = time.perf_counter()
+            save(slots, **kwargs)
+            db.session.commit()
+            elapsed = time.perf_counter() - started
+
+            assert Slot.query.count() == len(slots)
+            db.session.remove()
+            db.engine.dispose()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк сохранения слотов")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000]
+    )
+    parser.add_argument("--batch-size", type=int, default=1_000)
+    args = parser.parse_args()
+
+    print(f"{'слотов':>8} | {'ORM, с':>8} | {'bulk, с':>8} | {'ускорение':>9}")
+    print("-" * 44)
+    for size in args.sizes:
+        slots = make_slots(size)
+        orm_seconds = run_once(save_slots_orm, slots)
+        bulk_seconds = run_once(_save_slots, slots, batch_size=args.batch_size)
+        print(
+            f"{size:>8} | {orm_seconds:>8.3f} | {bulk_seconds:>8.3f} | "
+            f"{orm_seconds / bulk_seconds:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
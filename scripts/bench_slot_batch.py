@@ -0,0 +1,73 @@
+"""
+Бенчмарк представления результата парсера: List[SlotData] против SlotBatch.
+
+Меряем память под слоты (tracemalloc), размер и время pickle в обе
+стороны (так слоты идут из воркера пула процессов в апдейтер).
+
+Запуск:
+
+    python scripts/bench_slot_batch.py
+    python scripts/bench_slot_batch.py --sizes 1000 100000
+"""
+
+import argparse
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsers.base import SlotBatch  # noqa: E402
+from scripts.bench_save_slots import make_slots  # noqa: E402
+
+
+def measure_memory(build: Callable[[], object]) -> Tuple[object, int]:
+    tracemalloc.start()
+    obj = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size
+
+
+def measure_pickle(obj) -> Tuple[int, float, float]:
+    started = time.perf_counter()
+    data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    dumps_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    pickle.loads(data)
+    loads_seconds = time.perf_counter() - started
+    return len(data), dumps_seconds, loads_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List[SlotData] vs SlotBatch")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    print(
+        f"{'слотов':>8} | {'вид':>9} | {'память, КБ':>10} | {'Б/слот':>6} | "
+        f"{'pickle, КБ':>10} | {'dumps, мс':>9} | {'loads, мс':>9}"
+    )
+    print("-" * 80)
+    for size in args.sizes:
+        source = make_slots(size)
+        variants = {
+            "list": lambda: make_slots(size),
+            "SlotBatch": lambda: SlotBatch(source),
+        }
+        for name, build in variants.items():
+            obj, memory = measure_memory(build)
+            pickled, dumps_seconds, loads_seconds = measure_pickle(obj)
+            print(
+                f"{size:>8} | {name:>9} | {memory / 1024:>10.0f} | "
+                f"{memory / size:>6.0f} | {pickled / 1024:>10.0f} | "
+                f"{dumps_seconds * 1000:>9.1f} | {loads_seconds * 1000:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Проверка планов запросов /api/slots на SQLite.
+
+Для каждой комбинации фильтров (дата/время, длительность, клуб,
+только свободные) строим тот же запрос, что и view (страница с
+keyset-курсором), и смотрим EXPLAIN QUERY PLAN. Запрос считается хорошим, если:
+- таблица slot читается через индекс (нет голого "SCAN slot");
+- сортировка по start_datetime не требует временного B-дерева.
+
+Запуск (код выхода 1, если хоть один план плохой):
+
+    python scripts/check_query_plans.py
+"""
+
+from datetime import datetime
+from itertools import product
+import os
+import sys
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.filters import SlotFilters  # noqa: E402
+from app.slot_listing import DEFAULT_FIELDS, build_page_statement  # noqa: E402
+from config import Config  # noqa: E402
+
+
+class PlanCheckConfig(Config):
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+
+
+FILTER_VARIANTS: Dict[str, List[Dict[str, str]]] = {
+    "date": [
+        {},
+        {"date": "2030-01-01"},
+        {"date": "2030-01-01", "time_from": "18:00", "time_to": "22:00"},
+    ],
+    "min_duration": [{}, {"min_duration": "90"}],
+    "club": [{}, {"club": "MyProtennis.ru"}],
+    "free_only": [{}, {"free_only": "true"}],
+}
+
+
+def filter_combinations() -> List[Dict[str, str]]:
+    combos = []
+    for parts in product(*FILTER_VARIANTS.values()):
+        args: Dict[str, str] = {}
+        for part in parts:
+            args.update(part)
+        combos.append(args)
+    return combos
+
+
+def explain(args: Dict[str, str]) -> Tuple[str, List[str]]:
+    stmt = build_page_statement(
+        SlotFilters.from_args(args),
+        DEFAULT_FIELDS,
+        limit=500,
+        cursor=(datetime(2030, 1, 1, 12, 0), 1),
+    )
+    sql = str(
+        stmt.compile(
+            dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}
+        )
+    )
+    rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    return sql, [row[-1] for row in rows]
+
+
+def plan_problems(plan: List[str]) -> List[str]:
+    problems = []
+    for line in plan:
+        if line.startswith(("SCAN slot", "SEARCH slot")) and "INDEX" not in line:
+            problems.append(f"таблица читается без индекса: {line}")
+        if "USE TEMP B-TREE FOR ORDER BY" in line:
+            problems.append("сортировка через временное B-дерево")
+    return problems
+
+
+def main() -> int:
+    app = create_app(PlanCheckConfig)
+    failed = 0
+
+    with app.app_context():
+        for args in filter_combinations():
+            _, plan = explain(args)
+            problems = plan_problems(plan)
+            label = ", ".join(f"{k}={v}" for k, v in args.items()) or "без фильтров"
+            status = "OK  " if not problems else "FAIL"
+            print(f"{status} {label}")
+            for line in plan:
+                print(f"       {line}")
+            for problem in problems:
+                print(f"       !! {problem}")
+            failed += bool(problems)
+
+    print(f"\nПлохих планов: {failed}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+Проверка YClientsApiParser на локальном стабе API (scripts/yclients_api_stub.py).
+
+Поднимаем стаб на свободном порту и гоняем парсер без сети, без
+bootstrap и без fallback на браузер. Проверяем:
+- слоты совпадают с расписанием стаба (только is_bookable);
+- fetched_scope — все (club, court, дата), один запрос на корт и дату;
+- courts=[] — ни одного запроса (а не весь каталог);
+- стаб с --refuse (404 с HTML) — YClientsApiRefused и пустой scope;
+- стаб с --malformed (200 без списка data) — то же самое: пустой
+  разбор не должен стирать слоты при сверке.
+
+Запуск (код выхода 1, если хоть одна проверка не прошла):
+
+    python scripts/check_yclients_api.py
+"""
+
+from datetime import date, datetime, timedelta
+import os
+import sys
+from typing import Callable, List, Set, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsers.catalog import CourtConfig  # noqa: E402
+from parsers.yclients_api import YClientsApiParser, YClientsApiRefused  # noqa: E402
+from scripts.yclients_api_stub import (  # noqa: E402
+    STUB_PATH,
+    build_timeslots,
+    start_stub_server,
+)
+
+DATES = [date(2030, 1, 1), date(2030, 1, 2)]
+
+COURTS = [
+    CourtConfig(
+        club_name="Stub club",
+        court_name=f"Корт {staff_id}",
+        url="http://127.0.0.1/widget",
+        duration_minutes=60,
+        service_label="Аренда 1 час",
+        staff_id=staff_id,
+        service_id=1,
+        location_id=1,
+    )
+    for staff_id in (101, 102)
+]
+
+
+def expected_starts(court: CourtConfig) -> Set[datetime]:
+    starts = set()
+    for day in DATES:
+        for item in build_timeslots(day.isoformat(), court.staff_id)["data"]:
+            attrs = item["attributes"]
+            if attrs["is_bookable"]:
+                starts.add(datetime.fromisoformat(attrs["datetime"]).replace(tzinfo=None))
+    return starts
+
+
+def make_parser(server, courts: List[CourtConfig] = COURTS) -> YClientsApiParser:
+    host, port = server.server_address[:2]
+    return YClientsApiParser(
+        api_url=f"http://{host}:{port}{STUB_PATH}",
+        courts=courts,
+        dates=DATES,
+        bootstrap=False,
+        fallback=False,
+        timeout=5,
+    )
+
+
+def check_slots() -> List[str]:
+    problems = []
+    server = start_stub_server()
+    try:
+        parser = make_parser(server)
+        slots = parser.fetch_slots()
+    finally:
+        server.shutdown()
+
+    for court in COURTS:
+        got = {s.start for s in slots if s.court == court.court_name}
+        if got != expected_starts(court):
+            problems.append(f"{court.court_name}: слоты не совпали с расписанием стаба")
+    if any(s.end - s.start != timedelta(minutes=60) for s in slots):
+        problems.append("длительность слотов не из CourtConfig")
+
+    scope = {(c.club_name, c.court_name, d) for c in COURTS for d in DATES}
+    if parser.fetched_scope() != scope:
+        problems.append(f"fetched_scope: {sorted(parser.fetched_scope())}")
+    if parser.last_request_count != len(COURTS) * len(DATES):
+        problems.append(f"запросов к API: {parser.last_request_count}")
+    return problems
+
+
+def check_no_courts() -> List[str]:
+    server = start_stub_server()
+    try:
+        parser = make_parser(server, courts=[])
+        slots = parser.fetch_slots()
+    finally:
+        server.shutdown()
+
+    if slots or parser.last_request_count or parser.courts:
+        return [f"courts=[]: слотов {len(slots)}, запросов {parser.last_request_count}"]
+    return []
+
+
+def check_refused(**stub_options) -> List[str]:
+    server = start_stub_server(**stub_options)
+    try:
+        parser = make_parser(server)
+        try:
+            parser.fetch_slots()
+        except YClientsApiRefused:
+            pass
+        else:
+            return ["ответ не превратился в YClientsApiRefused"]
+    finally:
+        server.shutdown()
+
+    if parser.fetched_scope():
+        return [f"после отказа fetched_scope не пуст: {parser.fetched_scope()}"]
+    return []
+
+
+CHECKS: List[Tuple[str, Callable[[], List[str]]]] = [
+    ("слоты и fetched_scope", check_slots),
+    ("courts=[]", check_no_courts),
+    ("отказ API (404)", lambda: check_refused(refuse=True)),
+    ("ответ без списка data", lambda: check_refused(malformed=True)),
+]
+
+
+def main() -> int:
+    failed = 0
+    for label, check in CHECKS:
+        problems = check()
+        print(f"{'OK  ' if not problems else 'FAIL'} {label}")
+        for problem in problems:
+            print(f"       !! {problem}")
+        failed += bool(problems)
+
+    print(f"\nНе прошло проверок: {failed}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
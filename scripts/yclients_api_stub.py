@@ -0,0 +1,124 @@
+"""
+Локальный стаб API YClients search-timeslots.
+
+Нужен, чтобы гонять YClientsApiParser без сети:
+
+    python scripts/yclients_api_stub.py --port 8765
+
+и в коде:
+
+    YClientsApiParser(
+        api_url="http://127.0.0.1:8765/api/v1/b2c/booking/"
+                "availability/search-timeslots",
+        fallback=False,
+    )
+
+С флагом --refuse стаб отвечает 404 с HTML (как боевой API на "голые"
+запросы с сервера), чтобы проверить ветку bootstrap/fallback.
+С --malformed — 200 с JSON без списка data (конверт ошибки).
+"""
+
+import argparse
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+from typing import Any, Dict, List
+
+
+STUB_PATH = "/api/v1/b2c/booking/availability/search-timeslots"
+
+
+def build_timeslots(date_str: str, staff_id: int) -> Dict[str, Any]:
+    """
+    Детерминированное расписание: с 07:00 до 22:00, часть часов занята
+    (зависит от staff_id и дня), чтобы у кортов были разные слоты.
+    """
+    day = datetime.strptime(date_str, "%Y-%m-%d").date()
+    items: List[Dict[str, Any]] = []
+
+    for hour in range(7, 23):
+        is_bookable = (staff_id + hour + day.toordinal()) % 3 != 0
+        items.append(
+            {
+                "type": "booking_search_result_timeslots",
+                "id": f"{staff_id}-{date_str}-{hour}",
+                "attributes": {
+                    "datetime": f"{date_str}T{hour:02d}:00:00+03:00",
+                    "time": f"{hour:02d}:00",
+                    "is_bookable": is_bookable,
+                },
+            }
+        )
+
+    return {"data": items}
+
+
+def make_handler(refuse: bool = False, malformed: bool = False):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):  # noqa: D401
+            # Не засоряем вывод строками access-лога
+            pass
+
+        def do_POST(self):
+            if self.path.split("?")[0] != STUB_PATH or refuse:
+                body = b"<html><body>Not Found</body></html>"
+                self.send_response(404)
+                self.send_header("Content-Type", "text/html")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+
+            length = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            flt = payload.get("filter", {})
+            records = flt.get("records") or [{}]
+            staff_id = int(records[0].get("staff_id", -1))
+
+            if malformed:
+                result: Dict[str, Any] = {"errors": [{"status": 500, "title": "stub"}]}
+            else:
+                result = build_timeslots(flt["date"], staff_id)
+            body = json.dumps(result).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+def start_stub_server(
+    port: int = 0, refuse: bool = False, malformed: bool = False
+) -> ThreadingHTTPServer:
+    """
+    Поднимает стаб в фоновом потоке. port=0 — любой свободный порт
+    (узнать его можно через server.server_address[1]).
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(refuse, malformed))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--refuse", action="store_true")
+    parser.add_argument("--malformed", action="store_true")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", args.port), make_handler(args.refuse, args.malformed)
+    )
+    print(f"Стаб API слушает http://127.0.0.1:{args.port}{STUB_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
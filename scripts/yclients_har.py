@@ -0,0 +1,143 @@
+"""
+Запись и воспроизведение трафика YClients-парсера (см. parsers/har.py).
+
+record — обычный прогон парсера с сетью; весь трафик виджета пишется в
+HAR, рядом кладутся манифест (<har>.meta.json) и полученные слоты
+(<har>.slots.json).
+
+replay — тот же прогон без сети, по записи. Печатает время прогона,
+суммы по шагам (goto, выбор даты, ожидание ответа и т.п.) и сверяет слоты
+с записанными: так изменения парсера можно проверять и мерить на одной и
+той же "выдаче" сайта. С --profile дополнительно снимает cProfile.
+
+Запуск:
+
+    python scripts/yclients_har.py record var/yclients.har --days-ahead 3
+    python scripts/yclients_har.py replay var/yclients.har --repeat 3
+    python scripts/yclients_har.py replay var/yclients.har --engine async --profile replay.prof
+"""
+
+import argparse
+import cProfile
+import json
+import os
+import pstats
+import sys
+import time
+from typing import Dict, List, Tuple
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(SCRIPTS_DIR))
+
+from parsers.base import SlotBatch  # noqa: E402
+from parsers.har import HAR_RECORD, HAR_REPLAY  # noqa: E402
+from parsers.yclients import YClientsMyProTennisCourtParser  # noqa: E402
+from parsers.yclients_async import AsyncYClientsMyProTennisCourtParser  # noqa: E402
+
+SlotKey = Tuple[str, str, str, str, str]
+
+
+def slots_path(har_path: str) -> str:
+    return f"{har_path}.slots.json"
+
+
+def slot_keys(slots: SlotBatch) -> List[SlotKey]:
+    return sorted(
+        (s.club, s.court, s.start.isoformat(), s.end.isoformat(), s.status)
+        for s in slots
+    )
+
+
+def make_parser(args, mode: str) -> YClientsMyProTennisCourtParser:
+    cls = (
+        AsyncYClientsMyProTennisCourtParser
+        if args.engine == "async"
+        else YClientsMyProTennisCourtParser
+    )
+    return cls(
+        headless=not args.headed,
+        days_ahead=args.days_ahead,
+        har_mode=mode,
+        har_path=args.har,
+    )
+
+
+def print_steps(parser: YClientsMyProTennisCourtParser) -> None:
+    totals: Dict[str, float] = parser._step_totals()
+    for step, seconds in sorted(totals.items(), key=lambda kv: -kv[1]):
+        print(f"  {step:<24} {seconds:>8.3f} с")
+
+
+def record(args) -> int:
+    parser = make_parser(args, HAR_RECORD)
+    started = time.perf_counter()
+    slots = parser.fetch_slots()
+    print(f"\nЗаписано за {time.perf_counter() - started:.2f} с, слотов: {len(slots)}")
+
+    with open(slots_path(args.har), "w", encoding="utf-8") as f:
+        json.dump(slot_keys(slots), f, ensure_ascii=False, indent=1)
+    print(f"Слоты для сверки: {slots_path(args.har)}")
+    return 0
+
+
+def replay(args) -> int:
+    expected = None
+    if os.path.exists(slots_path(args.har)):
+        with open(slots_path(args.har), encoding="utf-8") as f:
+            expected = [tuple(item) for item in json.load(f)]
+
+    profiler = cProfile.Profile() if args.profile else None
+    mismatches = 0
+    for attempt in range(1, args.repeat + 1):
+        parser = make_parser(args, HAR_REPLAY)
+        started = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        slots = parser.fetch_slots()
+        if profiler is not None:
+            profiler.disable()
+        elapsed = time.perf_counter() - started
+
+        print(f"\nПрогон {attempt}: {elapsed:.2f} с, слотов: {len(slots)}")
+        print_steps(parser)
+
+        if expected is not None and slot_keys(slots) != expected:
+            mismatches += 1
+            got = set(slot_keys(slots))
+            want = set(expected)
+            print(
+                f"  !! слоты не совпали с записью: лишних {len(got - want)}, "
+                f"недостаёт {len(want - got)}"
+            )
+
+    if profiler is not None:
+        profiler.dump_stats(args.profile)
+        print(f"\nПрофиль сохранён: {args.profile}")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(args.top)
+
+    if expected is None:
+        print(f"\nНет {slots_path(args.har)} — слоты не сверялись")
+    return 1 if mismatches else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Запись/воспроизведение YClients (HAR)")
+    parser.add_argument("mode", choices=(HAR_RECORD, HAR_REPLAY))
+    parser.add_argument("har", help="путь к HAR-файлу")
+    parser.add_argument("--engine", choices=("sync", "async"), default="sync")
+    parser.add_argument("--days-ahead", type=int, default=2,
+                        help="горизонт в днях (при replay — не больше записанного)")
+    parser.add_argument("--headed", action="store_true", help="показать браузер")
+    parser.add_argument("--repeat", type=int, default=1, help="повторы replay")
+    parser.add_argument("--profile", help="сохранить cProfile replay-прогонов в файл")
+    parser.add_argument("--top", type=int, default=25, help="строк профиля в выводе")
+    args = parser.parse_args()
+
+    if args.mode == HAR_RECORD:
+        os.makedirs(os.path.dirname(os.path.abspath(args.har)), exist_ok=True)
+        return record(args)
+    return replay(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+Учёт свежести слотов по (источник, клуб, корт, дата).
+
+Ближайшие даты меняются постоянно, дальние — почти нет, поэтому у
+каждой даты свой "бюджет устаревания" в зависимости от того, сколько
+дней до неё осталось. Апдейтер в инкрементальном режиме просит у
+парсера только те даты, у которых бюджет исчерпан хотя бы для одного корта.
+
+Бюджеты задаются строкой вида "0=300,1=900,3=3600": дата через N дней
+получает бюджет ближайшего порога <= N (сегодня — 5 минут, завтра и
+послезавтра — 15 минут, дальше — час).
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from app import db
+from app.models import SlotFreshness
+from parsers.base import ScopeKey
+
+# Порог в днях -> бюджет в секундах, по возрастанию порога
+Budgets = List[Tuple[int, float]]
+
+DEFAULT_BUDGETS = "0=300,1=900,3=3600"
+
+
+def parse_budgets(raw: str) -> Budgets:
+    """"0=300,3=3600" -> [(0, 300.0), (3, 3600.0)]."""
+    budgets: Dict[int, float] = {}
+    for part in (raw or "").split(","):
+        days, sep, seconds = part.partition("=")
+        if not sep:
+            continue
+        try:
+            budgets[int(days)] = float(seconds)
+        except ValueError:
+            print(f"[Freshness] Некорректный бюджет: {part!r}")
+    if not budgets:
+        return parse_budgets(DEFAULT_BUDGETS)
+    return sorted(budgets.items())
+
+
+def budget_for(days_ahead: int, budgets: Budgets) -> float:
+    """Бюджет устаревания для даты, до которой days_ahead дней."""
+    budget = budgets[0][1]
+    for threshold, seconds in budgets:
+        if days_ahead >= threshold:
+            budget = seconds
+    return budget
+
+
+def stale_dates(
+    source: str,
+    court_keys: Sequence[Tuple[str, str]],
+    dates: Sequence[date],
+    budgets: Budgets,
+    grace_seconds: float = 0,
+    now: Optional[datetime] = None,
+) -> List[date]:
+    """
+    Даты из dates, которые пора пересобрать: хотя бы у одного корта
+    последний сбор старше бюджета (минус grace_seconds — чтобы прогон
+    планировщика чуть раньше срока не пропускал дату до следующего).
+    Если корты парсера неизвестны, свежесть даты — по самому старому
+    из записанных кортов.
+    """
+    if not dates:
+        return []
+    now = now or datetime.utcnow()
+    today = datetime.now().date()
+
+    rows = SlotFreshness.query.filter(
+        SlotFreshness.source == source,
+        SlotFreshness.date >= min(dates),
+        SlotFreshness.date <= max(dates),
+    ).all()
+    fetched: Dict[ScopeKey, datetime] = {
+        (row.club, row.court, row.date): row.fetched_at for row in rows
+    }
+
+    stale: List[date] = []
+    for target_date in dates:
+        budget = budget_for((target_date - today).days, budgets)
+        if court_keys:
+            times = [fetched.get((club, court, target_date)) for club, court in court_keys]
+        else:
+            times = [t for (_, _, d), t in fetched.items() if d == target_date] or [None]
+
+        if any(
+            t is None or (now - t).total_seconds() >= budget - grace_seconds
+            for t in times
+        ):
+            stale.append(target_date)
+    return stale
+
+
+def mark_fresh(
+    source: str, scope: Iterable[ScopeKey], fetched_at: Optional[datetime] = None
+) -> int:
+    """
+    Отмечает (club, court, дата) источника как только что собранные.
+    Заодно удаляет записи о прошедших датах. Коммит — за вызывающим.
+    """
+    scope_set: Set[ScopeKey] = set(scope)
+    if not scope_set:
+        return 0
+    fetched_at = fetched_at or datetime.utcnow()
+
+    dates = [d for _, _, d in scope_set]
+    existing = {
+        (row.club, row.court, row.date): row
+        for row in SlotFreshness.query.filter(
+            SlotFreshness.source == source,
+            SlotFreshness.date >= min(dates),
+            SlotFreshness.date <= max(dates),
+        )
+    }
+
+    for key in scope_set:
+        row = existing.get(key)
+        if row is not None:
+            row.fetched_at = fetched_at
+            continue
+        club, court, target_date = key
+        db.session.add(
+            SlotFreshness(
+                source=source,
+                club=club,
+                court=court,
+                date=target_date,
+                fetched_at=fetched_at,
+            )
+        )
+
+    yesterday = datetime.now().date() - timedelta(days=1)
+    SlotFreshness.query.filter(
+        SlotFreshness.source == source, SlotFreshness.date <= yesterday
+    ).delete(synchronize_session=False)
+
+    return len(scope_set)
@@ -0,0 +1,230 @@
+"""
+Фоновые задачи обновления слотов.
+
+POST /api/update_slots больше не ждёт парсеры: он ставит задачу в очередь
+и сразу отдаёт её id, а само обновление идёт в отдельном пуле потоков
+(со своим app context). Прогресс по каждому парсеру можно смотреть через
+GET /api/update_slots/<job_id>.
+
+Пока задача в очереди или выполняется, повторные запросы на обновление
+тех же источников не создают новую, а присоединяются к ней — парсеры
+не запускаются несколько раз подряд из-за нетерпеливых нажатий кнопки
+(или из-за планировщика, который догнал ручное обновление).
+"""
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+import threading
+import uuid
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+# Статусы задачи
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+
+@dataclass
+class ParserProgress:
+    """Состояние одного парсера внутри задачи (снимок ParserRun)."""
+    parser_name: str
+    source_name: str = ""
+    status: str = "pending"
+    slots: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class RefreshJob:
+    """Задача обновления слотов."""
+    id: str
+    # Какие источники обновляем (None — все)
+    sources: Optional[Tuple[str, ...]] = None
+    # Только устаревшие даты (см. services.freshness) или всё подряд
+    incremental: bool = False
+    status: str = QUEUED
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    parsers: Dict[str, ParserProgress] = field(default_factory=dict)
+    total_slots: Optional[int] = None
+    error: Optional[str] = None
+    # Сколько запросов на обновление слилось в эту задачу
+    requests: int = 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        def iso(value: Optional[datetime]) -> Optional[str]:
+            return value.isoformat() + "Z" if value else None
+
+        return {
+            "job_id": self.id,
+            "sources": list(self.sources) if self.sources is not None else None,
+            "incremental": self.incremental,
+            "status": self.status,
+            "created_at": iso(self.created_at),
+            "started_at": iso(self.started_at),
+            "finished_at": iso(self.finished_at),
+            "parsers": [
+                {
+                    "parser": p.parser_name,
+                    "source": p.source_name,
+                    "status": p.status,
+                    "slots": p.slots,
+                    "seconds": round(p.seconds, 2),
+                    "error": p.error,
+                }
+                for p in self.parsers.values()
+            ],
+            "total_slots": self.total_slots,
+            "error": self.error,
+            "requests": self.requests,
+        }
+
+    def covers(self, sources: Optional[Tuple[str, ...]], incremental: bool) -> bool:
+        """
+        Покрывает ли задача запрос: обновляет все источники из sources
+        (None — все) и не менее полно (полное обновление покрывает
+        инкрементальное, но не наоборот).
+        """
+        if self.incremental and not incremental:
+            return False
+        if self.sources is None:
+            return True
+        return sources is not None and set(sources) <= set(self.sources)
+
+
+class RefreshJobQueue:
+    """
+    Очередь задач обновления поверх ThreadPoolExecutor.
+
+    Хранит последние history задач (старые завершённые вытесняются).
+    Активных задач может быть несколько, но с разными наборами источников.
+    """
+
+    def __init__(self, max_workers: int = 1, history: int = 50):
+        self.max_workers = max_workers
+        self.history = history
+
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, RefreshJob]" = OrderedDict()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def init_app(self, app) -> None:
+        self.max_workers = app.config.get("REFRESH_JOB_WORKERS", self.max_workers)
+        self.history = app.config.get("REFRESH_JOB_HISTORY", self.history)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Пул создаём лениво: веб-процессу без обновлений потоки не нужны
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(1, self.max_workers), thread_name_prefix="refresh"
+            )
+        return self._executor
+
+    # ---------- API очереди ---------- #
+
+    def enqueue(
+        self,
+        app,
+        sources: Optional[Sequence[str]] = None,
+        incremental: bool = False,
+    ) -> Tuple[RefreshJob, bool]:
+        """
+        Ставит обновление в очередь. Возвращает (задача, merged):
+        merged=True — уже была активная задача, которая обновляет эти
+        источники, и запрос присоединён к ней.
+        app — объект Flask-приложения (current_app._get_current_object()).
+        sources — обновить только эти источники (None — все).
+        incremental — пересобрать только устаревшие даты.
+        """
+        key = tuple(sorted(sources)) if sources is not None else None
+
+        with self._lock:
+            for active in self._jobs.values():
+                if active.status in ACTIVE_STATUSES and active.covers(key, incremental):
+                    active.requests += 1
+                    return active, True
+
+            job = RefreshJob(id=uuid.uuid4().hex, sources=key, incremental=incremental)
+            self._jobs[job.id] = job
+            self._trim()
+            self._get_executor().submit(self._run, app, job)
+
+        print(f"[Jobs] Задача обновления {job.id} поставлена в очередь")
+        return job, False
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Снимок задачи для API (или None, если такой нет)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.as_dict() if job is not None else None
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    # ---------- Выполнение ---------- #
+
+    def _trim(self) -> None:
+        """Выкидывает самые старые завершённые задачи сверх history."""
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.history:
+                break
+            if self._jobs[job_id].status not in ACTIVE_STATUSES:
+                del self._jobs[job_id]
+
+    def _on_progress(self, job: RefreshJob, run) -> None:
+        """Колбэк апдейтера: копируем ParserRun в прогресс задачи."""
+        with self._lock:
+            job.parsers[run.parser_name] = ParserProgress(
+                parser_name=run.parser_name,
+                source_name=run.source_name,
+                status=run.status,
+                slots=len(run.slots),
+                seconds=run.seconds,
+                error=run.error,
+            )
+
+    def _run(self, app, job: RefreshJob) -> None:
+        """Выполняется в потоке пула."""
+        # Импорт здесь: апдейтер тянет за собой парсеры
+        from app import db
+        from services.updater import update_slots_from_all_sources
+
+        with self._lock:
+            job.status = RUNNING
+            job.started_at = datetime.utcnow()
+        print(f"[Jobs] Задача {job.id} запущена")
+
+        with app.app_context():
+            try:
+                total = update_slots_from_all_sources(
+                    on_progress=lambda run: self._on_progress(job, run),
+                    sources=job.sources,
+                    incremental=job.incremental,
+                )
+            except Exception as exc:  # noqa: BLE001
+                db.session.rollback()
+                with self._lock:
+                    job.status = FAILED
+                    job.error = str(exc)
+                    job.finished_at = datetime.utcnow()
+                print(f"[Jobs] Задача {job.id} упала: {exc}")
+                return
+
+        with self._lock:
+            job.status = DONE
+            job.total_slots = total
+            job.finished_at = datetime.utcnow()
+        print(f"[Jobs] Задача {job.id} завершена, слотов: {total}")
+
+
+# Общая очередь обновлений (подключается в create_app)
+refresh_jobs = RefreshJobQueue()
@@ -0,0 +1,317 @@
+"""
+Метрики парсеров и конвейера обновления.
+
+Счётчики и гистограммы живут в памяти процесса и отдаются на /metrics
+в текстовом формате Prometheus. Для подробностей, которые не стоит
+превращать в метки (конкретный корт и дата), есть структурированные
+JSON-логи: log_event() печатает одну JSON-строку на событие
+(включается METRICS_JSON_LOGS=1).
+
+Модуль без зависимостей (ни Flask, ни prometheus_client), поэтому его
+можно использовать и в парсерах, и в воркерах пула процессов. Воркер
+перед задачей обнуляет свои метрики, а после — отправляет снимок
+(snapshot) вместе со слотами, и родитель добавляет его к своим (merge).
+"""
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import date
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+PREFIX = "tennis_"
+
+# Границы бакетов гистограмм по умолчанию, секунды
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300,
+)
+
+LabelValues = Tuple[str, ...]
+# Сборщик: вызывается при выдаче /metrics и возвращает
+# (имя, справка, тип, {метки: значение}) — для счётчиков из чужих stats()
+Collector = Callable[[], Iterable[Tuple[str, str, str, Dict[Tuple[Tuple[str, str], ...], float]]]]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs: Sequence[Tuple[str, Any]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, help_text: str,
+                 labels: Sequence[str] = ()):
+        self.registry = registry
+        self.name = PREFIX + name
+        self.help = help_text
+        self.label_names = tuple(labels)
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+
+class Counter(_Metric):
+    """Монотонный счётчик."""
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self) -> Iterator[Tuple[str, List[Tuple[str, Any]], float]]:
+        for key, value in sorted(self.values.items()):
+            yield self.name, list(zip(self.label_names, key)), value
+
+
+class Gauge(Counter):
+    """Текущее значение (можно задавать напрямую)."""
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        with self.registry.lock:
+            self.values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Гистограмма длительностей (кумулятивные бакеты, как в Prometheus)."""
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # метки -> [счётчики по бакетам (последний — +Inf), сумма]
+        self.values: Dict[LabelValues, List[Any]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self.registry.lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> Iterator[Tuple[str, List[Tuple[str, Any]], float]]:
+        for key, (counts, total) in sorted(self.values.items()):
+            pairs = list(zip(self.label_names, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", pairs + [("le", _format_value(bound))], cumulative
+            yield f"{self.name}_sum", pairs, total
+            yield f"{self.name}_count", pairs, cumulative
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Collector] = []
+        self.json_logs = os.environ.get("METRICS_JSON_LOGS", "0") == "1"
+
+    def init_app(self, app) -> None:
+        self.json_logs = app.config.get("METRICS_JSON_LOGS", self.json_logs)
+
+    # ---------- Регистрация ---------- #
+
+    def _get_or_create(self, cls, name: str, help_text: str, labels, **kwargs):
+        with self.lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(self, name, help_text, labels, **kwargs)
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help_text, labels)
+
+    def gauge(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help_text, labels)
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, labels, buckets=buckets)
+
+    def register_collector(self, collector: Collector) -> None:
+        """Значения из чужой статистики (кэш, пул процессов), читаются при выдаче."""
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    # ---------- Выдача ---------- #
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus (version 0.0.4)."""
+        lines: List[str] = []
+        with self.lock:
+            for metric in self._metrics.values():
+                if not metric.values:
+                    continue
+                lines.append(f"# HELP {metric.name} {metric.help}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                for name, pairs, value in metric.samples():
+                    lines.append(f"{name}{_format_labels(pairs)} {_format_value(value)}")
+
+        for collector in list(self._collectors):
+            try:
+                collected = list(collector())
+            except Exception as exc:  # noqa: BLE001
+                print(f"[Metrics] Ошибка сборщика {collector!r}: {exc}")
+                continue
+            for name, help_text, kind, values in collected:
+                lines.append(f"# HELP {PREFIX}{name} {help_text}")
+                lines.append(f"# TYPE {PREFIX}{name} {kind}")
+                for pairs, value in values.items():
+                    lines.append(
+                        f"{PREFIX}{name}{_format_labels(pairs)} {_format_value(value)}"
+                    )
+        return "\n".join(lines) + "\n"
+
+    # ---------- Перенос между процессами ---------- #
+
+    def snapshot(self) -> Dict[str, Dict[LabelValues, Any]]:
+        """Значения счётчиков и гистограмм (для отправки из воркера)."""
+        with self.lock:
+            return {
+                name: {
+                    key: ([list(v[0]), v[1]] if isinstance(metric, Histogram) else v)
+                    for key, v in metric.values.items()
+                }
+                for name, metric in self._metrics.items()
+                if not isinstance(metric, Gauge) and metric.values
+            }
+
+    def merge(self, snapshot: Dict[str, Dict[LabelValues, Any]]) -> None:
+        """Добавляет снимок из другого процесса к своим значениям."""
+        with self.lock:
+            for name, values in snapshot.items():
+                metric = self._metrics.get(name)
+                if metric is None:
+                    continue
+                for key, value in values.items():
+                    if isinstance(metric, Histogram):
+                        entry = metric.values.get(key)
+                        if entry is None:
+                            metric.values[key] = [list(value[0]), value[1]]
+                        else:
+                            entry[0] = [a + b for a, b in zip(entry[0], value[0])]
+                            entry[1] += value[1]
+                    else:
+                        metric.values[key] = metric.values.get(key, 0) + value
+
+    def reset(self) -> None:
+        with self.lock:
+            for metric in self._metrics.values():
+                metric.values.clear()
+
+
+# Общий реестр метрик процесса
+metrics = MetricsRegistry()
+
+
+def log_event(event: str, **fields: Any) -> None:
+    """Структурированный лог: одна JSON-строка (если включены JSON-логи)."""
+    if not metrics.json_logs:
+        return
+    record = {"ts": round(time.time(), 3), "event": event, **fields}
+    print(json.dumps(record, ensure_ascii=False, default=str), flush=True)
+
+
+# ---------- Метрики конвейера обновления ---------- #
+
+PARSER_RUNS = metrics.counter(
+    "parser_runs_total", "Запуски парсеров по итогу", ("source", "parser", "status")
+)
+PARSER_DURATION = metrics.histogram(
+    "parser_duration_seconds", "Длительность прогона парсера", ("source", "parser")
+)
+PARSER_SLOTS = metrics.counter(
+    "parser_slots_total", "Слотов отдано парсерами", ("source", "parser")
+)
+PARSER_ERRORS = metrics.counter(
+    "parser_errors_total", "Ошибки парсеров по этапам", ("parser", "stage")
+)
+PARSER_STEP = metrics.histogram(
+    "parser_step_seconds",
+    "Шаги парсеров (goto, выбор даты, запрос к API и т.п.)",
+    ("parser", "step"),
+)
+PARSER_PAGE_LOAD = metrics.histogram(
+    "parser_page_load_seconds",
+    "Загрузка страницы на (корт, дата): открытие виджета и выбор даты",
+    ("parser",),
+)
+PARSER_EXTRACT = metrics.histogram(
+    "parser_extract_seconds", "Разбор слотов на (корт, дата)", ("parser",)
+)
+BROWSER_LAUNCHES = metrics.counter("browser_launches_total", "Запуски Chromium")
+BROWSER_LAUNCH = metrics.histogram("browser_launch_seconds", "Время запуска Chromium")
+DB_WRITE = metrics.histogram(
+    "updater_db_write_seconds", "Сверка источника с БД (без коммита)", ("source",)
+)
+DB_COMMIT = metrics.histogram("updater_db_commit_seconds", "Коммит обновления")
+DB_ROWS = metrics.counter(
+    "updater_rows_total", "Изменённые строки slot", ("source", "op")
+)
+UPDATE_DURATION = metrics.histogram(
+    "updater_duration_seconds", "Полный прогон обновления", ("mode",)
+)
+
+
+def record_page(
+    parser: str,
+    courts: Sequence[str],
+    target_date: date,
+    load_seconds: float,
+    extract_seconds: float,
+    slots: int,
+) -> None:
+    """
+    Тайминги одной страницы / запроса парсера (корты, дата): в метриках —
+    без меток корта и даты, в JSON-логе — с ними.
+    """
+    PARSER_PAGE_LOAD.observe(load_seconds, parser=parser)
+    PARSER_EXTRACT.observe(extract_seconds, parser=parser)
+    log_event(
+        "parser_page",
+        parser=parser,
+        courts=list(courts),
+        date=target_date.isoformat(),
+        load_seconds=round(load_seconds, 3),
+        extract_seconds=round(extract_seconds, 3),
+        slots=slots,
+    )
@@ -0,0 +1,335 @@
+"""
+Пул процессов для запуска парсеров.
+
+Playwright и Chromium живут не в веб-процессе и не в процессе апдейтера,
+а в отдельных воркерах (multiprocessing, spawn). Парсер отправляется в
+воркер pickle'ом, обратно приходит SlotBatch (таблица строк + столбцы
+array, а не pickle тысяч SlotData с datetime).
+
+Воркер пересоздаётся:
+- после max_jobs_per_worker задач или если его RSS вырос выше max_rss_mb
+  (утечки драйвера Playwright не копятся бесконечно);
+- если задача не уложилась в таймаут или её отменили — процесс убивается
+  целиком, вместе с зависшим браузером.
+"""
+
+from dataclasses import asdict, dataclass
+from datetime import date
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+import traceback
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from parsers.base import BaseParser, ScopeKey, SlotBatch
+from services.metrics import metrics
+
+_PICKLE_PROTOCOL = pickle.HIGHEST_PROTOCOL
+
+
+class ParserWorkerError(RuntimeError):
+    """Воркер не вернул результат: упал, убит по таймауту или отменён."""
+
+
+# ---------- Воркер ---------- #
+
+def _current_rss() -> int:
+    """RSS текущего процесса в байтах (0, если узнать не удалось)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        # На Linux ru_maxrss в КБ (это пик, а не текущее значение)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except (ImportError, OSError):
+        return 0
+
+
+def _worker_main(conn, max_jobs: int, max_rss_bytes: int, json_logs: bool = False) -> None:
+    """
+    Цикл воркера: получить парсер, выполнить, отправить результат.
+    Пустое сообщение — команда завершиться. Вместе с результатом
+    уходят метрики, набранные за задачу (родитель добавит их к своим).
+    """
+    metrics.json_logs = json_logs
+    jobs = 0
+    while True:
+        try:
+            message = conn.recv_bytes()
+        except (EOFError, OSError):
+            break
+        if not message:
+            break
+
+        metrics.reset()
+        try:
+            parser: BaseParser = pickle.loads(message)
+            slots = parser.fetch_slots()
+            if not isinstance(slots, SlotBatch):
+                slots = SlotBatch(slots)
+            result: Tuple[Any, ...] = ("ok", slots, parser.fetched_scope())
+        except Exception as exc:  # noqa: BLE001
+            result = ("error", f"{type(exc).__name__}: {exc}", traceback.format_exc())
+
+        jobs += 1
+        rss = _current_rss()
+        recycle = jobs >= max_jobs or bool(max_rss_bytes and rss > max_rss_bytes)
+        conn.send_bytes(
+            pickle.dumps(
+                (*result, rss, recycle, metrics.snapshot()), protocol=_PICKLE_PROTOCOL
+            )
+        )
+        if recycle:
+            break
+    conn.close()
+
+
+class _Worker:
+    def __init__(self, ctx, max_jobs: int, max_rss_bytes: int):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, max_jobs, max_rss_bytes, metrics.json_logs),
+            name="parser-worker",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+    def stop(self) -> None:
+        try:
+            self.conn.send_bytes(b"")
+        except (OSError, ValueError):
+            pass
+        self.process.join(5)
+        if self.process.is_alive():
+            self.kill()
+        self.conn.close()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join(5)
+        self.conn.close()
+
+
+@dataclass
+class ParserPoolStats:
+    """Статистика пула процессов."""
+    spawned: int = 0
+    recycled: int = 0
+    killed: int = 0
+    crashed: int = 0
+    jobs: int = 0
+    max_rss_mb: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["max_rss_mb"] = round(self.max_rss_mb, 1)
+        return data
+
+
+class ParserProcessPool:
+    """
+    Не больше max_workers процессов; свободные воркеры переиспользуются.
+    run() блокирует вызывающий поток до результата, поэтому апдейтер
+    просто вызывает его из своих потоков.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_jobs_per_worker: int = 20,
+        max_rss_mb: float = 1024,
+        start_method: str = "spawn",
+        poll_interval: float = 0.5,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.max_jobs_per_worker = max(1, max_jobs_per_worker)
+        self.max_rss_bytes = int(max_rss_mb * 1024 * 1024)
+        self.poll_interval = poll_interval
+        # spawn: воркер не наследует потоки и соединения родителя
+        self._ctx = multiprocessing.get_context(start_method)
+
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+        self._lock = threading.Lock()
+        self._idle: List[_Worker] = []
+        self._closed = False
+        self.stats = ParserPoolStats()
+
+    def _acquire_worker(self) -> _Worker:
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.process.is_alive():
+                    return worker
+                worker.conn.close()
+            self.stats.spawned += 1
+        return _Worker(self._ctx, self.max_jobs_per_worker, self.max_rss_bytes)
+
+    def _release_worker(self, worker: _Worker) -> None:
+        with self._lock:
+            if not self._closed:
+                self._idle.append(worker)
+                return
+        worker.stop()
+
+    def run(
+        self,
+        parser: BaseParser,
+        timeout: Optional[float] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> Tuple[SlotBatch, Optional[Set[ScopeKey]]]:
+        """
+        Выполняет parser.fetch_slots() в воркере.
+        Возвращает (слоты, parser.fetched_scope() из воркера).
+        Таймаут или cancel_event — воркер убивается, ParserWorkerError.
+        """
+        name = parser.parser_name
+        payload = pickle.dumps(parser, protocol=_PICKLE_PROTOCOL)
+
+        with self._slots:
+            worker = self._acquire_worker()
+            started = time.monotonic()
+            try:
+                worker.conn.send_bytes(payload)
+                while not worker.conn.poll(self.poll_interval):
+                    if cancel_event is not None and cancel_event.is_set():
+                        reason = "отменён"
+                    elif timeout is not None and time.monotonic() - started > timeout:
+                        reason = f"не уложился в {timeout:.0f} с"
+                    elif not worker.process.is_alive():
+                        # Процесс умер (например, OOM killer), не ответив
+                        with self._lock:
+                            self.stats.crashed += 1
+                        raise ParserWorkerError(
+                            f"воркер {name} завершился с кодом "
+                            f"{worker.process.exitcode}"
+                        )
+                    else:
+                        continue
+
+                    worker.kill()
+                    with self._lock:
+                        self.stats.killed += 1
+                    print(f"[ParserPool] {name} {reason} — воркер убит")
+                    raise ParserWorkerError(f"{name} {reason}")
+
+                status, data, extra, rss, recycle, worker_metrics = pickle.loads(
+                    worker.conn.recv_bytes()
+                )
+            except (EOFError, OSError) as exc:
+                worker.kill()
+                with self._lock:
+                    self.stats.crashed += 1
+                raise ParserWorkerError(
+                    f"воркер {name} упал (код {worker.process.exitcode})"
+                ) from exc
+            except BaseException:
+                if worker.process.is_alive():
+                    worker.kill()
+                raise
+
+            metrics.merge(worker_metrics)
+            with self._lock:
+                self.stats.jobs += 1
+                self.stats.max_rss_mb = max(self.stats.max_rss_mb, rss / 1024 / 1024)
+
+            if recycle:
+                worker.process.join(5)
+                worker.conn.close()
+                with self._lock:
+                    self.stats.recycled += 1
+                print(
+                    f"[ParserPool] Воркер пересоздаётся "
+                    f"(RSS {rss / 1024 / 1024:.0f} МБ)"
+                )
+            else:
+                self._release_worker(worker)
+
+        if status != "ok":
+            print(f"[ParserPool] Ошибка в {name}:\n{extra}")
+            raise ParserWorkerError(data)
+        return data, extra
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.stop()
+
+
+class IsolatedParser(BaseParser):
+    """
+    Обёртка, которая выполняет парсер в пуле процессов. Для апдейтера
+    выглядит как обычный парсер: request_cancel() убивает воркер.
+    """
+
+    def __init__(self, parser: BaseParser, pool: ParserProcessPool):
+        self.parser = parser
+        self.pool = pool
+
+        self.source_name = parser.source_name
+        self.timeout_seconds = parser.timeout_seconds
+        self.days_ahead = parser.days_ahead
+        self.dates = parser.dates
+        self._scope: Optional[Set[ScopeKey]] = None
+
+    @property
+    def parser_name(self) -> str:
+        return self.parser.parser_name
+
+    def today(self) -> date:
+        return self.parser.today()
+
+    def horizon_dates(self) -> Optional[List[date]]:
+        return self.parser.horizon_dates()
+
+    def court_keys(self) -> List[Tuple[str, str]]:
+        return self.parser.court_keys()
+
+    def fetched_scope(self) -> Optional[Set[ScopeKey]]:
+        return self._scope
+
+    def fetch_slots(self) -> SlotBatch:
+        slots, self._scope = self.pool.run(
+            self.parser,
+            timeout=self.timeout_seconds,
+            cancel_event=self._cancel_event(),
+        )
+        return slots
+
+
+def collect_pool_metrics():
+    """Статистика общего пула для /metrics (пока пул не создан — ничего)."""
+    pool = _POOL
+    if pool is None:
+        return []
+    stats = pool.stats
+    return [
+        (f"parser_pool_{name}_total", f"Пул процессов: {name}", "counter",
+         {(): getattr(stats, name)})
+        for name in ("spawned", "recycled", "killed", "crashed", "jobs")
+    ] + [
+        ("parser_pool_max_rss_megabytes", "Пул процессов: максимальный RSS воркера",
+         "gauge", {(): round(stats.max_rss_mb, 1)}),
+    ]
+
+
+# Пул на процесс апдейтера (создаётся при первом использовании)
+_POOL: Optional[ParserProcessPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_parser_pool(**kwargs) -> ParserProcessPool:
+    """Общий пул процессов; kwargs учитываются только при создании."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ParserProcessPool(**kwargs)
+        return _POOL
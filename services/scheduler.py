@@ -0,0 +1,264 @@
+"""
+Планировщик периодического обновления слотов.
+
+Каждый источник (source_name парсера) обновляется со своим интервалом:
+по умолчанию — refresh_interval_seconds из спецификации парсера в реестре
+(модуль парсера при этом не импортируется), переопределяется
+SCHEDULER_INTERVALS в конфиге. Прогоны инкрементальные: парсер получает
+только устаревшие даты (services.freshness), поэтому при частом интервале
+ближние даты обновляются каждый раз, а дальние — по своему бюджету.
+Запуски идут через общую очередь задач (services.jobs), поэтому:
+- если прошлое обновление источника ещё не закончилось (в том числе
+  ручное через /api/update_slots), новый запуск пропускается;
+- обновления не пишут в БД одновременно с ручными.
+
+К каждому интервалу добавляется случайный разброс (jitter), а первые
+запуски после старта размазываются по интервалу — источники и наш
+хост не получают все запросы в одну и ту же секунду.
+
+Время последних запусков сохраняется в JSON-файл, так что после
+рестарта планировщик не бросается обновлять всё сразу.
+"""
+
+from dataclasses import asdict, dataclass
+import json
+import os
+import random
+import threading
+import time
+from typing import Dict, List, Mapping, Optional
+
+from parsers.registry import parser_registry
+from services.jobs import ACTIVE_STATUSES, RefreshJobQueue, refresh_jobs
+
+
+@dataclass
+class SourceSchedule:
+    """Состояние расписания одного источника (время — unix timestamp)."""
+    interval_seconds: float
+    next_run: Optional[float] = None
+    last_started: Optional[float] = None
+    last_finished: Optional[float] = None
+    last_status: Optional[str] = None
+    last_slots: Optional[int] = None
+    skipped: int = 0
+    # Задача в очереди (не сохраняется: id задач живут только в процессе)
+    job_id: Optional[str] = None
+
+
+def parse_intervals(raw: str) -> Dict[str, float]:
+    """"mock=300,yclients_myprotennis=3600" -> {"mock": 300.0, ...}."""
+    intervals: Dict[str, float] = {}
+    for part in (raw or "").split(","):
+        name, sep, value = part.partition("=")
+        if not sep:
+            continue
+        try:
+            intervals[name.strip()] = float(value)
+        except ValueError:
+            print(f"[Scheduler] Некорректный интервал: {part!r}")
+    return intervals
+
+
+def source_intervals(
+    overrides: Mapping[str, float], default_interval: float
+) -> Dict[str, float]:
+    """Интервалы всех источников апдейтера с учётом переопределений."""
+    intervals: Dict[str, float] = {}
+    for source in parser_registry.sources():
+        if source in overrides:
+            intervals[source] = overrides[source]
+        else:
+            spec = parser_registry.spec(source)
+            intervals[source] = spec.refresh_interval_seconds or default_interval
+    return intervals
+
+
+class SlotScheduler:
+    """
+    Фоновый поток, который раз в tick_seconds проверяет, каким источникам
+    пора обновиться, и ставит для них задачи в очередь.
+    """
+
+    def __init__(
+        self,
+        intervals: Mapping[str, float],
+        jitter: float = 0.1,
+        tick_seconds: float = 5,
+        state_path: Optional[str] = None,
+        queue: RefreshJobQueue = refresh_jobs,
+    ):
+        """
+        :param intervals: источник -> интервал обновления в секундах.
+        :param jitter: разброс интервала, доля от него (0.1 — ±10%).
+        :param state_path: JSON-файл с состоянием (None — не сохранять).
+        """
+        self.jitter = jitter
+        self.tick_seconds = tick_seconds
+        self.state_path = state_path
+        self.queue = queue
+
+        self.schedules: Dict[str, SourceSchedule] = {
+            source: SourceSchedule(interval_seconds=interval)
+            for source, interval in intervals.items()
+        }
+        self._load_state()
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_app(cls, app, queue: RefreshJobQueue = refresh_jobs) -> "SlotScheduler":
+        config = app.config
+        intervals = source_intervals(
+            parse_intervals(config.get("SCHEDULER_INTERVALS", "")),
+            config.get("SCHEDULER_DEFAULT_INTERVAL", 900),
+        )
+        return cls(
+            intervals,
+            jitter=config.get("SCHEDULER_JITTER", 0.1),
+            tick_seconds=config.get("SCHEDULER_TICK_SECONDS", 5),
+            state_path=config.get("SCHEDULER_STATE_PATH"),
+            queue=queue,
+        )
+
+    # ---------- Состояние на диске ---------- #
+
+    def _load_state(self) -> None:
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as exc:
+            print(f"[Scheduler] Не удалось прочитать состояние: {exc}")
+            return
+
+        for source, data in saved.items():
+            schedule = self.schedules.get(source)
+            if schedule is None:
+                continue
+            for name in ("last_started", "last_finished", "last_status", "last_slots"):
+                setattr(schedule, name, data.get(name))
+            if schedule.last_started is not None:
+                schedule.next_run = self._next_after(schedule.last_started, schedule)
+
+    def _save_state(self) -> None:
+        if not self.state_path:
+            return
+        data = {}
+        for source, schedule in self.schedules.items():
+            item = asdict(schedule)
+            item.pop("job_id")
+            data[source] = item
+
+        # Пишем во временный файл и подменяем — без полузаписанного JSON
+        tmp_path = f"{self.state_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.state_path)
+        except OSError as exc:
+            print(f"[Scheduler] Не удалось сохранить состояние: {exc}")
+
+    # ---------- Расписание ---------- #
+
+    def _next_after(self, started: float, schedule: SourceSchedule) -> float:
+        spread = schedule.interval_seconds * self.jitter
+        return started + schedule.interval_seconds + random.uniform(-spread, spread)
+
+    def _check_job(self, source: str, schedule: SourceSchedule) -> bool:
+        """
+        Обновляет состояние по задаче источника.
+        Возвращает True, если задача ещё в очереди или выполняется.
+        """
+        if schedule.job_id is None:
+            return False
+
+        job = self.queue.get(schedule.job_id)
+        if job is not None and job["status"] in ACTIVE_STATUSES:
+            return True
+
+        schedule.job_id = None
+        schedule.last_finished = time.time()
+        if job is not None:
+            schedule.last_status = job["status"]
+            schedule.last_slots = sum(
+                p["slots"] for p in job["parsers"] if p["source"] == source
+            )
+        return False
+
+    def tick(self, app, now: Optional[float] = None) -> List[str]:
+        """
+        Один проход планировщика. Возвращает источники, для которых
+        поставлены новые задачи.
+        """
+        now = time.time() if now is None else now
+        launched: List[str] = []
+        changed = False
+
+        for source, schedule in self.schedules.items():
+            was_running = schedule.job_id is not None
+            running = self._check_job(source, schedule)
+            changed = changed or (was_running and not running)
+
+            if schedule.next_run is None:
+                # Первый запуск: размазываем по всему интервалу
+                schedule.next_run = now + random.uniform(0, schedule.interval_seconds)
+            if now < schedule.next_run:
+                continue
+
+            if running:
+                # Прошлый прогон ещё идёт — этот пропускаем
+                schedule.skipped += 1
+                schedule.next_run = self._next_after(now, schedule)
+                print(f"[Scheduler] {source}: прошлое обновление ещё идёт, пропускаем")
+                continue
+
+            job, merged = self.queue.enqueue(app, sources=[source], incremental=True)
+            schedule.job_id = job.id
+            schedule.last_started = now
+            schedule.next_run = self._next_after(now, schedule)
+            changed = True
+
+            if merged:
+                # Источник уже обновляется другой задачей — просто ждём её
+                print(f"[Scheduler] {source}: уже обновляется задачей {job.id}")
+            else:
+                launched.append(source)
+                print(f"[Scheduler] {source}: запущено обновление {job.id}")
+
+        if changed:
+            self._save_state()
+        return launched
+
+    # ---------- Фоновый поток ---------- #
+
+    def start(self, app) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop, args=(app,), name="slot-scheduler", daemon=True
+        )
+        self._thread.start()
+        intervals = ", ".join(
+            f"{source}={schedule.interval_seconds:.0f} с"
+            for source, schedule in self.schedules.items()
+        )
+        print(f"[Scheduler] Запущен: {intervals}")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self, app) -> None:
+        while not self._stop.is_set():
+            try:
+                self.tick(app)
+            except Exception as exc:  # noqa: BLE001
+                # Планировщик не должен умирать из-за одного сбоя
+                print(f"[Scheduler] Ошибка: {exc}")
+            self._stop.wait(self.tick_seconds)
@@ -2,68 +2,548 @@
 Сервис обновления слотов из всех источников.
 
 Здесь мы:
-- вызываем парсеры (mock, YClients, потом добавим другие сайты);
-- очищаем таблицу Slot;
-- записываем новые слоты в БД.
+- параллельно вызываем парсеры (mock, YClients, потом добавим другие сайты);
+- сверяем результат каждого источника с тем, что уже лежит в БД;
+- добавляем новые слоты, обновляем изменившиеся и удаляем пропавшие.
+
+В инкрементальном режиме парсеры, которые умеют собирать слоты по датам,
+получают только устаревшие даты (см. services.freshness), а сверка идёт
+только в пределах того, что парсер реально собрал. Вне горизонта такие
+источники всё равно чистятся: прошедшие дни удаляются при каждой сверке,
+а корты, пропавшие из парсера, — при полном обновлении.
+
+Таблица Slot никогда не очищается целиком: читатели всё время видят
+либо старые, либо новые данные.
 """
 
-from typing import List
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timedelta
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from flask import current_app
+from sqlalchemy import insert
 
 from app import db
+from app.cache import slots_cache
 from app.models import Slot
-from parsers.base import SlotData
-from parsers.mock_parser import MockTennisParser
-from parsers.yclients import YClientsMyProTennisCourtParser
+from app.slot_index import slot_index
+from parsers.base import BaseParser, ScopeKey, SlotBatch, SlotData
+from parsers.registry import parser_registry
+from services.freshness import mark_fresh, parse_budgets, stale_dates
+from services.metrics import (
+    DB_COMMIT,
+    DB_ROWS,
+    DB_WRITE,
+    PARSER_DURATION,
+    PARSER_ERRORS,
+    PARSER_RUNS,
+    PARSER_SLOTS,
+    UPDATE_DURATION,
+    log_event,
+)
+from services.parser_pool import IsolatedParser, get_parser_pool
+
+
+@dataclass
+class ParserRun:
+    """
+    Итог работы одного парсера в рамках обновления.
+    status: ok / error / timeout / cancelled
+    """
+    parser_name: str
+    source_name: str = ""
+    status: str = "pending"
+    slots: Sequence[SlotData] = field(default_factory=list)
+    error: Optional[str] = None
+    started_at: Optional[float] = None
+    seconds: float = 0.0
+    # Что парсер собрал (None — источник целиком), см. BaseParser.fetched_scope
+    scope: Optional[Set[ScopeKey]] = None
+    # Для парсеров по датам: их "сегодня" и все их корты (для чистки
+    # строк вне горизонта, см. _prune_source)
+    today: Optional[date] = None
+    court_keys: List[Tuple[str, str]] = field(default_factory=list)
+
+
+def _save_slots(
+    slots_data: Iterable[SlotData], batch_size: Optional[int] = None
+) -> None:
+    """
+    Сохраняет слоты в БД пачками через Core insert() (executemany),
+    без создания ORM-объектов на каждый слот. Словари колонок строит
+    SlotBatch.mappings — прямо из столбцов, без промежуточных SlotData.
+
+    Пачки идут в текущей транзакции сессии — коммит делает вызывающий код.
+    """
+    batch = slots_data if isinstance(slots_data, SlotBatch) else SlotBatch(slots_data)
+    if not batch:
+        return
+
+    if batch_size is None:
+        batch_size = current_app.config.get("UPDATER_BULK_BATCH_SIZE", 1000)
+    batch_size = max(1, batch_size)
+
+    now = datetime.utcnow()
+    stmt = insert(Slot)
+    for i in range(0, len(batch), batch_size):
+        db.session.execute(
+            stmt, batch.mappings(i, i + batch_size, created_at=now, updated_at=now)
+        )
+
+
+# Ключ слота внутри источника: (club, court, start_datetime)
+SlotKey = Tuple[str, str, datetime]
+
+
+@dataclass
+class SyncStats:
+    """Сколько строк изменила синхронизация одного источника."""
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    # Удалено вне области сверки: прошедшие дни и пропавшие корты
+    pruned: int = 0
+
+
+def _scope_with_slots(
+    scope: Optional[Set[ScopeKey]], slots_data: Iterable[SlotData]
+) -> Optional[Set[ScopeKey]]:
+    """
+    Область сверки: то, что парсер отметил как собранное, плюс
+    (club, court, дата) всех слотов, которые он вернул.
+    """
+    if scope is None:
+        return None
+    return set(scope) | {(s.club, s.court, s.start.date()) for s in slots_data}
 
 
-def _save_slots(slots_data: List[SlotData]) -> None:
+def _prune_source(
+    source: str,
+    before: Optional[date] = None,
+    courts: Optional[Set[Tuple[str, str]]] = None,
+) -> int:
+    """
+    Удаляет строки источника, которые сверка по области уже не увидит:
+    - начавшиеся раньше before (прошедшие дни);
+    - корты не из courts ((club, court), None — не проверять).
+    Возвращает число удалённых строк.
     """
-    Сохраняет список SlotData в БД.
+    pruned = 0
+    if before is not None:
+        pruned += Slot.query.filter(
+            Slot.source == source,
+            Slot.start_datetime < datetime.combine(before, datetime.min.time()),
+        ).delete(synchronize_session=False)
+
+    if courts is not None:
+        present = db.session.query(Slot.club, Slot.court).filter(
+            Slot.source == source
+        ).distinct()
+        for club, court in present.all():
+            if (club, court) in courts:
+                continue
+            pruned += Slot.query.filter(
+                Slot.source == source, Slot.club == club, Slot.court == court
+            ).delete(synchronize_session=False)
+    return pruned
+
+
+def _sync_source(
+    source: str,
+    slots_data: Iterable[SlotData],
+    scope: Optional[Set[ScopeKey]] = None,
+    prune_before: Optional[date] = None,
+    known_courts: Optional[Set[Tuple[str, str]]] = None,
+) -> SyncStats:
     """
+    Приводит слоты источника source в БД к slots_data.
+
+    Сравниваем по ключу (source, club, court, start_datetime):
+    - ключа нет в БД — добавляем;
+    - ключ есть, но поменялись статус/конец/длительность — обновляем;
+    - ключ есть в БД, но парсер его больше не вернул — удаляем.
+    Другие источники не трогаем. Коммит делает вызывающий код.
+
+    scope — сверять только эти (club, court, дата) (см. _scope_with_slots);
+    None — весь источник. При сверке по области строки вне неё чистит
+    _prune_source (prune_before, known_courts).
+    """
+    stats = SyncStats()
+    if scope is not None:
+        stats.pruned = _prune_source(source, prune_before, known_courts)
+        if not scope:
+            return stats
+
+    incoming: Dict[SlotKey, SlotData] = {}
     for s in slots_data:
-        slot = Slot(
-            club=s.club,
-            court=s.court,
-            start_datetime=s.start,
-            end_datetime=s.end,
-            duration_minutes=s.duration_minutes,
-            status=s.status,
-            source=s.source,
+        incoming[(s.club, s.court, s.start)] = s
+
+    query = Slot.query.filter(Slot.source == source)
+    if scope is not None:
+        dates = [d for _, _, d in scope]
+        query = query.filter(
+            Slot.start_datetime >= datetime.combine(min(dates), datetime.min.time()),
+            Slot.start_datetime
+            < datetime.combine(max(dates) + timedelta(days=1), datetime.min.time()),
+        )
+
+    existing: Dict[SlotKey, Slot] = {
+        (slot.club, slot.court, slot.start_datetime): slot
+        for slot in query
+        if scope is None
+        or (slot.club, slot.court, slot.start_datetime.date()) in scope
+    }
+
+    to_insert = SlotBatch()
+    for key, s in incoming.items():
+        slot = existing.pop(key, None)
+        if slot is None:
+            to_insert.append(s)
+            continue
+
+        if (
+            slot.status != s.status
+            or slot.end_datetime != s.end
+            or slot.duration_minutes != s.duration_minutes
+        ):
+            slot.status = s.status
+            slot.end_datetime = s.end
+            slot.duration_minutes = s.duration_minutes
+            stats.updated += 1
+        else:
+            stats.unchanged += 1
+
+    # Всё, что осталось в existing, парсер больше не видит
+    for slot in existing.values():
+        db.session.delete(slot)
+    stats.deleted = len(existing)
+
+    _save_slots(to_insert)
+    stats.inserted = len(to_insert)
+
+    return stats
+
+
+# Колбэк прогресса: вызывается при каждой смене статуса ParserRun
+ProgressCallback = Callable[[ParserRun], None]
+
+
+def _notify(on_progress: Optional[ProgressCallback], run: ParserRun) -> None:
+    if on_progress is None:
+        return
+    try:
+        on_progress(run)
+    except Exception as exc:  # noqa: BLE001
+        # Ошибка в подписчике не должна ломать обновление
+        print(f"[Updater] Ошибка в колбэке прогресса: {exc}")
+
+
+def _run_parser(
+    parser: BaseParser, run: ParserRun, on_progress: Optional[ProgressCallback] = None
+) -> Sequence[SlotData]:
+    """Выполняется в рабочем потоке: запускает парсер и замеряет время."""
+    run.started_at = time.monotonic()
+    run.status = "running"
+    _notify(on_progress, run)
+    print(f"[Updater] Запускаем парсер: {run.parser_name}")
+    slots = parser.fetch_slots()
+    run.scope = parser.fetched_scope()
+    if run.scope is not None:
+        run.today = parser.today()
+        run.court_keys = parser.court_keys()
+    return slots
+
+
+def run_parsers_concurrently(
+    parsers: List[BaseParser],
+    max_workers: int = 4,
+    default_timeout: float = 600,
+    poll_interval: float = 0.5,
+    on_progress: Optional[ProgressCallback] = None,
+) -> List[ParserRun]:
+    """
+    Запускает парсеры в пуле потоков (не больше max_workers одновременно)
+    и ждёт, пока все закончат.
+
+    Таймаут считается с момента фактического старта парсера (в очереди
+    пула время не идёт). Парсеру, вышедшему за таймаут, отправляется
+    request_cancel(), его результат отбрасывается, и апдейтер больше
+    его не ждёт. Падение одного парсера не ломает остальные.
+
+    on_progress(run) вызывается при старте и завершении каждого парсера
+    (из разных потоков — подписчик должен быть потокобезопасным).
+    """
+    runs: Dict[Future, ParserRun] = {}
+    timeouts: Dict[Future, float] = {}
+    parsers_by_future: Dict[Future, BaseParser] = {}
+
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, max_workers), thread_name_prefix="parser"
+    )
+    try:
+        for parser in parsers:
+            run = ParserRun(
+                parser_name=parser.parser_name,
+                source_name=parser.source_name,
+            )
+            _notify(on_progress, run)
+            future = executor.submit(_run_parser, parser, run, on_progress)
+            runs[future] = run
+            timeouts[future] = parser.timeout_seconds or default_timeout
+            parsers_by_future[future] = parser
+
+        pending = set(runs)
+        while pending:
+            done, pending = wait(
+                pending, timeout=poll_interval, return_when=FIRST_COMPLETED
+            )
+
+            for future in done:
+                run = runs[future]
+                run.seconds = time.monotonic() - (run.started_at or time.monotonic())
+                try:
+                    run.slots = future.result()
+                    run.status = "ok"
+                except Exception as exc:  # noqa: BLE001
+                    # Чтобы падение одного парсера не ломало остальные
+                    run.status = "error"
+                    run.error = str(exc)
+                    print(f"[Updater] Ошибка в парсере {run.parser_name}: {exc}")
+                _notify(on_progress, run)
+
+            now = time.monotonic()
+            for future in list(pending):
+                run = runs[future]
+                if run.started_at is None:
+                    continue
+                if now - run.started_at > timeouts[future]:
+                    parsers_by_future[future].request_cancel()
+                    run.status = "timeout"
+                    run.seconds = now - run.started_at
+                    run.error = f"таймаут {timeouts[future]:.0f} с"
+                    pending.discard(future)
+                    _notify(on_progress, run)
+                    print(
+                        f"[Updater] Парсер {run.parser_name} не уложился в "
+                        f"{timeouts[future]:.0f} с — отменяем"
+                    )
+    except BaseException:
+        # Нас самих отменили (KeyboardInterrupt и т.п.) — гасим всех
+        for future, parser in parsers_by_future.items():
+            if not future.done():
+                parser.request_cancel()
+                runs[future].status = "cancelled"
+                _notify(on_progress, runs[future])
+        raise
+    finally:
+        # Зависшие потоки не ждём: они получили request_cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return list(runs.values())
+
+
+def _record_run(run: ParserRun) -> None:
+    """Итог парсера в метрики и JSON-лог."""
+    labels = {"source": run.source_name, "parser": run.parser_name}
+    PARSER_RUNS.inc(status=run.status, **labels)
+    PARSER_DURATION.observe(run.seconds, **labels)
+    if run.status == "ok":
+        PARSER_SLOTS.inc(len(run.slots), **labels)
+    else:
+        PARSER_ERRORS.inc(parser=run.parser_name, stage=run.status)
+    log_event(
+        "parser_run",
+        status=run.status,
+        seconds=round(run.seconds, 3),
+        slots=len(run.slots),
+        error=run.error,
+        **labels,
+    )
+
+
+def build_parsers(sources: Optional[Sequence[str]] = None) -> List[BaseParser]:
+    """
+    Все парсеры апдейтера (см. parsers.registry); sources — оставить
+    только парсеры этих источников. Модули парсеров импортируются здесь,
+    а не при импорте апдейтера.
+    """
+    return parser_registry.create_all(sources)
+
+
+def _plan_incremental(parsers: List[BaseParser]) -> List[BaseParser]:
+    """
+    Оставляет каждому парсеру только устаревшие даты (parser.dates).
+    Парсеры, у которых устаревших дат нет, в прогон не попадают;
+    парсеры без сбора по датам запускаются как обычно.
+    """
+    budgets = parse_budgets(current_app.config.get("FRESHNESS_BUDGETS", ""))
+    grace = current_app.config.get("FRESHNESS_GRACE_SECONDS", 0)
+
+    planned: List[BaseParser] = []
+    for parser in parsers:
+        name = parser.parser_name
+        horizon = parser.horizon_dates()
+        if horizon is None:
+            planned.append(parser)
+            continue
+
+        stale = stale_dates(
+            parser.source_name, parser.court_keys(), horizon, budgets, grace
         )
-        db.session.add(slot)
+        if not stale:
+            print(f"[Updater] {name}: все даты свежие — пропускаем")
+            continue
+
+        parser.dates = stale
+        print(
+            f"[Updater] {name}: устарело дат {len(stale)} из {len(horizon)} "
+            f"({', '.join(d.isoformat() for d in stale)})"
+        )
+        planned.append(parser)
+    return planned
+
+
+def _isolate(parsers: List[BaseParser]) -> List[BaseParser]:
+    """
+    Парсеры с run_in_process уводим в пул процессов (если он включён
+    UPDATER_PROCESS_WORKERS > 0) — браузер не живёт в нашем процессе.
+    """
+    config = current_app.config
+    workers = config.get("UPDATER_PROCESS_WORKERS", 0)
+    if workers <= 0:
+        return parsers
+
+    pool = get_parser_pool(
+        max_workers=workers,
+        max_jobs_per_worker=config.get("UPDATER_PROCESS_MAX_JOBS", 20),
+        max_rss_mb=config.get("UPDATER_PROCESS_MAX_RSS_MB", 1024),
+    )
+    return [IsolatedParser(p, pool) if p.run_in_process else p for p in parsers]
 
 
-def update_slots_from_all_sources() -> int:
+def update_slots_from_all_sources(
+    on_progress: Optional[ProgressCallback] = None,
+    sources: Optional[Sequence[str]] = None,
+    incremental: bool = False,
+) -> int:
     """
-    Основная функция, которую дергает API /api/update_slots.
+    Основная функция обновления (её выполняет фоновая задача /api/update_slots).
+    on_progress — см. run_parsers_concurrently.
+    sources — обновить только эти источники (для планировщика), None — все.
+    incremental — собирать только устаревшие даты (см. services.freshness).
 
-    Возвращает количество добавленных слотов.
+    Возвращает количество слотов, полученных от успешно отработавших
+    парсеров (т.е. актуальное число слотов по этим источникам).
     """
 
-    # Здесь будут все наши парсеры.
-    parsers = [
-        MockTennisParser(),
-        YClientsMyProTennisCourtParser(),
-    ]
+    started = time.perf_counter()
+    parsers = build_parsers(sources)
+    if incremental:
+        parsers = _plan_incremental(parsers)
+        if not parsers:
+            print("[Updater] Обновлять нечего: все данные свежие")
+            return 0
+    parsers = _isolate(parsers)
 
-    # Пока не заморачиваемся по источникам — просто очищаем таблицу Slot.
-    Slot.query.delete()
-    db.session.commit()
+    # Парсеры работают параллельно и не трогают БД —
+    # синхронизируем их результаты уже здесь, в потоке запроса.
+    runs = run_parsers_concurrently(
+        parsers,
+        max_workers=current_app.config.get("UPDATER_MAX_WORKERS", 4),
+        default_timeout=current_app.config.get("UPDATER_PARSER_TIMEOUT", 600),
+        on_progress=on_progress,
+    )
 
     total_slots = 0
 
-    for parser in parsers:
-        print(f"[Updater] Запускаем парсер: {parser.__class__.__name__}")
-        try:
-            slots_data = parser.fetch_slots()
-        except Exception as exc:  # noqa: BLE001
-            # Чтобы падение одного парсера не ломало остальные
-            print(f"[Updater] Ошибка в парсере {parser.__class__.__name__}: {exc}")
+    # Результаты парсеров одного источника сводим вместе
+    slots_by_source: Dict[str, SlotBatch] = {}
+    scope_by_source: Dict[str, Optional[Set[ScopeKey]]] = {}
+    # Чистка вне горизонта для сверки по области (см. _prune_source)
+    prune_before: Dict[str, date] = {}
+    known_courts: Dict[str, Set[Tuple[str, str]]] = {}
+    for run in runs:
+        print(
+            f"[Updater] {run.parser_name}: {run.status}, "
+            f"слотов {len(run.slots)}, {run.seconds:.2f} с"
+        )
+        _record_run(run)
+        if run.status != "ok":
+            # Источник не ответил — оставляем его прежние слоты как есть
             continue
 
-        _save_slots(slots_data)
-        total_slots += len(slots_data)
+        slots_by_source.setdefault(run.source_name, SlotBatch()).extend(run.slots)
+        total_slots += len(run.slots)
+
+        # Хоть один парсер источника отдал всё целиком — сверяем весь источник
+        scope = _scope_with_slots(run.scope, run.slots)
+        if run.source_name not in scope_by_source:
+            scope_by_source[run.source_name] = scope
+        elif scope is None or scope_by_source[run.source_name] is None:
+            scope_by_source[run.source_name] = None
+        else:
+            scope_by_source[run.source_name] |= scope
+
+        if run.today is not None:
+            before = prune_before.get(run.source_name, run.today)
+            prune_before[run.source_name] = min(before, run.today)
+            known_courts.setdefault(run.source_name, set()).update(run.court_keys)
 
-    db.session.commit()
+    index_scopes = dict(scope_by_source)
+    for source, slots_data in slots_by_source.items():
+        scope = scope_by_source[source]
+        sync_started = time.perf_counter()
+        stats = _sync_source(
+            source,
+            slots_data,
+            scope,
+            prune_before=prune_before.get(source),
+            # Инкрементальный прогон собирает не все корты — их не чистим
+            known_courts=None if incremental else known_courts.get(source),
+        )
+        if scope is not None:
+            mark_fresh(source, scope)
+        if stats.pruned:
+            # Удалены строки вне области — индекс перестраиваем целиком
+            index_scopes[source] = None
+        sync_seconds = time.perf_counter() - sync_started
+        print(
+            f"[Updater] Источник {source}: +{stats.inserted}, "
+            f"~{stats.updated}, -{stats.deleted}, без изменений {stats.unchanged}, "
+            f"вычищено {stats.pruned}"
+        )
+        DB_WRITE.observe(sync_seconds, source=source)
+        for op in ("inserted", "updated", "deleted", "pruned"):
+            DB_ROWS.inc(getattr(stats, op), source=source, op=op)
+        log_event(
+            "source_sync",
+            source=source,
+            seconds=round(sync_seconds, 3),
+            scoped=scope is not None,
+            **asdict(stats),
+        )
+
+    # Один коммит на всё обновление
+    with DB_COMMIT.time():
+        db.session.commit()
+    # Индекс слотов: перечитываем затронутые дни (до сброса кэша, чтобы
+    # новые ответы кэшировались уже по обновлённому индексу)
+    slot_index.apply_sync(index_scopes[source] for source in slots_by_source)
+    # Закэшированные ответы /api/slots больше не актуальны
+    slots_cache.bump_generation()
     print(f"[Updater] Обновление завершено, всего слотов: {total_slots}")
+
+    mode = "incremental" if incremental else "full"
+    seconds = time.perf_counter() - started
+    UPDATE_DURATION.observe(seconds, mode=mode)
+    log_event(
+        "update_done",
+        mode=mode,
+        sources=sorted(slots_by_source),
+        slots=total_slots,
+        seconds=round(seconds, 3),
+    )
     return total_slots